@@ -12,6 +12,7 @@ cmdsdir = os.path.join(satdir, 'commands')
 gettext.install("salomeTools", os.path.join(srcdir, "i18n"))
 
 import application
+import cache
 import check
 import clean
 import compile
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import time
+
+import src
+
+# Define all possible option for the cache command :  sat cache <options>
+parser = src.options.Options()
+parser.add_option('s', 'stats', 'boolean', 'stats',
+                  _('Optional: Display the number and the size of the archives '
+                    'of the artifact cache, by product.'))
+parser.add_option('', 'prune', 'boolean', 'prune',
+                  _('Optional: Remove the least recently used archives of the '
+                    'artifact cache, down to its maximum size.'))
+parser.add_option('', 'max_size', 'string', 'max_size',
+                  _('Optional: The maximum size of the artifact cache in GB, '
+                    'for --prune (LOCAL.artifact_max_size by default).'))
+
+def format_size(size):
+    '''Format a size in bytes, in KB, MB or GB
+
+    :param size int: The size in bytes
+    :return: the formatted size
+    :rtype: str
+    '''
+    if size >= src.artifacts.GB:
+        return "%.2f GB" % (size / src.artifacts.GB)
+    if size >= 1024.0 ** 2:
+        return "%.2f MB" % (size / (1024.0 ** 2))
+    return "%.2f KB" % (size / 1024.0)
+
+def format_time(t):
+    '''Format a time of last use
+
+    :param t float: The time, None if there is none
+    :return: the formatted time
+    :rtype: str
+    '''
+    if t is None:
+        return "-"
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t))
+
+def display_stats(artifacts, logger):
+    '''Display the statistics of the artifact cache
+
+    :param artifacts ArtifactCache: The artifact cache
+    :param logger Logger: The logger instance to use for the display
+    '''
+    stats = artifacts.get_stats()
+    max_size = "-"
+    if stats["max_size"] is not None:
+        max_size = format_size(stats["max_size"])
+    info = [(_("archives"), stats["archives"]),
+            (_("size"), format_size(stats["size"])),
+            (_("maximum size"), max_size),
+            (_("least recent use"), format_time(stats["oldest"])),
+            (_("most recent use"), format_time(stats["newest"]))]
+    src.print_info(logger, info)
+
+    if stats["products"]:
+        logger.write("\n", 3)
+        info = []
+        for p_name in sorted(stats["products"]):
+            nb, size = stats["products"][p_name]
+            info.append((p_name, "%d (%s)" % (nb, format_size(size))))
+        src.print_info(logger, info)
+
+def description():
+    '''method that is called when salomeTools is called with --help option.
+
+    :return: The text to display for the cache command description.
+    :rtype: str
+    '''
+    return _("The cache command displays the statistics of the artifact cache "
+             "(the archives of the installations of the compiled products, "
+             "in the directory LOCAL.artifact_dir), or removes its least "
+             "recently used archives.\n\nexample:\nsat cache --prune --max_size 50")
+
+def run(args, runner, logger):
+    '''method that is called when salomeTools is called with cache parameter.
+    '''
+    # Parse the options
+    (options, args) = parser.parse_args(args)
+
+    artifacts = src.artifacts.get_artifact_cache(runner.cfg)
+    if artifacts is None:
+        msg = _("Error: there is no artifact cache, set its directory with: "
+                "sat init --artifact_dir <path>")
+        logger.write(src.printcolors.printcError(msg) + "\n", 1)
+        return 1
+
+    logger.write(_('Artifact cache %s\n\n') %
+                 src.printcolors.printcLabel(artifacts.directory), 1)
+
+    if options.prune:
+        max_size = artifacts.max_size
+        if options.max_size:
+            max_size = src.artifacts.get_size(options.max_size)
+            if max_size is None:
+                msg = _("Error: invalid maximum size %s") % options.max_size
+                logger.write(src.printcolors.printcError(msg) + "\n", 1)
+                return 1
+        if max_size is None:
+            msg = _("Error: the maximum size of the artifact cache is not set, "
+                    "use --max_size or sat init --artifact_max_size")
+            logger.write(src.printcolors.printcError(msg) + "\n", 1)
+            return 1
+        removed, removed_size = artifacts.prune(max_size)
+        for path in removed:
+            logger.write(_("remove %s\n") % path, 4)
+        logger.write(_("%(nb)d archive(s) removed (%(size)s)\n\n") %
+                     {"nb": len(removed), "size": format_size(removed_size)}, 1)
+
+    if options.stats or not options.prune:
+        display_stats(artifacts, logger)
+
+    return 0
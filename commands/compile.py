@@ -19,6 +19,8 @@
 import os
 import sys
 import re
+import time
+import signal
 import subprocess
 import src
 import src.debug as DBG
@@ -38,7 +40,7 @@ parser.add_option('p', 'products', 'list2', 'products',
 parser.add_option('f', 'force', 'boolean', 'force',
     'Optional: force the compilation of product, even if it is already installed. The BUILD directory is cleaned before compilation.')
 parser.add_option('u', 'update', 'boolean', 'update',
-    'Optional: update mode, compile only products which sources has changed, including the dependencies.')
+    'Optional: update mode, compile only products which sources, options or dependencies have changed since their compilation.')
 parser.add_option('', 'with_fathers', 'boolean', 'fathers',
     _("Optional: build all necessary products to the given product (KERNEL is "
       "build before building GUI)."), False)
@@ -63,73 +65,21 @@ parser.add_option('', 'check', 'boolean', 'check', _(
 
 parser.add_option('', 'clean_build_after', 'boolean', 'clean_build_after', 
                   _('Optional: remove the build directory after successful compilation'), False)
-
-
-# from sat product infos, represent the product dependencies in a simple python graph
-# keys are nodes, the list of dependencies are values
-def get_dependencies_graph(p_infos, compile_time=True):
-    graph={}
-    for (p_name,p_info) in p_infos:
-        depprod=[]
-        for d in p_info.depend:
-            depprod.append(d)
-        if compile_time and "build_depend" in p_info:
-            for d in p_info.build_depend:
-                depprod.append(d)
-        graph[p_name]=depprod
-    return graph
-
-# this recursive function calculates all the dependencies of node start
-def depth_search_graph(graph, start, visited=[]):
-    visited= visited+ [start]
-    for node in graph[start]:  # for all nodes in start dependencies
-        if node not in visited:
-            visited=depth_search_graph(graph, node, visited)
-    return visited
-
-# find a path from start node to end (a group of nodes)
-def find_path_graph(graph, start, end, path=[]):
-    path = path + [start]
-    if start in end:
-        return path
-    if start not in graph:
-        return None
-    for node in graph[start]:
-        if node not in path:
-            newpath = find_path_graph(graph, node, end, path)
-            if newpath: return newpath
-    return None
-
-# Topological sorting algo
-# return in sorted_nodes the list of sorted nodes
-def depth_first_topo_graph(graph, start, visited=[], sorted_nodes=[]):
-    visited = visited + [start]
-    if start not in graph:
-        # get more explicit error
-        where = [k for k in graph if start in graph[k]]
-        raise src.SatException('Error in product dependencies : %s product is referenced in products dependencies, but is not present in the application, from %s' % (start, where))
-        # may be in debug mode, continue loop to get all problems, (if comment raise)
-        # print("WARNING : %s product is referenced in products dependencies but is not present in the application, from %s" % (start, where))
-        # sorted_nodes = sorted_nodes + [start]
-        # return visited, sorted_nodes
-    for node in graph[start]:
-        if node not in visited:
-            visited,sorted_nodes=depth_first_topo_graph(graph, node, visited,sorted_nodes)
-        else:
-            if node not in sorted_nodes:
-                raise src.SatException('Error in product dependencies : cycle detection for node %s and %s' % (start,node))
-    
-    sorted_nodes = sorted_nodes + [start]
-    return visited, sorted_nodes
+parser.add_option('j', 'jobs', 'int', 'jobs', 
+                  _('Optional: the number of products compiled in parallel, '
+                    'each one as soon as its dependencies are installed (default 1).'), 1)
+parser.add_option('', 'max_load', 'int', 'max_load', 
+                  _('Optional: with --jobs, the number of processors shared by the make '
+                    'commands of the products (default: all the processors).'))
 
 
 # check for p_name that all dependencies are installed
-def check_dependencies(config, p_name_p_info, all_products_dict):
+def check_dependencies(config, p_name_p_info, all_products_dict, checker=None):
     l_depends_not_installed = []
     for prod in p_name_p_info[1]["depend_all"]:
         # for each dependency, check the install
         prod_name, prod_info=all_products_dict[prod]
-        if not(src.product.check_installation(config, prod_info)):
+        if not(src.product.check_installation(config, prod_info, checker)):
             l_depends_not_installed.append(prod_name)
     return l_depends_not_installed   # non installed deps
 
@@ -146,20 +96,37 @@ def log_res_step(logger, res):
         logger.write("%s \n" % src.printcolors.printcError("KO"), 4)
         logger.flush()
 
-def compile_all_products(sat, config, options, products_infos, all_products_dict, all_products_graph, logger):
-    '''Execute the proper configuration commands 
-       in each product build directory.
+def installs_in_shared_dir(config, p_info):
+    '''Check if the product is installed in a directory shared with other
+       products (single install dir, or pip products installed in python).
+       For these products, the test to determine if the product is already 
+       compiled is based on configuration file, not the directory, which is
+       not removed after a failure.
+
+    :param config Config: The global configuration
+    :param p_info Config: The configuration of the product
+    :return: True if the install directory is shared
+    :rtype: boolean
+    '''
+    is_single_dir=(src.appli_test_property(config,"single_install_dir", "yes") and \
+                   src.product.product_test_property(p_info,"single_install_dir", "yes"))
+    is_pip= (src.appli_test_property(config,"pip", "yes") and src.product.product_test_property(p_info,"pip", "yes"))
+    return is_single_dir or (is_pip and src.appli_test_property(config,"pip_install_dir", "python"))
+
+def clean_products(sat, config, options, products_infos, all_products_graph, fingerprints, logger):
+    '''Clean the build and the install directories of the products,
+       as required by the options (before their compilation).
 
     :param config Config: The global configuration
     :param products_info list: List of 
                                  (str, Config) => (product_name, product_info)
-    :param all_products_dict: Dict of all products 
     :param all_products_graph: graph of all products 
+    :param fingerprints Fingerprints: the fingerprints of the products,
+                                      for the option --update
     :param logger Logger: The logger instance to use for the display and logging
-    :return: the number of failing commands.
-    :rtype: int
+    :return: True if one of the products is a salome module
+    :rtype: boolean
     '''
-    # first loop for the cleaning 
     check_salome_configuration=False
     updated_products=[]
     for p_name_info in products_infos:
@@ -207,57 +174,290 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
                           verbose=0,
                           logger_add_link = logger)
 
-            if options.update and src.product.product_is_vcs(p_info):
-            # only VCS products are concerned by update option
-                try: 
-                    do_update=False
-                    if len(updated_products)>0:
-                        # if other products where updated, check that the current product is a child 
-                        # in this case it will be also updated
-                        if find_path_graph(all_products_graph, p_name, updated_products):
-                            logger.write("\nUpdate product %s (child)" % p_name, 5)
-                            do_update=True
-                    if (not do_update) and os.path.isdir(p_info.source_dir) \
-                                       and os.path.isdir(p_info.install_dir):
-                        source_time=os.path.getmtime(p_info.source_dir)
-                        install_time=os.path.getmtime(p_info.install_dir)
-                        if install_time<source_time:
-                            logger.write("\nupdate product %s" % p_name, 5)
-                            do_update=True
-                    if do_update:
-                        updated_products.append(p_name) 
-                        sat.clean(config.VARS.application + 
-                                  " --products " + p_name + 
-                                  " --build --install",
-                                  batch=True,
-                                  verbose=0,
-                                  logger_add_link = logger)
-                except Exception:
-                    pass
+            if options.update:
+                try:
+                    do_update = check_product_update(config, p_name, p_info,
+                                                     fingerprints, all_products_graph,
+                                                     updated_products, logger)
+                except (OSError, IOError, src.SatException,
+                        src.pyconf.ConfigError) as e:
+                    # the product is compiled if it is not installed
+                    msg = _("WARNING: cannot check the update of product %s: %s")
+                    logger.write("\n%s\n" % src.printcolors.printcWarning(
+                                                     msg % (p_name, str(e))), 3)
+                    do_update = False
+                if do_update:
+                    updated_products.append(p_name) 
+                    sat.clean(config.VARS.application + 
+                              " --products " + p_name + 
+                              " --build --install",
+                              batch=True,
+                              verbose=0,
+                              logger_add_link = logger)
+    return check_salome_configuration
+
+def check_product_update(config, p_name, p_info, fingerprints, all_products_graph, updated_products, logger):
+    '''Check if an installed product has to be compiled again (option --update):
+       its fingerprint (sources, patches, build options, environment and
+       fingerprints of the dependencies) is not the one of its installation.
+       For the products installed without fingerprint, only the git products
+       whose sources are more recent than the installation are compiled again,
+       with their children.
 
-    if check_salome_configuration:
-        # For salome applications, we check if the sources of configuration modules are present
-        # configuration modules have the property "configure_dependency"
-        # they are implicit prerequisites of the compilation.
-        res=0
+    :param config Config: The global configuration
+    :param p_name str: The name of the product
+    :param p_info Config: The configuration of the product
+    :param fingerprints Fingerprints: the fingerprints of the products
+    :param all_products_graph: graph of all products 
+    :param updated_products list: the products compiled again
+    :param logger Logger: The logger instance to use for the display and logging
+    :return: True if the product has to be compiled again
+    :rtype: boolean
+    '''
+    if not os.path.isdir(p_info.install_dir):
+        return False # not installed, it will be compiled
+    fingerprint = fingerprints.get(p_name)
+    if fingerprint is None:
+        logger.write("\nno fingerprint for product %s (sources not found)" % p_name, 5)
+        return False
+    old = src.fingerprint.read_fingerprint(p_info)
+    if old is not None:
+        if old["fingerprint"] == fingerprint["fingerprint"]:
+            return False
+        logger.write("\nupdate product %s (changed: %s)" % 
+                     (p_name, ", ".join(src.fingerprint.get_changes(old, fingerprint))), 5)
+        return True
+
+    # installed without fingerprint: the dates of the directories
+    if len(updated_products)>0 and all_products_graph.has_path(p_name, updated_products):
+        logger.write("\nUpdate product %s (child)" % p_name, 5)
+        return True
+    if src.product.product_is_vcs(p_info) and os.path.isdir(p_info.source_dir):
+        source_time=os.path.getmtime(p_info.source_dir)
+        install_time=os.path.getmtime(p_info.install_dir)
+        if install_time<source_time:
+            logger.write("\nupdate product %s" % p_name, 5)
+            return True
+    # the installation is up to date: its fingerprint is the current one
+    if src.product.check_installation(config, p_info):
+        src.fingerprint.write_fingerprint(p_info, fingerprint)
+    return False
+
+def check_configuration_sources(config, all_products_dict, checker, logger):
+    '''Check that the sources of the configuration modules are present.
+
+    :param config Config: The global configuration
+    :param all_products_dict: Dict of all products 
+    :param checker PresenceChecker: the shared listings of the directories
+    :param logger Logger: The logger instance to use for the display and logging
+    :return: the number of configuration modules without sources
+    :rtype: int
+    '''
+    # For salome applications, we check if the sources of configuration modules are present
+    # configuration modules have the property "configure_dependency"
+    # they are implicit prerequisites of the compilation.
+    res=0
+
+    # get the list of all modules in application 
+    all_products_infos = src.product.get_products_infos(config.APPLICATION.products,
+                                                        config)
+    check_source = True
+    # for configuration modules, check if sources are present
+    for prod in all_products_dict:
+        product_name, product_info = all_products_dict[prod]
+        if src.product.product_is_configuration(product_info):
+            check_source = check_source and src.product.check_source(product_info, checker)
+            if not check_source:
+                logger.write(_("\nERROR : SOURCES of %s not found! It is required for" 
+                               " the configuration\n" % product_name))
+                logger.write(_("        Get it with the command : sat prepare %s -p %s \n" % 
+                              (config.APPLICATION.name, product_name)))
+                res += 1
+    return res
+
+def get_compile_header(p_name, len_end_line):
+    '''Get the header of the lines logging the compilation of a product.
+
+    :param p_name str: The name of the product
+    :param len_end_line int: the length of the end of the line
+    :return: the header
+    :rtype: str
+    '''
+    header = _("Compilation of %s") % src.printcolors.printcLabel(p_name)
+    header += " %s " % ("." * (len_end_line - len(p_name)))
+    return header
+
+def check_product_to_compile(config, options, p_name_info, checker, logger, header):
+    '''Check if a product has to be compiled, and log the reason if not
+       (not compilable, native, sources not found, already installed...).
+
+    :param config Config: The global configuration
+    :param p_name_info tuple: (str, Config) => (product_name, product_info)
+    :param checker PresenceChecker: the shared listings of the directories
+    :param logger Logger: The logger instance to use for the display and logging
+    :param header Str: the header to display when logging
+    :return: the up to date configuration of the product (None if it is not
+             compiled) and the number of errors (1 if the sources are missing)
+    :rtype: (Config, int)
+    '''
+    p_name, p_info = p_name_info
+
+    # Do nothing if the product is not compilable
+    if not src.product.product_compiles(p_info):
+        log_step(logger, header, "ignored")
+        logger.write("\n", 3, False)
+        return None, 0
+
+    # skip product if git server does not host all git repositories
+    # product is not opensource and git server does not have all repositories (closed and open sources)
+    if src.product.product_is_not_opensource(p_info) and not src.git_server_has_all_repositories(config, config.APPLICATION.properties.git_server):
+        log_step(logger, header, "ignored")
+        logger.write("\n", 3, False)
+        return None, 0
+
+    # Do nothing if the product is native
+    if src.product.product_is_native(p_info):
+        log_step(logger, header, "native")
+        logger.write("\n", 3, False)
+        return None, 0
+
+    # Do nothing if the product is fixed (already compiled by third party)
+    if src.product.product_is_fixed(p_info):
+        log_step(logger, header, "native")
+        logger.write("\n", 3, False)
+        return None, 0
+
+    # Recompute the product information to get the right install_dir
+    # (it could change if there is a clean of the install directory)
+    src.product.invalidate_product_config(config, p_name)
+    p_info = src.product.get_product_config(config, p_name)
+        
+    # Check if sources was already successfully installed
+    check_source = src.product.check_source(p_info, checker)
+    is_pip= (src.appli_test_property(config,"pip", "yes") and src.product.product_test_property(p_info,"pip", "yes"))
+    # don't check sources with option --show 
+    # or for products managed by pip (there sources are in wheels stored in LOCAL.ARCHIVE
+    if not (options.no_compile or is_pip):
+        if not check_source:
+            logger.write(_("Sources of product not found (try 'sat -h prepare') \n"))
+            return None, 1 # one more error
+    # if we don't force compilation, check if the was already successfully installed.
+    # we don't compile in this case.
+    if (not options.force) and src.product.check_installation(config, p_info, checker):
+        logger.write(_("Already installed"))
+        logger.write(_(" in %s" % p_info.install_dir), 4)
+        logger.write(_("\n"))
+        return None, 0
+
+    # If the show option was called, do not launch the compilation
+    if options.no_compile:
+        logger.write(_("Not installed in %s\n" % p_info.install_dir))
+        return None, 0
+    return p_info, 0
+
+def restore_product(config, options, p_name_info, fingerprints, artifacts, logger, header):
+    '''Restore the installation of a product from the artifact cache, if
+       it has the installation of the same fingerprint (not with --force).
+
+    :param config Config: The global configuration
+    :param p_name_info tuple: (str, Config) => (product_name, product_info)
+    :param fingerprints Fingerprints: the fingerprints of the products
+    :param artifacts ArtifactCache: the artifact cache, None if there is none
+    :param logger Logger: The logger instance to use for the display and logging
+    :param header Str: the header to display when logging
+    :return: True if the installation was restored
+    :rtype: boolean
+    '''
+    p_name, p_info = p_name_info
+    if artifacts is None or options.force or installs_in_shared_dir(config, p_info):
+        return False
+    fingerprint = fingerprints.get(p_name)
+    if fingerprint is None:
+        return False
+    key = src.artifacts.get_key(config, p_info, fingerprint)
+    if not os.path.isfile(artifacts.get_path(p_name, key)):
+        return False
+    log_step(logger, header, "RESTORE")
+    if not artifacts.restore(p_name, key, p_info.install_dir):
+        logger.write(_("\nCannot restore from %s\n") % artifacts.get_path(p_name, key), 4)
+        return False
+    logger.write(_("\nRestored from %s\n") % artifacts.get_path(p_name, key), 4)
+    # the config file, as after the compilation
+    src_sha1=src.system.git_describe(p_info.source_dir)
+    if src_sha1:
+        p_info.git_tag_description=src_sha1
+    src.product.add_compile_config_file(p_info, config)
+    src.fingerprint.write_fingerprint(p_info, fingerprint)
+    return True
+
+def store_product(config, p_name_info, fingerprints, artifacts, logger, header):
+    '''Store the installation of a product compiled successfully in the
+       artifact cache (not for the products installed in a shared directory).
+
+    :param config Config: The global configuration
+    :param p_name_info tuple: (str, Config) => (product_name, product_info)
+    :param fingerprints Fingerprints: the fingerprints of the products
+    :param artifacts ArtifactCache: the artifact cache, None if there is none
+    :param logger Logger: The logger instance to use for the display and logging
+    :param header Str: the header to display when logging
+    '''
+    p_name, p_info = p_name_info
+    if artifacts is None or installs_in_shared_dir(config, p_info):
+        return
+    fingerprint = fingerprints.get(p_name)
+    if fingerprint is None:
+        return
+    key = src.artifacts.get_key(config, p_info, fingerprint)
+    log_step(logger, header, "STORE")
+    if artifacts.store(p_name, key, p_info.install_dir):
+        logger.write(_("\nStored in %s\n") % artifacts.get_path(p_name, key), 4)
+
+def log_dependencies_not_installed(logger, header, l_depends_not_installed):
+    '''Log the error of a product whose dependencies are not installed.
+
+    :param logger Logger: The logger instance to use for the display and logging
+    :param header Str: the header to display when logging
+    :param l_depends_not_installed list: the names of the dependencies
+    '''
+    log_step(logger, header, "")
+    logger.write(src.printcolors.printcError(
+            _("ERROR : the following mandatory product(s) is(are) not installed: ")))
+    for prod_name in l_depends_not_installed:
+        logger.write(src.printcolors.printcError(prod_name + " "))
+    logger.write("\n")
+
+def compile_all_products(sat, config, options, products_infos, all_products_dict, all_products_graph, logger):
+    '''Execute the proper configuration commands 
+       in each product build directory.
+
+    :param config Config: The global configuration
+    :param products_info list: List of 
+                                 (str, Config) => (product_name, product_info)
+    :param all_products_dict: Dict of all products 
+    :param all_products_graph: graph of all products 
+    :param logger Logger: The logger instance to use for the display and logging
+    :return: the number of failing commands.
+    :rtype: int
+    '''
+    # the fingerprints of the products, computed when they are used: for the
+    # option --update, the artifact cache, and to write in the install
+    # directories of the products compiled successfully
+    fingerprints = src.fingerprint.Fingerprints(config)
+    # the installations of the products compiled before, if any
+    artifacts = src.artifacts.get_artifact_cache(config)
+
+    # first loop for the cleaning 
+    check_salome_configuration = clean_products(sat, config, options, products_infos,
+                                                all_products_graph, fingerprints, logger)
 
-        # get the list of all modules in application 
-        all_products_infos = src.product.get_products_infos(config.APPLICATION.products,
-                                                            config)
-        check_source = True
-        # for configuration modules, check if sources are present
-        for prod in all_products_dict:
-            product_name, product_info = all_products_dict[prod]
-            if src.product.product_is_configuration(product_info):
-                check_source = check_source and src.product.check_source(product_info)
-                if not check_source:
-                    logger.write(_("\nERROR : SOURCES of %s not found! It is required for" 
-                                   " the configuration\n" % product_name))
-                    logger.write(_("        Get it with the command : sat prepare %s -p %s \n" % 
-                                  (config.APPLICATION.name, product_name)))
-                    res += 1
+    # the presence of the sources and installations, listed once per directory
+    # (the installation directory of a product is listed again after its compilation)
+    checker = src.product.PresenceChecker()
+
+    if check_salome_configuration:
+        res = check_configuration_sources(config, all_products_dict, checker, logger)
         if res>0:
-            return res  # error configure dependency : we stop the compilation
+            return res  # error configure dependency : we stop the compilation
 
     # second loop to compile
     res = 0
@@ -267,93 +467,39 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
         
         # Logging
         len_end_line = 30
-        header = _("Compilation of %s") % src.printcolors.printcLabel(p_name)
-        header += " %s " % ("." * (len_end_line - len(p_name)))
+        header = get_compile_header(p_name, len_end_line)
         logger.write(header, 3)
         logger.flush()
 
-        # Do nothing if the product is not compilable
-        if not src.product.product_compiles(p_info):
-            log_step(logger, header, "ignored")
-            logger.write("\n", 3, False)
-            continue
-
-        # skip product if git server does not host all git repositories
-        # product is not opensource and git server does not have all repositories (closed and open sources)
-        if src.product.product_is_not_opensource(p_info) and not src.git_server_has_all_repositories(config, config.APPLICATION.properties.git_server):
-            log_step(logger, header, "ignored")
-            logger.write("\n", 3, False)
-            continue
-
-        # Do nothing if the product is native
-        if src.product.product_is_native(p_info):
-            log_step(logger, header, "native")
-            logger.write("\n", 3, False)
-            continue
-
-        # Do nothing if the product is fixed (already compiled by third party)
-        if src.product.product_is_fixed(p_info):
-            log_step(logger, header, "native")
-            logger.write("\n", 3, False)
-            continue
-
-
-        # Recompute the product information to get the right install_dir
-        # (it could change if there is a clean of the install directory)
-        p_info = src.product.get_product_config(config, p_name)
-        
-        # Check if sources was already successfully installed
-        check_source = src.product.check_source(p_info)
-        is_pip= (src.appli_test_property(config,"pip", "yes") and src.product.product_test_property(p_info,"pip", "yes"))
-        # don't check sources with option --show 
-        # or for products managed by pip (there sources are in wheels stored in LOCAL.ARCHIVE
-        if not (options.no_compile or is_pip):
-            if not check_source:
-                logger.write(_("Sources of product not found (try 'sat -h prepare') \n"))
-                res += 1 # one more error
-                continue
-        # if we don't force compilation, check if the was already successfully installed.
-        # we don't compile in this case.
-        if (not options.force) and src.product.check_installation(config, p_info):
-            logger.write(_("Already installed"))
-            logger.write(_(" in %s" % p_info.install_dir), 4)
-            logger.write(_("\n"))
-            continue
-
-        # If the show option was called, do not launch the compilation
-        if options.no_compile:
-            logger.write(_("Not installed in %s\n" % p_info.install_dir))
+        p_info, res_check = check_product_to_compile(config, options, p_name_info,
+                                                     checker, logger, header)
+        res += res_check
+        if p_info is None:
             continue
 
         # Check if the dependencies are installed
-        l_depends_not_installed = check_dependencies(config, p_name_info, all_products_dict)
+        l_depends_not_installed = check_dependencies(config, p_name_info, all_products_dict, checker)
         if len(l_depends_not_installed) > 0:
-            log_step(logger, header, "")
-            logger.write(src.printcolors.printcError(
-                    _("ERROR : the following mandatory product(s) is(are) not installed: ")))
-            for prod_name in l_depends_not_installed:
-                logger.write(src.printcolors.printcError(prod_name + " "))
-            logger.write("\n")
+            log_dependencies_not_installed(logger, header, l_depends_not_installed)
             continue
 
-        # Call the function to compile the product
-        res_prod, len_end_line, error_step = compile_product(
-             sat, p_name_info, config, options, logger, header, len_end_line)
+        # Restore the installation from the artifact cache, 
+        # or call the function to compile the product
+        if restore_product(config, options, (p_name, p_info), fingerprints, artifacts, logger, header):
+            res_prod, error_step = 0, ""
+        else:
+            res_prod, len_end_line, error_step = compile_product(
+                 sat, p_name_info, config, options, fingerprints, logger, header, len_end_line)
+            if res_prod == 0:
+                store_product(config, (p_name, p_info), fingerprints, artifacts, logger, header)
+        checker.invalidate(p_info.install_dir)
         
         if res_prod != 0:
             res += 1
             # there was an error, we clean install dir, unless :
             #  - the error step is "check", or
             #  - the product is managed by pip and installed in python dir
-            do_not_clean_install=False
-            is_single_dir=(src.appli_test_property(config,"single_install_dir", "yes") and \
-                           src.product.product_test_property(p_info,"single_install_dir", "yes"))
-              
-            if (error_step == "CHECK") or (is_pip and src.appli_test_property(config,"pip_install_dir", "python")) or is_single_dir  :
-                # cases for which we do not want to remove install dir
-                #   for is_single_dir and is_pip, the test to determine if the product is already 
-                #   compiled is based on configuration file, not the directory
-                do_not_clean_install=True 
+            do_not_clean_install = (error_step == "CHECK") or installs_in_shared_dir(config, p_info)
 
             if not do_not_clean_install:
                 # Clean the install directory if there is any
@@ -404,12 +550,377 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
         
     return res
 
-def compile_product(sat, p_name_info, config, options, logger, header, len_end):
+def get_compile_job_command(sat, config, options, p_name):
+    '''Get the command compiling one product in a child sat process.
+       The products compiled in parallel do not share the configuration,
+       the options and the logger of the current process.
+       The log directory of the child process is given by the SAT_LOG_DIR
+       environment variable (an overwrite would change the key of the
+       config snapshot).
+    
+    :param sat Sat: The current sat instance (its global options are passed on)
+    :param config Config: The global configuration
+    :param p_name str: The name of the product
+    :return: the command, as a list of arguments
+    :rtype: list
+    '''
+    cmd = [sys.executable, os.path.join(config.VARS.salometoolsway, "sat"),
+           "-b", "-v", str(config.USER.output_verbose_level)]
+    if sat.options.debug_mode:
+        cmd.append("-g")
+    for overwrite in sat.options.overwrite or []:
+        cmd += ["-o", overwrite]
+    cmd += ["compile", config.VARS.application, "--products", p_name]
+    if options.force:
+        cmd.append("--force")
+    if options.makeflags:
+        cmd += ["--make_flags", options.makeflags]
+    if options.check:
+        cmd.append("--check")
+    if options.clean_build_after:
+        cmd.append("--clean_build_after")
+    return cmd
+
+class CompileJob(object):
+    '''The compilation of a product in a child sat process, started when
+       the products it depends upon are compiled.
+    '''
+    def __init__(self, p_name, p_info, depend, exclusive):
+        '''Initialization
+        
+        :param p_name str: The name of the product
+        :param p_info Config: The configuration of the product
+        :param depend list: The jobs of the products it depends upon
+        :param exclusive boolean: if True, the product is installed in
+                                  a shared directory, and compiled alone
+        '''
+        self.p_name = p_name
+        self.p_info = p_info
+        self.depend = depend
+        self.exclusive = exclusive
+        self.proc = None
+        self.out = None
+        self.log_dir = None
+        self.out_path = None
+        self.start_time = None
+        self.res = None  # the exit code of the child process
+
+    def start(self, cmd, log_dir, out_path, environ):
+        '''Start the child process, in its own process group (stopped with
+           all the commands it runs), its output written in out_path.
+        '''
+        self.log_dir = log_dir
+        self.out_path = out_path
+        src.ensure_path_exists(log_dir)
+        self.out = open(out_path, "w")
+        kwargs = {}
+        if not src.architecture.is_windows():
+            kwargs["preexec_fn"] = os.setsid
+        self.start_time = time.time()
+        self.proc = subprocess.Popen(cmd,
+                                     env=environ,
+                                     stdout=self.out,
+                                     stderr=subprocess.STDOUT,
+                                     **kwargs)
+
+    def poll(self):
+        '''Check if the child process is finished.
+
+        :return: True if it is finished
+        :rtype: boolean
+        '''
+        if self.res is None and self.proc is not None:
+            self.res = self.proc.poll()
+            if self.res is not None:
+                self.out.close()
+        return self.res is not None
+
+    def stop(self):
+        '''Stop the child process and all the commands it runs.'''
+        if self.proc is None or self.poll():
+            return
+        try:
+            if src.architecture.is_windows():
+                self.proc.terminate()
+            else:
+                os.killpg(self.proc.pid, signal.SIGTERM)
+        except OSError:
+            pass
+        self.res = self.proc.wait()
+        self.out.close()
+
+    def get_log_file(self):
+        '''Get the xml log file of the child process.
+
+        :return: the path of the log file, or None if it is not found
+        :rtype: str
+        '''
+        if self.log_dir is None or not os.path.isdir(self.log_dir):
+            return None
+        logs = sorted(f for f in os.listdir(self.log_dir)
+                      if f.endswith(".xml") and "_compile_" in f)
+        if not logs:
+            return None
+        return os.path.join(self.log_dir, logs[-1])
+
+def write_jobs_status(logger, running, nb_lines):
+    '''Display (in a terminal) the products being compiled and for how long,
+       in place of the previous display.
+
+    :param logger Logger: The logger instance to use for the display
+    :param running list: The running jobs
+    :param nb_lines int: The number of lines of the previous display
+    :return: the number of lines of the display
+    :rtype: int
+    '''
+    msg = "\x1b[1A\x1b[2K" * nb_lines
+    now = time.time()
+    for job in running:
+        duration = int(now - job.start_time)
+        msg += "  %s %s\n" % (src.printcolors.printcLabel(job.p_name),
+                              _("compiling for %dm%02ds") % (duration // 60, duration % 60))
+    logger.write(msg, 3, screenOnly=True)
+    return len(running)
+
+def run_compile_jobs(jobs, nb_jobs, stop_first_fail, start_job, end_job, skip_job,
+                     poll_interval=0.2, show_status=None):
+    '''Run the compile jobs, nb_jobs at most at the same time, each one as
+       soon as the jobs of the products it depends upon are finished (and
+       only one of the jobs installing in a shared directory at a time).
+       The jobs whose dependencies failed are not started.
+
+    :param jobs list: The jobs, in the topological order of the products
+    :param nb_jobs int: The maximum number of jobs running at the same time
+    :param stop_first_fail boolean: if True, the running jobs are stopped
+                                    at the first failure, and no other
+                                    job is started
+    :param start_job function: start_job(job) starts a job
+    :param end_job function: end_job(job, interrupted) logs a finished job,
+                             or a job stopped (interrupted is True), and
+                             returns the number of failures (0 or 1)
+    :param skip_job function: skip_job(job, failed) logs a job not started,
+                              failed being the names of its failed dependencies
+    :param poll_interval float: The time between the checks of the jobs
+    :param show_status function: show_status(running) displays the running jobs
+    :return: the number of failures
+    :rtype: int
+    '''
+    res = 0
+    pending = list(jobs)
+    running = []
+    stop = False
+    while running or (pending and not stop):
+        # start the jobs whose dependencies are compiled
+        for job in list(pending):
+            if stop or len(running) >= nb_jobs:
+                break
+            if [d for d in job.depend if d.res is None]:
+                continue
+            if job.exclusive and [j for j in running if j.exclusive]:
+                continue
+            pending.remove(job)
+            failed = [d.p_name for d in job.depend if d.res != 0]
+            if failed:
+                job.res = 1
+                skip_job(job, failed)
+                continue
+            start_job(job)
+            running.append(job)
+
+        # log the finished jobs
+        for job in [j for j in running if j.poll()]:
+            running.remove(job)
+            res += end_job(job, False)
+            if job.res != 0 and stop_first_fail:
+                stop = True
+                for other in running:
+                    other.stop()
+                    end_job(other, True)
+                running = []
+
+        if show_status is not None:
+            show_status(running)
+        if running:
+            time.sleep(poll_interval)
+    return res
+
+def compile_products_in_parallel(sat, config, options, products_infos, all_products_dict, all_products_graph, logger):
+    '''Compile the products in options.jobs child processes at most, each
+       product being compiled as soon as the products it depends upon are
+       installed (same checks and traces as compile_all_products).
+
+    :param config Config: The global configuration
+    :param products_info list: List of 
+                                 (str, Config) => (product_name, product_info)
+    :param all_products_dict: Dict of all products 
+    :param all_products_graph: graph of all products 
+    :param logger Logger: The logger instance to use for the display and logging
+    :return: the number of failing commands.
+    :rtype: int
+    '''
+    # the fingerprints are computed and written by the child processes,
+    # they are only used here for the option --update
+    fingerprints = None
+    if options.update:
+        fingerprints = src.fingerprint.Fingerprints(config)
+    check_salome_configuration = clean_products(sat, config, options, products_infos,
+                                                all_products_graph, fingerprints, logger)
+    checker = src.product.PresenceChecker()
+    if check_salome_configuration:
+        res = check_configuration_sources(config, all_products_dict, checker, logger)
+        if res>0:
+            return res  # error configure dependency : we stop the compilation
+
+    # the products to compile, in the topological order
+    res = 0
+    len_end_line = 30
+    jobs = []
+    jobs_dict = {}
+    for p_name_info in products_infos:
+        p_name = p_name_info[0]
+        header = get_compile_header(p_name, len_end_line)
+        logger.write(header, 3)
+        logger.flush()
+        p_info, res_check = check_product_to_compile(config, options, p_name_info,
+                                                     checker, logger, header)
+        res += res_check
+        if p_info is None:
+            continue
+        # the dependencies are installed before, or compiled by a job
+        l_depends_not_installed = check_dependencies(config, p_name_info, all_products_dict, checker)
+        if [d for d in l_depends_not_installed if d not in jobs_dict]:
+            log_dependencies_not_installed(logger, header, l_depends_not_installed)
+            continue
+        logger.write(_("waiting\n"), 3)
+        depend = [jobs_dict[d] for d in l_depends_not_installed]
+        job = CompileJob(p_name, p_info, depend, installs_in_shared_dir(config, p_info))
+        jobs.append(job)
+        jobs_dict[p_name] = job
+
+    if not jobs:
+        return res
+    jobs_log_dir = os.path.join(src.get_log_path(config), "compile_jobs")
+    logger.write(_("\nCompilation of %(nb)d products with %(jobs)d jobs, "
+                   "logs in %(dir)s\n\n") % {"nb": len(jobs), "jobs": options.jobs,
+                                             "dir": jobs_log_dir}, 3)
+    # the processors shared by the make commands of the products
+    environ = dict(os.environ)
+    jobserver = None
+    if not src.architecture.is_windows():
+        jobserver = src.jobserver.JobServer.create(options.max_load or int(config.VARS.nb_proc))
+        environ.update(jobserver.get_environ())
+    start_time = time.time()
+    start_cpu_time = src.jobserver.get_children_cpu_time()
+
+    show_status = 'isatty' in dir(sys.stdout) and sys.stdout.isatty() and \
+                  config.USER.output_verbose_level >= 3
+    # the lines of the display of the running jobs, and its time
+    status = {"lines": 0, "time": 0}
+
+    def clear_status():
+        status["lines"] = write_jobs_status(logger, [], status["lines"])
+
+    def start_job(job):
+        job_log_dir = os.path.join(jobs_log_dir, job.p_name)
+        out_path = os.path.join(job_log_dir,
+                                "%s_%s.txt" % (config.VARS.datehour, job.p_name))
+        cmd = get_compile_job_command(sat, config, options, job.p_name)
+        logger.write(" ".join(cmd) + "\n", 5, screenOnly=True)
+        job_environ = dict(environ)
+        job_environ[src.LOG_DIR_ENVIRON] = job_log_dir
+        job.start(cmd, job_log_dir, out_path, job_environ)
+
+    def end_job(job, interrupted):
+        clear_status()
+        return log_compile_job(sat, config, logger, job, len_end_line, interrupted)
+
+    def skip_job(job, failed):
+        # not compiled, as in compile_all_products
+        clear_status()
+        header = get_compile_header(job.p_name, len_end_line)
+        logger.write(header, 3)
+        log_dependencies_not_installed(logger, header, failed)
+
+    def write_status(running):
+        if show_status and running and \
+           (status["lines"] == 0 or time.time() - status["time"] >= 1):
+            status["lines"] = write_jobs_status(logger, running, status["lines"])
+            status["time"] = time.time()
+
+    try:
+        res += run_compile_jobs(jobs, options.jobs, options.stop_first_fail,
+                                start_job, end_job, skip_job,
+                                show_status=write_status)
+    finally:
+        # interruption of the command (Ctrl-C)
+        for job in jobs:
+            job.stop()
+        if jobserver is not None:
+            jobserver.close()
+    clear_status()
+    if jobserver is not None:
+        log_processors_usage(logger, jobserver.slots, time.time() - start_time,
+                             src.jobserver.get_children_cpu_time() - start_cpu_time)
+    return res
+
+def log_processors_usage(logger, slots, duration, cpu_time):
+    '''Log the use of the processors shared by the compilations.
+
+    :param logger Logger: The logger instance to use for the display and logging
+    :param slots int: The number of processors shared
+    :param duration float: The duration of the compilations, in seconds
+    :param cpu_time float: The processor time of the compilations, in seconds
+    '''
+    usage = 0
+    if duration > 0 and slots > 0:
+        usage = int(100 * cpu_time / (duration * slots))
+    logger.write(_("\nProcessors: %(cpu).0fs of processor time in %(time).0fs on "
+                   "%(slots)d processors (%(usage)d%% used)\n") % \
+                 {"cpu": cpu_time, "time": duration, "slots": slots, "usage": usage}, 3)
+
+def log_compile_job(sat, config, logger, job, len_end_line, interrupted=False):
+    '''Log the result of a finished compile job, link its log file to the
+       current command, and clean the install directory of an interrupted
+       compilation.
+
+    :param logger Logger: The logger instance to use for the display and logging
+    :param job CompileJob: The finished job
+    :param len_end_line int: the length of the end of the lines
+    :param interrupted boolean: if True, the job was stopped before its end
+    :return: 1 if the compilation failed, else 0
+    :rtype: int
+    '''
+    header = get_compile_header(job.p_name, len_end_line)
+    log_file = job.get_log_file()
+    if log_file is not None:
+        logger.add_link(os.path.relpath(log_file, src.get_log_path(config)),
+                        "compile", job.res, "compile --products %s" % job.p_name)
+    if interrupted:
+        logger.write(header + src.printcolors.printcWarning(_("interrupted")) + "\n", 3)
+        if not installs_in_shared_dir(config, job.p_info):
+            sat.clean(config.VARS.application + 
+                      " --products " + job.p_name + 
+                      " --install",
+                      batch=True,
+                      verbose=0,
+                      logger_add_link = logger)
+        return 0
+    if job.res != 0:
+        logger.write(header + src.printcolors.printcError("KO") + "\n", 3)
+        logger.write(_("see the traces in %s\n") % src.printcolors.printcInfo(job.out_path), 3)
+        return 1
+    logger.write(header + src.printcolors.printcSuccess("OK"), 3)
+    logger.write(_("\nINSTALL directory = %s\n" % 
+                   src.printcolors.printcInfo(job.p_info.install_dir)), 3)
+    return 0
+
+def compile_product(sat, p_name_info, config, options, fingerprints, logger, header, len_end):
     '''Execute the proper configuration command(s) 
        in the product build directory.
     
     :param p_name_info tuple: (str, Config) => (product_name, product_info)
     :param config Config: The global configuration
+    :param fingerprints Fingerprints: the fingerprints of the products
     :param logger Logger: The logger instance to use for the display 
                           and logging
     :param header Str: the header to display when logging
@@ -476,6 +987,10 @@ def compile_product(sat, p_name_info, config, options, logger, header, len_end):
         if src_sha1:
             p_info.git_tag_description=src_sha1
         src.product.add_compile_config_file(p_info, config)
+        # and the fingerprint of what was compiled, for the option --update
+        fingerprint = fingerprints.get(p_name)
+        if fingerprint is not None:
+            src.fingerprint.write_fingerprint(p_info, fingerprint)
         
         if options.check:
             # Do the unit tests (call the check command)
@@ -764,7 +1279,7 @@ def run(args, runner, logger):
     # Get the list of all application products, and create its dependency graph
     all_products_infos = src.product.get_products_infos(runner.cfg.APPLICATION.products,
                                                         runner.cfg)
-    all_products_graph=get_dependencies_graph(all_products_infos)
+    all_products_graph=src.product.get_dependencies_graph(runner.cfg)
     #logger.write("Dependency graph of all application products : %s\n" % all_products_graph, 6)
     DBG.write("Dependency graph of all application products : ", all_products_graph)
 
@@ -775,33 +1290,20 @@ def run(args, runner, logger):
     logger.write("Product we have to compile (as specified by user) : %s\n" % products_list, 5)
     if options.fathers:
         # Extend the list with all recursive dependencies of the given products
-        visited=[]
-        for p_name in products_list:
-            visited=depth_search_graph(all_products_graph, p_name, visited)
-        products_list = visited
+        products_list = all_products_graph.depth_search(products_list)
 
     logger.write("Product list to compile with fathers : %s\n" % products_list, 5)
     if options.children:
         # Extend the list with all products that depends upon the given products
-        children=[]
-        for n in all_products_graph:
-            # for all products (that are not in products_list):
-            # if we we find a path from the product to the product list,
-            # then we product is a child and we add it to the children list 
-            if (n not in children) and (n not in products_list):
-                if find_path_graph(all_products_graph, n, products_list):
-                    children = children + [n]
+        # (the products from which there is a path to the product list)
+        children = all_products_graph.get_dependents(products_list)
         # complete products_list (the products we have to compile) with the list of children
         products_list = products_list + children
         logger.write("Product list to compile with children : %s\n" % products_list, 5)
 
     # Sort the list of all products (topological sort).
     # the products listed first do not depend upon products listed after
-    visited_nodes=[]
-    sorted_nodes=[]
-    for n in all_products_graph:
-        if n not in visited_nodes:
-            visited_nodes,sorted_nodes=depth_first_topo_graph(all_products_graph, n, visited_nodes,sorted_nodes)
+    sorted_nodes = all_products_graph.topological_sort()
     logger.write("Complete dependency graph topological search (sorting): %s\n" % sorted_nodes, 6)
 
     #  Create a dict of all products to facilitate products_infos sorting
@@ -828,14 +1330,16 @@ def run(args, runner, logger):
     # for all products to compile, store in "depend_all" field the complete dependencies (recursive) 
     # (will be used by check_dependencies function)
     for pi in products_infos:
-        dep_prod=[]
-        dep_prod=depth_search_graph(all_products_graph,pi[0], dep_prod)
+        dep_prod=all_products_graph.get_closure(pi[0])
         pi[1]["depend_all"]=dep_prod[1:]
         
 
     # Call the function that will loop over all the products and execute
     # the right command(s)
-    res = compile_all_products(runner, runner.cfg, options, products_infos, all_products_dict, all_products_graph, logger)
+    if options.jobs > 1 and not options.no_compile:
+        res = compile_products_in_parallel(runner, runner.cfg, options, products_infos, all_products_dict, all_products_graph, logger)
+    else:
+        res = compile_all_products(runner, runner.cfg, options, products_infos, all_products_dict, all_products_graph, logger)
     
     # Print the final state
     nb_products = len(products_infos)
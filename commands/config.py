@@ -21,6 +21,7 @@ import sys
 import platform
 import datetime
 import shutil
+import hashlib
 import gettext
 import pprint as PP
 
@@ -78,6 +79,8 @@ parser.add_option('', 'completion', 'boolean', 'completion',
     _("Internal use: print only keys, works only with --value."))
 parser.add_option('s', 'schema', 'boolean', 'schema',
     _("Internal use."))
+parser.add_option('', 'cache-stats', 'boolean', 'cache_stats',
+    _("Optional: print the statistics of the caches of the configuration"))
 
 def osJoin(*args):
   """
@@ -90,16 +93,51 @@ def osJoin(*args):
       logger.info("osJoin %-80s in %s" % (res, CALN.caller_name(1)))
   return res
 
+# the signature of the code of salomeTools, computed once (see get_code_signature)
+_code_signature = None
+
+def get_code_signature():
+    '''get the signature of the code of salomeTools: the modification time
+    and the size of the python files of src and commands (the version of
+    salomeTools is in src/internal_config, read as the other pyconf files).
+    It is in the key of the config snapshots: a config built by another
+    code is not restored.
+
+    :return: The signature.
+    :rtype: str
+    '''
+    global _code_signature
+    if _code_signature is None:
+        files = []
+        for directory in ["src", "commands"]:
+            for root, dirs, names in os.walk(os.path.join(satdir, directory)):
+                dirs.sort()
+                for name in sorted(names):
+                    if not name.endswith(".py"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((os.path.relpath(path, satdir),
+                                  st.st_mtime, st.st_size))
+        _code_signature = hashlib.sha1(repr(files).encode("utf-8")).hexdigest()
+    return _code_signature
+
 class ConfigOpener:
     '''Class that helps to find an application pyconf 
        in all the possible directories (pathList)
     '''
-    def __init__(self, pathList):
+    def __init__(self, pathList, opened=None):
         '''Initialization
         
         :param pathList list: The list of paths where to search a pyconf.
+        :param opened list: If given, the paths of the opened pyconf files
+                            are appended to it.
         '''
         self.pathList = pathList
+        self.opened = opened
         if verbose:
           for path in pathList:
             if not os.path.isdir(path):
@@ -107,10 +145,12 @@ class ConfigOpener:
 
     def __call__(self, name):
         if os.path.isabs(name):
-            return src.pyconf.ConfigInputStream(open(name, 'rb'))
+            path = name
         else:
-            return src.pyconf.ConfigInputStream(open(osJoin(self.get_path(name), name), 'rb'))
-        raise IOError(_("Configuration file '%s' not found") % name)
+            path = osJoin(self.get_path(name), name)
+        if self.opened is not None:
+            self.opened.append(path)
+        return src.pyconf.ConfigInputStream(open(path, 'rb'))
 
     def get_path( self, name ):
         '''The method that returns the entire path of the pyconf searched
@@ -126,6 +166,10 @@ class ConfigOpener:
 class ConfigManager:
     '''Class that manages the read of all the configuration files of salomeTools
     '''
+    # the VARS which change at each call of salomeTools,
+    # set again in the configurations restored from a snapshot
+    VOLATILE_VARS = ['date', 'datehour', 'hour', 'command']
+
     def __init__(self, datadir=None):
         pass
 
@@ -193,13 +237,8 @@ class ConfigManager:
         var['node'] = node_name
         var['hostname'] = node_name
 
-        # set date parameters
-        dt = datetime.datetime.now()
-        var['date'] = dt.strftime('%Y%m%d')
-        var['datehour'] = dt.strftime('%Y%m%d_%H%M%S')
-        var['hour'] = dt.strftime('%H%M%S')
-
-        var['command'] = str(command)
+        # set date parameters, and the command
+        var.update(self.get_volatile_vars(command))
         var['application'] = str(application)
 
         # Root dir for temporary files 
@@ -210,6 +249,39 @@ class ConfigManager:
 
         return var
 
+    def get_volatile_vars(self, command=None):
+        '''Get the VARS which change at each call of salomeTools
+           (see VOLATILE_VARS)
+        
+        :param command str: The command that is called.
+        :return: The dictionary of these VARS.
+        :rtype: dict
+        '''
+        dt = datetime.datetime.now()
+        return {'date': dt.strftime('%Y%m%d'),
+                'datehour': dt.strftime('%Y%m%d_%H%M%S'),
+                'hour': dt.strftime('%H%M%S'),
+                'command': str(command)}
+
+    def set_volatile_vars(self, config, values):
+        '''Set the VARS which change at each call of salomeTools in a config,
+           for a command called by another one with its config
+           (sat make in sat compile, for example)
+        
+        :param config Config: The config.
+        :param values dict: The VARS, see get_volatile_vars.
+        :return: The previous values of the VARS.
+        :rtype: dict
+        '''
+        res = {}
+        for variable in self.VOLATILE_VARS:
+            res[variable] = config.VARS[variable]
+            # not set again if unchanged: a change of the configuration
+            # invalidates the resolved values of all the configurations
+            if values[variable] != res[variable]:
+                config.VARS[variable] = values[variable]
+        return res
+
     def get_command_line_overrides(self, options, sections):
         '''get all the overwrites that are in the command line
         
@@ -231,6 +303,50 @@ class ConfigManager:
                                options.overwrite))
         return over
 
+    def get_snapshot_key(self, var, application, options):
+        '''get the key of the snapshot of the config: the signature of the
+        code of salomeTools, the VARS, except the volatile ones, the
+        application and the overwrites of the command line
+        
+        :param var dict: The VARS, see _create_vars.
+        :param application str: The application for which salomeTools is called.
+        :param options: the options from salomeTools class initialization
+        :return: The key, or None if the config must not be restored 
+                 from a snapshot (overwrite of VARS in the command line).
+        :rtype: str
+        '''
+        if self.get_command_line_overrides(options, ["VARS"]):
+            return None
+        overwrite = []
+        if options is not None and options.overwrite is not None:
+            overwrite = list(options.overwrite)
+        variables = sorted([(k, var[k]) for k in var 
+                            if k not in self.VOLATILE_VARS])
+        return repr((get_code_signature(), application, variables, overwrite))
+
+    def restore_snapshot(self, snapshot, var, application):
+        '''complete a config restored from a snapshot, as get_config does
+        
+        :param snapshot tuple: The config and the user config file path,
+                               returned by src.pyconf.SnapshotCache.restore
+        :param var dict: The VARS, see _create_vars.
+        :param application str: The application for which salomeTools is called.
+        :return: The final config.
+        :rtype: class 'src.pyconf.Config'
+        '''
+        cfg, user_config_file_path = snapshot
+        for variable in self.VOLATILE_VARS:
+            cfg.VARS[variable] = var[variable]
+        self.config_file_name = 'SAT.pyconf'
+        self.user_config_file_path = user_config_file_path
+        # the stream opener of the last step of get_config
+        if application is not None:
+            src.pyconf.streamOpener = ConfigOpener(cfg.PATHS.PRODUCTPATH)
+            src.product.set_deferred_stream_opener(cfg, src.pyconf.streamOpener)
+        else:
+            src.pyconf.streamOpener = ConfigOpener([cfg.VARS.datadir])
+        return cfg
+
     def get_config(self, application=None, options=None, command=None,
                     datadir=None):
         '''get the config from all the configuration files.
@@ -243,6 +359,11 @@ class ConfigManager:
                             external data for salomeTools.
         :return: The final config.
         :rtype: class 'src.pyconf.Config'
+        
+        The final config is stored as a snapshot, with the fingerprints
+        of the files and directories read (see src.pyconf.SnapshotCache):
+        the next calls with the same VARS and overwrites restore it, 
+        as long as none of them changed.
         '''        
         
         # create a ConfigMerger to handle merge
@@ -268,22 +389,52 @@ class ConfigManager:
             sys.stderr.write(msg + "\n")
             sys.exit(1)
 
+        # the parsed pyconf files are cached, to read them faster next time
+        cache_dir = osJoin(cfg.VARS.personalDir, "cache", "pyconf")
+        if src.pyconf.parseCache is None or \
+           src.pyconf.parseCache.directory != cache_dir:
+            src.pyconf.parseCache = src.pyconf.ParseCache(cache_dir)
+
+        # and so are the final configs, restored if their inputs are unchanged
+        cache_dir = osJoin(cfg.VARS.personalDir, "cache", "config")
+        if src.pyconf.snapshotCache is None or \
+           src.pyconf.snapshotCache.directory != cache_dir:
+            src.pyconf.snapshotCache = src.pyconf.SnapshotCache(cache_dir)
+
+        # and the descriptions of the git repositories (sat and the projects)
+        cache_dir = osJoin(cfg.VARS.personalDir, "cache", "git")
+        if src.system.gitDescribeCache is None or \
+           src.system.gitDescribeCache.directory != cache_dir:
+            src.system.gitDescribeCache = src.system.GitDescribeCache(cache_dir)
+        snapshot_key = self.get_snapshot_key(var, application, options)
+        if snapshot_key is not None:
+            snapshot = src.pyconf.snapshotCache.restore(snapshot_key)
+            if snapshot is not None:
+                cfg = self.restore_snapshot(snapshot, var, application)
+                self.set_log_dir_from_environ(cfg)
+                return cfg
+        # the files and directories read, and no snapshot if there are warnings
+        inputs = []
+        use_snapshot = snapshot_key is not None
+
         # apply overwrite from command line if needed
         for rule in self.get_command_line_overrides(options, ["VARS"]):
-            exec('cfg.' + rule) # this cannot be factorized because of the exec
+            src.pyconf.applyOverwriteRule(cfg, rule, globals())
         
         # =====================================================================
         # Load INTERNAL config
         # read src/internal_config/salomeTools.pyconf
         src.pyconf.streamOpener = ConfigOpener([
-                             osJoin(cfg.VARS.srcDir, 'internal_config')])
+                             osJoin(cfg.VARS.srcDir, 'internal_config')], inputs)
         try:
             if src.architecture.is_windows(): # special internal config for windows
-                internal_cfg = src.pyconf.Config(open( osJoin(cfg.VARS.srcDir,
-                                        'internal_config', 'salomeTools_win.pyconf')))
+                internal_file = osJoin(cfg.VARS.srcDir,
+                                       'internal_config', 'salomeTools_win.pyconf')
             else:
-                internal_cfg = src.pyconf.Config(open( osJoin(cfg.VARS.srcDir,
-                                        'internal_config', 'salomeTools.pyconf')))
+                internal_file = osJoin(cfg.VARS.srcDir,
+                                       'internal_config', 'salomeTools.pyconf')
+            inputs.append(internal_file)
+            internal_cfg = src.pyconf.Config(open(internal_file))
         except src.pyconf.ConfigError as e:
             raise src.SatException(_("Error in configuration file:"
                                      " salomeTools.pyconf\n  %(error)s") % \
@@ -293,12 +444,13 @@ class ConfigManager:
 
         # apply overwrite from command line if needed
         for rule in self.get_command_line_overrides(options, ["INTERNAL"]):
-            exec('cfg.' + rule) # this cannot be factorized because of the exec        
+            src.pyconf.applyOverwriteRule(cfg, rule, globals())
                
         # =====================================================================
         # Load LOCAL config file
         # search only in the data directory
-        src.pyconf.streamOpener = ConfigOpener([cfg.VARS.datadir])
+        src.pyconf.streamOpener = ConfigOpener([cfg.VARS.datadir], inputs)
+        inputs.append(osJoin(cfg.VARS.datadir, 'local.pyconf'))
         try:
             local_cfg = src.pyconf.Config(open( osJoin(cfg.VARS.datadir,
                                                            'local.pyconf')),
@@ -327,6 +479,11 @@ class ConfigManager:
         if cfg.LOCAL.tag == "unknown":
             # get the tag with git, and store it
             sat_version=src.system.git_describe(cfg.VARS.salometoolsway) 
+            git_inputs = src.system.git_describe_inputs(cfg.VARS.salometoolsway)
+            if git_inputs is None:
+                use_snapshot = False
+            else:
+                inputs += git_inputs["paths"]
             if sat_version == False:
                 sat_version=cfg.INTERNAL.sat_version
             cfg.LOCAL.tag=sat_version
@@ -334,7 +491,7 @@ class ConfigManager:
 
         # apply overwrite from command line if needed
         for rule in self.get_command_line_overrides(options, ["LOCAL"]):
-            exec('cfg.' + rule) # this cannot be factorized because of the exec
+            src.pyconf.applyOverwriteRule(cfg, rule, globals())
         
         # =====================================================================
         # Load the PROJECTS
@@ -360,10 +517,12 @@ class ConfigManager:
                 sys.stderr.write(msg + "\n")
                 sys.exit(1)
 
+            inputs.append(project_pyconf_path)
             if not os.path.exists(project_pyconf_path):
                 msg = _("WARNING: The project file %s cannot be found. "
                         "It will be ignored\n" % project_pyconf_path)
                 sys.stdout.write(msg)
+                use_snapshot = False
                 continue
             project_name = os.path.basename(
                                     project_pyconf_path)[:-len(".pyconf")]
@@ -376,6 +535,7 @@ class ConfigManager:
                                  "%(file_path)s\n  %(error)s\n") % \
                             {'file_path' : project_pyconf_path, 'error': str(e) }
                 sys.stdout.write(msg)
+                use_snapshot = False
                 continue
             projects_cfg.PROJECTS.projects.addMapping(project_name,
                              src.pyconf.Mapping(projects_cfg.PROJECTS.projects),
@@ -385,6 +545,11 @@ class ConfigManager:
                                                         project_pyconf_path
             # store the project tag if any
             product_project_git_tag = src.system.git_describe(os.path.dirname(project_pyconf_path))
+            git_inputs = src.system.git_describe_inputs(os.path.dirname(project_pyconf_path))
+            if git_inputs is None:
+                use_snapshot = False
+            else:
+                inputs += git_inputs["paths"]
             if product_project_git_tag:
                 projects_cfg.PROJECTS.projects[project_name]["git_tag"] = product_project_git_tag
             else:
@@ -394,7 +559,7 @@ class ConfigManager:
 
         # apply overwrite from command line if needed
         for rule in self.get_command_line_overrides(options, ["PROJECTS"]):
-            exec('cfg.' + rule) # this cannot be factorized because of the exec
+            src.pyconf.applyOverwriteRule(cfg, rule, globals())
         
         # =====================================================================
         # Create the paths where to search the application configurations, 
@@ -436,7 +601,7 @@ class ConfigManager:
         
         # apply overwrite from command line if needed
         for rule in self.get_command_line_overrides(options, ["PATHS"]):
-            exec('cfg.' + rule) # this cannot be factorized because of the exec
+            src.pyconf.applyOverwriteRule(cfg, rule, globals())
 
         # add git servers if any
         cfg.addMapping("git_info", src.pyconf.Mapping(cfg), "The repositories\n")
@@ -446,6 +611,7 @@ class ConfigManager:
         for project in cfg.PROJECTS.projects:
           if 'git_info' not in  cfg.PROJECTS.projects[project]:
             logger.warning("Project: {} does not have any git_info section! Please define one!".format(project))
+            use_snapshot = False
             continue
           if 'git_server' in cfg.PROJECTS.projects[project]['git_info']:
             git_servers=cfg.PROJECTS.projects[project]['git_info']['git_server']
@@ -470,7 +636,8 @@ class ConfigManager:
         if application is not None:
             # search APPLICATION file in all directories in configPath
             cp = cfg.PATHS.APPLICATIONPATH
-            src.pyconf.streamOpener = ConfigOpener(cp)
+            inputs += list(cp)
+            src.pyconf.streamOpener = ConfigOpener(cp, inputs)
             do_merge = True
             try:
                 application_cfg = src.pyconf.Config(application + '.pyconf')
@@ -490,6 +657,7 @@ class ConfigManager:
                                         "There is an error in the file"
                                         " %s.pyconf.\n" % cfg.VARS.application))
                     do_merge = False
+                    use_snapshot = False
             except Exception as e:
                 if (not ('-e' in parser.parse_args()[1]) 
                                         or ('--edit' in parser.parse_args()[1]) 
@@ -507,45 +675,23 @@ class ConfigManager:
                                  " %s\n" % src.printcolors.printcWarning(
                                                                       str(e)))
                     do_merge = False
+                    use_snapshot = False
         
             else:
                 cfg['open_application'] = 'yes'
         # =====================================================================
         # Load product config files in PRODUCTS section
-        products_cfg = src.pyconf.Config()
-        products_cfg.addMapping("PRODUCTS",
-                                src.pyconf.Mapping(products_cfg),
-                                "The products\n")
         if application is not None:
-            src.pyconf.streamOpener = ConfigOpener(cfg.PATHS.PRODUCTPATH)
-            for product_name in application_cfg.APPLICATION.products.keys():
-                # Loop on all files that are in softsDir directory
-                # and read their config
-                product_file_name = product_name + ".pyconf"
-                product_file_path = src.find_file_in_lpath(product_file_name, cfg.PATHS.PRODUCTPATH)
-                if product_file_path:
-                    products_dir = os.path.dirname(product_file_path)
-                    # for a relative path (archive case) we complete with sat path
-                    if not os.path.isabs(products_dir):
-                        products_dir = os.path.join(cfg.VARS.salometoolsway,
-                                                    products_dir)
-                    try:
-                        prod_cfg = src.pyconf.Config(open(product_file_path),
-                                                     PWD=("", products_dir))
-                        prod_cfg.from_file = product_file_path
-                        products_cfg.PRODUCTS[product_name] = prod_cfg
-                    except Exception as e:
-                        msg = _(
-                            "WARNING: Error in configuration file"
-                            ": %(prod)s\n  %(error)s" % \
-                            {'prod' :  product_name, 'error': str(e) })
-                        sys.stdout.write(msg)
-            
-            merger.merge(cfg, products_cfg)
+            inputs += list(cfg.PATHS.PRODUCTPATH)
+            src.pyconf.streamOpener = ConfigOpener(cfg.PATHS.PRODUCTPATH, inputs)
+            if not self.add_products_configs(cfg, 
+                                     application_cfg.APPLICATION.products.keys(),
+                                     merger, inputs):
+                use_snapshot = False
             
             # apply overwrite from command line if needed
             for rule in self.get_command_line_overrides(options, ["PRODUCTS"]):
-                exec('cfg.' + rule) # this cannot be factorized because of the exec
+                src.pyconf.applyOverwriteRule(cfg, rule, globals())
             
             if do_merge:
                 merger.merge(cfg, application_cfg)
@@ -558,19 +704,19 @@ class ConfigManager:
                 # apply overwrite from command line if needed
                 for rule in self.get_command_line_overrides(options,
                                                              ["APPLICATION"]):
-                    # this cannot be factorized because of the exec
-                    exec('cfg.' + rule)
+                    src.pyconf.applyOverwriteRule(cfg, rule, globals())
             
         # =====================================================================
         # load USER config
         self.set_user_config_file(cfg)
         user_cfg_file = self.get_user_config_file()
+        inputs.append(user_cfg_file)
         user_cfg = src.pyconf.Config(open(user_cfg_file))
         merger.merge(cfg, user_cfg)
 
         # apply overwrite from command line if needed
         for rule in self.get_command_line_overrides(options, ["USER"]):
-            exec('cfg.' + rule) # this cannot be factorize because of the exec
+            src.pyconf.applyOverwriteRule(cfg, rule, globals())
         
         # remove application products "blacklisted" in rm_products_for_all_distributions field
         if "APPLICATION" in cfg and "rm_products_for_all_distributions" in cfg.APPLICATION:
@@ -586,8 +732,85 @@ class ConfigManager:
             # remove rm_products section after usage
             cfg.APPLICATION.__delitem__("rm_products")
 
+        if use_snapshot:
+            src.pyconf.snapshotCache.store(snapshot_key, inputs, cfg,
+                                           self.user_config_file_path)
+        self.set_log_dir_from_environ(cfg)
         return cfg
 
+    def add_products_configs(self, cfg, product_names, merger, inputs):
+        '''Add the configs of the products to the PRODUCTS section: the
+        pyconf files of the products are read on the first access to their
+        product config (see src.product.DeferredProductConfig), except if
+        the product is already in PRODUCTS, to merge them.
+        The products are in PRODUCTS in the same order as if all the files
+        were read and merged: the products already in PRODUCTS, then the
+        other ones in the order of product_names.
+        
+        :param cfg Config: The config, with PATHS.PRODUCTPATH.
+        :param product_names list: The names of the products of the application.
+        :param merger ConfigMerger: The merger of the configs.
+        :param inputs list: The paths of the files read, for the snapshot
+                            of the config, completed.
+        :return: False if the pyconf file of a product merged has an error.
+        :rtype: boolean
+        '''
+        res = True
+        products_cfg = src.pyconf.Config()
+        products_cfg.addMapping("PRODUCTS",
+                                src.pyconf.Mapping(products_cfg),
+                                "The products\n")
+        deferred_products = []
+        merged_products = []
+        # one scan of the directories, the first one having
+        # the file of a product wins, as with src.find_file_in_lpath
+        product_files = {}
+        for directory in reversed(list(cfg.PATHS.PRODUCTPATH)):
+            for file_name in src.get_directory_listing(directory) or ():
+                product_files[file_name] = os.path.join(directory, file_name)
+        for product_name in product_names:
+            product_file_path = product_files.get(product_name + ".pyconf")
+            if product_file_path:
+                inputs.append(product_file_path)
+                products_dir = os.path.dirname(product_file_path)
+                # for a relative path (archive case) we complete with sat path
+                if not os.path.isabs(products_dir):
+                    products_dir = os.path.join(cfg.VARS.salometoolsway,
+                                                products_dir)
+                deferred = src.product.DeferredProductConfig(product_file_path,
+                                                             products_dir)
+                if "PRODUCTS" not in cfg or product_name not in cfg.PRODUCTS:
+                    deferred_products.append((product_name, deferred))
+                else:
+                    merged_products.append((product_name, deferred))
+        # the files of the products to merge are read by several threads,
+        # and merged in the order of the application
+        src.pyconf.prefetchDeferreds([deferred for __, deferred in merged_products],
+                                     src.product.get_load_workers(cfg))
+        for product_name, deferred in merged_products:
+            prod_cfg = deferred.load()
+            if prod_cfg is None:
+                res = False
+            else:
+                products_cfg.PRODUCTS[product_name] = prod_cfg
+        merger.merge(cfg, products_cfg)
+        # the products merged are already in PRODUCTS, the other ones
+        # are added after them
+        for product_name, deferred in deferred_products:
+            cfg.PRODUCTS.addMapping(product_name, deferred, None)
+        return res
+
+    def set_log_dir_from_environ(self, cfg):
+        '''Set LOCAL.log_dir from the SAT_LOG_DIR environment variable, if
+        it is set (by sat compile --jobs). It is set after the snapshot of
+        the config is stored, as it is not part of its key.
+        
+        :param cfg class 'src.pyconf.Config': The global config.
+        '''
+        log_dir = os.environ.get(src.LOG_DIR_ENVIRON)
+        if log_dir:
+            cfg.LOCAL.log_dir = log_dir
+
     def set_user_config_file(self, config):
         '''Set the user config file name and path.
         If necessary, build it from another one or create it from scratch.
@@ -914,37 +1137,27 @@ def show_dependencies(config, products, logger):
     :param logger Logger: The logger instance to use for the display
     '''
 
-    from compile import get_dependencies_graph,depth_search_graph,find_path_graph
-    # Get the list of all application products, and create its dependency graph
-    all_products_infos = src.product.get_products_infos(config.APPLICATION.products,config)
-    all_products_graph=get_dependencies_graph(all_products_infos, compile_time=False)
+    # Get the dependency graph of all application products
+    all_products_graph=src.product.get_dependencies_graph(config, compile_time=False)
 
     products_list=[]
     product_liste_name=""
     if products is None:
         products_list=config.APPLICATION.products
-        products_graph = all_products_graph
+        products_graph = all_products_graph.to_dict()
     else:
         # 1. Extend the list with all products that depends upon the given list of products
         products_list=products
         product_liste_name="_".join(products)
-        visited=[]
-        for p_name in products_list:
-            visited=depth_search_graph(all_products_graph, p_name, visited)
+        visited=all_products_graph.depth_search(products_list)
         products_infos = src.product.get_products_infos(visited, config)
-        products_graph = get_dependencies_graph(products_infos, compile_time=False)
+        products_graph = src.graph.get_products_graph(products_infos, compile_time=False)
 
         # 2. Extend the list with all the dependencies of the given list of products
-        children=[]
-        for n in all_products_graph:
-            # for all products (that are not in products_list):
-            # if we we find a path from the product to the product list,
-            # then we product is a child and we add it to the children list 
-            if (n not in children) and (n not in products_list):
-                if find_path_graph(all_products_graph, n, products_list):
-                    children = children + [n]
+        # (the products from which there is a path to the product list)
+        children=all_products_graph.get_dependents(products_list)
         products_infos_rev = src.product.get_products_infos(children, config)
-        products_graph_rev = get_dependencies_graph(products_infos_rev, compile_time=False)
+        products_graph_rev = src.graph.get_products_graph(products_infos_rev, compile_time=False)
 
     logger.write("Dependency graph (python format)\n%s\n" % products_graph, 3)
 
@@ -1031,6 +1244,52 @@ def show_properties(config, logger):
   else:
     logger.write("No properties found\n", 1)
 
+def show_cache_stats(config, logger):
+  '''Prints the statistics of the caches of the configuration: the
+  snapshots of the final configs, the parsed pyconf files, the resolved 
+  references, the listings of the directories of the search paths,
+  the configs of the products, the indexes of the base directories
+  of the products, the descriptions of the git repositories and the
+  snapshots of the installed system packages, for the configs read by
+  this sat call.
+
+  :param config Config: The global configuration.
+  :param logger Logger: The logger instance to use for the display
+  '''
+  caches = [(_("config snapshots"), src.pyconf.snapshotCache),
+            (_("parsed pyconf files"), src.pyconf.parseCache)]
+  for label, cache in caches:
+    if cache is None:
+      continue
+    stats = cache.getStats()
+    logger.write("%s: %s\n" % (src.printcolors.printcLabel(label), cache.directory), 1)
+    logger.write("  %-10s %d (%.1f kB)\n" % ("entries", stats["entries"], stats["size"] / 1024.), 1)
+    for key in ["hits", "misses", "stores"]:
+      if key in stats:
+        logger.write("  %-10s %d\n" % (key, stats[key]), 1)
+  logger.write("%s:\n" % src.printcolors.printcLabel(_("resolved references")), 1)
+  for key in ["hits", "misses"]:
+    logger.write("  %-10s %d\n" % (key, src.pyconf.resolutionStats[key]), 1)
+  logger.write("%s:\n" % src.printcolors.printcLabel(_("directory listings")), 1)
+  logger.write("  %-10s %d\n" % ("entries", len(src._directory_listings)), 1)
+  for key in ["lookups", "listings"]:
+    logger.write("  %-10s %d\n" % (key, src.directory_listing_stats[key]), 1)
+  logger.write("%s:\n" % src.printcolors.printcLabel(_("product configs")), 1)
+  for key in ["hits", "misses"]:
+    logger.write("  %-10s %d\n" % (key, src.product.product_config_stats[key]), 1)
+  logger.write("%s:\n" % src.printcolors.printcLabel(_("base config indexes")), 1)
+  for key in ["hits", "misses"]:
+    logger.write("  %-10s %d\n" % (key, src.product.config_index_stats[key]), 1)
+  cache = src.system.gitDescribeCache
+  if cache is not None:
+    logger.write("%s: %s\n" % (src.printcolors.printcLabel(_("git descriptions")), cache.get_path()), 1)
+    logger.write("  %-10s %d\n" % ("entries", len(cache.entries or {})), 1)
+    for key in ["hits", "misses"]:
+      logger.write("  %-10s %d\n" % (key, getattr(cache, key)), 1)
+  logger.write("%s:\n" % src.printcolors.printcLabel(_("system packages")), 1)
+  for key in ["queries", "snapshots"]:
+    logger.write("  %-10s %d\n" % (key, src.system.pkg_snapshot_stats[key]), 1)
+
 def print_value(config, path, show_label, logger, level=0, show_full_path=False):
     '''Prints a value from the configuration. Prints recursively the values 
        under the initial path.
@@ -1074,7 +1333,7 @@ def print_value(config, path, show_label, logger, level=0, show_full_path=False)
 
     # The case where the value has under values, 
     # do a recursive call to the function
-    if dir(val).__contains__('keys'):
+    if hasattr(val, 'keys'):
         if show_label: logger.write("\n")
         for v in sorted(val.keys()):
             print_value(config, path + '.' + v, show_label, logger, level + 1)
@@ -1116,7 +1375,7 @@ def get_config_children(config, args):
             tail = parent[pos+1:]
             try:
                 a = config.getByPath(head)
-                if dir(a).__contains__('keys'):
+                if hasattr(a, 'keys'):
                     vals = map(lambda x: head + '.' + x,
                                [m for m in a.keys() if m.startswith(tail)])
             except Exception:
@@ -1352,6 +1611,10 @@ def run(args, runner, logger):
         logger.write("\n", 2, False)
         show_properties(runner.cfg, logger)
 
+    # case : print the statistics of the configuration caches
+    if options.cache_stats:
+        show_cache_stats(runner.cfg, logger)
+
     # check system prerequisites
     if options.check_system:
        check_install_system(runner.cfg, logger)
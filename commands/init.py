@@ -31,6 +31,12 @@ parser.add_option('w', 'workdir', 'string', 'workdir',
 parser.add_option('a', 'archive_dir', 'string', 'archive_dir', 
                   _('Optional: The path to the local archive directory '
                     '(where to install local source archives'))
+parser.add_option('', 'artifact_dir', 'string', 'artifact_dir', 
+                  _('Optional: The path to the artifact cache directory '
+                    '(where to store the installations of the compiled products, '
+                    'no to disable it)'))
+parser.add_option('', 'artifact_max_size', 'string', 'artifact_max_size', 
+                  _('Optional: The maximum size of the artifact cache in GB'))
 parser.add_option('', 'add_project ', 'string', 'add_project', 
                   _('Optional: The path of the project to add'))
 parser.add_option('', 'reset_projects', 'boolean', 'reset_projects', 
@@ -150,6 +156,8 @@ def display_local_values(config, logger):
             ("workdir", config.LOCAL.workdir),
             ("log_dir", config.LOCAL.log_dir),
             ("archive_dir", config.LOCAL.archive_dir),
+            ("artifact_dir", config.LOCAL.get("artifact_dir", "no")),
+            ("artifact_max_size", config.LOCAL.get("artifact_max_size", "")),
             ("VCS", config.LOCAL.VCS),
             ("tag", config.LOCAL.tag),
             ("projects", config.PROJECTS.project_file_paths)]
@@ -163,7 +171,7 @@ def check_path(path_to_check, logger):
     :param path_to_check Str: The path to check.
     :param logger Logger: The logger instance.
     """
-    if path_to_check == "default":
+    if path_to_check in ["default", "no"]:
         return 0
     
     # Get the path
@@ -214,7 +222,8 @@ def run(args, runner, logger):
     for opt in [("base" , options.base),
                 ("workdir", options.workdir),
                 ("log_dir", options.log_dir),
-                ("archive_dir", options.archive_dir)]:
+                ("archive_dir", options.archive_dir),
+                ("artifact_dir", options.artifact_dir)]:
         key, value = opt
         if value:
             res_check = check_path(value, logger)
@@ -233,7 +242,8 @@ def run(args, runner, logger):
         res += res_rem
 
     # Set the options corresponding to an informative value            
-    for opt in [("VCS", options.VCS), ("tag", options.tag)]:
+    for opt in [("VCS", options.VCS), ("tag", options.tag),
+                ("artifact_max_size", options.artifact_max_size)]:
         key, value = opt
         if value:
             res_set = set_local_value(runner.cfg, key, value, logger)
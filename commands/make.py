@@ -107,7 +107,10 @@ def make_product(p_name_info, make_option, config, logger):
     len_end_line = 20
 
     nb_proc, make_opt_without_j = get_nb_proc(p_info, config, make_option)
-    log_step(logger, header, "MAKE -j" + str(nb_proc))
+    if src.jobserver.get_jobserver() is None:
+        log_step(logger, header, "MAKE -j" + str(nb_proc))
+    else:
+        log_step(logger, header, "MAKE (shared jobs)")
     if src.architecture.is_windows():
         res = builder.wmake(nb_proc, make_opt_without_j)
     else:
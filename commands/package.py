@@ -630,6 +630,7 @@ def bin_products_archives(config, logger, only_vcs):
     # first loop on products : filter products, analyse properties,
     # and store the information that will be used to create the archive in the second loop
     l_not_installed=[] # store not installed products for warning at the end
+    checker = src.product.PresenceChecker() # the installations, listed once per directory
     for prod_name, prod_info in l_product_info:
         # ignore the native and fixed products for install directories
         if (src.get_property_in_product_cfg(prod_info, "not_in_package") == "yes"
@@ -639,7 +640,7 @@ def bin_products_archives(config, logger, only_vcs):
             continue
         if only_vcs and not src.product.product_is_vcs(prod_info):
             continue
-        if not src.product.check_installation(config, prod_info):
+        if not src.product.check_installation(config, prod_info, checker):
             l_not_installed.append(prod_name)
             continue  # product is not installed, we skip it
         # prepare call to make_bin_archive
@@ -698,6 +699,7 @@ def binary_package(config, logger, options, tmp_working_dir):
     has_properties  = "APPLICATION" in config and "properties" in config.APPLICATION
     # first loop on products : filter products, analyse properties,
     # and store the information that will be used to create the archive in the second loop
+    checker = src.product.PresenceChecker() # the sources and installations, listed once per directory
     for prod_name, prod_info in l_product_info:
         # skip product with property not_in_package set to yes
         if src.get_property_in_product_cfg(prod_info, "not_in_package") == "yes":
@@ -710,7 +712,7 @@ def binary_package(config, logger, options, tmp_working_dir):
         # sources_in_package : "yes"
         if src.get_property_in_product_cfg(prod_info,
                                            "sources_in_package") == "yes":
-            if os.path.exists(prod_info.source_dir):
+            if checker.exists(prod_info.source_dir):
                 l_source_dir.append((prod_name, prod_info.source_dir))
             else:
                 l_sources_not_present.append(prod_name)
@@ -724,7 +726,7 @@ def binary_package(config, logger, options, tmp_working_dir):
         # products with single_dir property will be installed in the PRODUCTS directory of the archive
         is_single_dir=(src.appli_test_property(config,"single_install_dir", "yes") and \
                        src.product.product_test_property(prod_info,"single_install_dir", "yes"))
-        if src.product.check_installation(config, prod_info):
+        if src.product.check_installation(config, prod_info, checker):
             l_install_dir.append((prod_name, prod_info.name, prod_info.install_dir,
                                   is_single_dir, prod_info.install_mode))
         else:
@@ -46,9 +46,11 @@ def find_products_already_prepared(l_products):
     :rtype: List
     '''
     l_res = []
+    # the source directories are in a few directories, listed once
+    checker = src.product.PresenceChecker()
     for p_name_p_cfg in l_products:
         __, prod_cfg = p_name_p_cfg
-        if "source_dir" in prod_cfg and os.path.exists(prod_cfg.source_dir):
+        if "source_dir" in prod_cfg and checker.exists(prod_cfg.source_dir):
             l_res.append(p_name_p_cfg)
     return l_res
 
@@ -59,7 +59,10 @@ _show_applications()
             opts2=$(echo --set $opts2)
             ;;
         init)
-            opts2=$(echo --base --workdir --VCS --tag --log_dir --add_project --reset_projects $opts2)
+            opts2=$(echo --base --workdir --VCS --tag --log_dir --artifact_dir --artifact_max_size --add_project --reset_projects $opts2)
+            ;;
+        cache)
+            opts2=$(echo --stats --prune --max_size $opts2)
             ;;
     esac
 
@@ -107,7 +110,7 @@ _salomeTools_complete()
     # first argument => show available commands
     if [[ ${argc} == 1 ]]
     then
-        opts="config log source patch prepare environ clean configure make makeinstall compile launcher run jobs job shell test package generate find_duplicates application template base check profile script init --help --overwrite --debug --verbose --batch --all_in_terminal --logs_paths_in_file"
+        opts="config log source patch prepare environ clean configure make makeinstall compile launcher run jobs job shell test package generate find_duplicates application template base check profile script init cache --help --overwrite --debug --verbose --batch --all_in_terminal --logs_paths_in_file"
         COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
         return 0
     fi
@@ -157,7 +160,7 @@ _salomeTools_complete()
     # show argument for each command
     case "${command}" in
         config)
-            opts="--value --list --copy --edit --no_label --info --check_system --show_patchs --show_dependencies --show_install --show_properties"
+            opts="--value --list --copy --edit --no_label --info --check_system --show_patchs --show_dependencies --show_install --show_properties --cache-stats"
             COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
             return 0        
             ;;
@@ -282,7 +285,12 @@ _salomeTools_complete()
             return 0
             ;;
         init)
-            opts="--base --workdir --VCS --tag --log_dir --add_project --reset_projects"
+            opts="--base --workdir --VCS --tag --log_dir --artifact_dir --artifact_max_size --add_project --reset_projects"
+            COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
+            return 0
+            ;;
+        cache)
+            opts="--stats --prune --max_size"
             COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
             return 0
             ;;
@@ -25,6 +25,7 @@ import os
 import shutil
 import errno
 import stat
+import time
 import fnmatch
 import pprint as PP
 from ftplib import FTP
@@ -37,6 +38,10 @@ from . import system
 from . import ElementTree
 from . import logger
 from . import product
+from . import graph
+from . import jobserver
+from . import fingerprint
+from . import artifacts
 from . import environment
 from . import fileEnviron
 from . import compilation
@@ -275,6 +280,10 @@ def get_launcher_exe(config):
     return exe_name
 
 
+# the environment variable giving the log directory of a sat command, in place
+# of LOCAL.log_dir (set by sat compile --jobs for the commands it runs)
+LOG_DIR_ENVIRON = "SAT_LOG_DIR"
+
 def get_log_path(config):
     """\
     Returns the path of the logs.
@@ -451,6 +460,43 @@ class Path:
         except Exception:
             return False
 
+# the listings of the directories searched by find_file_in_lpath,
+# {directory: (modification time, names of the files)}
+_directory_listings = {}
+directory_listing_stats = {'lookups': 0, 'listings': 0}
+
+def get_directory_listing(directory):
+    """\
+    Get the names of the files of a directory. The directory is listed
+    once per process, and listed again when its modification time changes
+    (a file is added, removed or renamed).
+    A directory modified in the last seconds is not kept: the resolution
+    of the modification times of some file systems is too coarse to detect
+    the next changes.
+
+    :param directory str: The path of the directory
+    :return: the names of the files, None if directory is not a directory
+    :rtype: frozenset
+    """
+    directory_listing_stats['lookups'] += 1
+    try:
+        st = os.stat(directory)
+    except OSError:
+        _directory_listings.pop(directory, None)
+        return None
+    if not stat.S_ISDIR(st.st_mode):
+        return None
+    entry = _directory_listings.get(directory)
+    if entry is not None and entry[0] == st.st_mtime:
+        return entry[1]
+    names = frozenset(os.listdir(directory))
+    directory_listing_stats['listings'] += 1
+    if time.time() - st.st_mtime > 2:
+        _directory_listings[directory] = (st.st_mtime, names)
+    else:
+        _directory_listings.pop(directory, None)
+    return names
+
 def find_file_in_lpath(file_name, lpath, additional_dir = ""):
     """\
     Find in all the directories in lpath list the file that has the same name
@@ -470,12 +516,9 @@ def find_file_in_lpath(file_name, lpath, additional_dir = ""):
     """
     for directory in lpath:
         dir_complete = os.path.join(directory, additional_dir)
-        if not os.path.isdir(directory) or not os.path.isdir(dir_complete):
-            continue
-        l_files = os.listdir(dir_complete)
-        for file_n in l_files:
-            if file_n == file_name:
-                return os.path.join(dir_complete, file_name)
+        l_files = get_directory_listing(dir_complete)
+        if l_files is not None and file_name in l_files:
+            return os.path.join(dir_complete, file_name)
     return False
 
 def find_file_in_ftppath(file_name, ftppath, installation_dir, logger, additional_dir = ""):
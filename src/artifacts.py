@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+cache of the installation directories of the compiled products
+(artifacts), shared by the applications and the machines using the
+same directory (LOCAL.artifact_dir, a local or a NFS directory).
+
+The installation of a product is stored by sat compile, as a compressed
+archive <artifact_dir>/<product>/<key>.tar.gz, where the key is computed
+from the fingerprint of the product (sources, patches, options and
+fingerprints of the dependencies, see fingerprint.py), the distribution
+of the machine and the installation directory (the installations may
+contain their absolute path). sat compile restores it instead of
+compiling the product, when the product has the same key.
+
+The modification time of an archive is the time of its last use: the
+least recently used archives are removed when the size of the cache is
+more than LOCAL.artifact_max_size (in GB), and by sat cache --prune.
+"""
+
+import os
+import time
+import shutil
+import socket
+import tarfile
+import hashlib
+
+import src
+import src.debug as DBG
+
+ARCHIVE_EXTENSION = ".tar.gz"
+GB = 1024.0 ** 3
+
+def get_artifact_cache(config):
+    """\
+    Get the artifact cache of the local configuration
+
+    :param config Config: The global configuration
+    :return: the cache, None if there is none (LOCAL.artifact_dir not set,
+             or set to 'no')
+    :rtype: ArtifactCache
+    """
+    if "artifact_dir" not in config.LOCAL:
+        return None
+    directory = str(config.LOCAL.artifact_dir)
+    if directory in ["", "no", "default"]:
+        return None
+    max_size = None
+    if "artifact_max_size" in config.LOCAL:
+        max_size = get_size(config.LOCAL.artifact_max_size)
+    return ArtifactCache(directory, max_size)
+
+def get_size(gigabytes):
+    """\
+    :param gigabytes str: A size in GB, as given in the configuration
+    :return: the size in bytes, None for an empty or an invalid value
+    :rtype: int
+    """
+    try:
+        return int(float(gigabytes) * GB)
+    except (TypeError, ValueError):
+        return None
+
+def get_key(config, p_info, fingerprint):
+    """\
+    Get the key of the archive of the installation of a product
+
+    :param config Config: The global configuration
+    :param p_info Config: The configuration of the product
+    :param fingerprint dict: The fingerprint of the product
+    :return: the key
+    :rtype: str
+    """
+    text = "\n".join([p_info.name,
+                      fingerprint["fingerprint"],
+                      config.VARS.dist,
+                      os.path.normpath(str(p_info.install_dir))])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class ArtifactCache(object):
+    """\
+    The archives of the installations of the products in a directory
+    """
+    def __init__(self, directory, max_size=None):
+        """\
+        :param directory str: The directory of the archives
+        :param max_size int: The maximum size of the archives in bytes,
+                             None for no limit
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+    def get_path(self, p_name, key):
+        """\
+        :param p_name str: The name of the product
+        :param key str: The key of the installation (see get_key)
+        :return: the path of the archive of the installation
+        :rtype: str
+        """
+        return os.path.join(self.directory, p_name, key + ARCHIVE_EXTENSION)
+
+    def restore(self, p_name, key, install_dir):
+        """\
+        Extract the archive of the installation, if there is one, in the
+        installation directory emptied before (the files of another
+        installation are not mixed with the restored ones)
+
+        :param p_name str: The name of the product
+        :param key str: The key of the installation (see get_key)
+        :param install_dir str: The installation directory
+        :return: True if the installation was restored, if not the
+                 installation directory is removed when an archive was found
+        :rtype: boolean
+        """
+        path = self.get_path(p_name, key)
+        if not os.path.isfile(path):
+            return False
+        install_dir = str(install_dir)
+        try:
+            with tarfile.open(path, "r:gz") as archive:
+                members = [m for m in archive.getmembers()
+                           if is_safe_member(m)]
+                if os.path.lexists(install_dir):
+                    shutil.rmtree(install_dir)
+                src.ensure_path_exists(install_dir)
+                kwargs = {}
+                if hasattr(tarfile, "tar_filter"):
+                    # the installations have symbolic links to absolute paths
+                    kwargs["filter"] = "tar"
+                archive.extractall(install_dir, members, **kwargs)
+        except (IOError, OSError, EOFError, tarfile.TarError) as e:
+            # EOFError: truncated archive
+            DBG.write("cannot restore %s" % path, str(e))
+            # no incomplete installation
+            shutil.rmtree(install_dir, ignore_errors=True)
+            return False
+        self.touch(path)
+        return True
+
+    def store(self, p_name, key, install_dir):
+        """\
+        Store the installation in an archive, and remove the least recently
+        used archives if the cache is too big
+
+        :param p_name str: The name of the product
+        :param key str: The key of the installation (see get_key)
+        :param install_dir str: The installation directory
+        :return: True if the installation was stored
+        :rtype: boolean
+        """
+        path = self.get_path(p_name, key)
+        if os.path.isfile(path):
+            # stored by another application or machine
+            self.touch(path)
+            return True
+        # written in a temporary file, renamed once complete: the other
+        # sat commands using the cache never read an incomplete archive
+        tmp = "%s.%s.%d.tmp" % (path, socket.gethostname(), os.getpid())
+        try:
+            src.ensure_path_exists(os.path.dirname(path))
+            with tarfile.open(tmp, "w:gz") as archive:
+                for name in sorted(os.listdir(str(install_dir))):
+                    archive.add(os.path.join(str(install_dir), name), name)
+            os.rename(tmp, path)
+        except (IOError, OSError, tarfile.TarError) as e:
+            DBG.write("cannot store %s" % path, str(e))
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        if self.max_size is not None:
+            self.prune(self.max_size)
+        return True
+
+    def touch(self, path):
+        """Set the time of last use of an archive"""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def get_archives(self):
+        """\
+        :return: the archives of the cache [(time of last use, size,
+                 product name, path)], the least recently used first
+        :rtype: list
+        """
+        res = []
+        if not os.path.isdir(self.directory):
+            return res
+        for p_name in sorted(os.listdir(self.directory)):
+            p_dir = os.path.join(self.directory, p_name)
+            if not os.path.isdir(p_dir):
+                continue
+            for name in os.listdir(p_dir):
+                if not name.endswith(ARCHIVE_EXTENSION):
+                    continue
+                path = os.path.join(p_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue # removed by another sat command
+                res.append((st.st_mtime, st.st_size, p_name, path))
+        res.sort()
+        return res
+
+    def get_stats(self):
+        """\
+        :return: the statistics of the cache: the number of archives and
+                 their size, in total and by product, the time of the
+                 least and of the most recent use
+        :rtype: dict
+        """
+        archives = self.get_archives()
+        products = {}
+        for _mtime, size, p_name, _path in archives:
+            nb, total = products.get(p_name, (0, 0))
+            products[p_name] = (nb + 1, total + size)
+        return {"archives": len(archives),
+                "size": sum(a[1] for a in archives),
+                "max_size": self.max_size,
+                "products": products,
+                "oldest": archives[0][0] if archives else None,
+                "newest": archives[-1][0] if archives else None}
+
+    def prune(self, max_size):
+        """\
+        Remove the least recently used archives, and the temporary files
+        left by the interrupted sat commands, until the size of the cache
+        is at most max_size
+
+        :param max_size int: The maximum size of the archives in bytes
+        :return: the paths of the archives removed, and their size
+        :rtype: (list, int)
+        """
+        self.remove_old_temporary_files()
+        archives = self.get_archives()
+        size = sum(a[1] for a in archives)
+        removed = []
+        removed_size = 0
+        for _mtime, a_size, _p_name, path in archives:
+            if size <= max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue # removed by another sat command
+            size -= a_size
+            removed.append(path)
+            removed_size += a_size
+        return removed, removed_size
+
+    def remove_old_temporary_files(self, age=24 * 3600):
+        """\
+        Remove the temporary archives older than age (in seconds)
+
+        :param age int: The age of the temporary files to remove
+        """
+        if not os.path.isdir(self.directory):
+            return
+        now = time.time()
+        for p_name in os.listdir(self.directory):
+            p_dir = os.path.join(self.directory, p_name)
+            if not os.path.isdir(p_dir):
+                continue
+            for name in os.listdir(p_dir):
+                path = os.path.join(p_dir, name)
+                try:
+                    if name.endswith(".tmp") and \
+                       now - os.path.getmtime(path) > age:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+def is_safe_member(member):
+    """\
+    :param member tarfile.TarInfo: A file of an archive
+    :return: True if the file is extracted in the installation directory
+             (relative path, without ..)
+    :rtype: boolean
+    """
+    name = member.name
+    if os.path.isabs(name) or ".." in name.split("/"):
+        return False
+    return member.isfile() or member.isdir() or member.issym() or member.islnk()
@@ -237,21 +237,43 @@ class Builder:
         else:
             return 1
 
+    ##
+    # Runs a build command (make, build script). With sat compile --jobs,
+    # it runs with a slot of the shared jobserver, and make takes its
+    # parallel jobs from it (see src.jobserver).
+    def call_build_command(self, command):
+        jobserver = src.jobserver.get_jobserver()
+        env = self.build_environ.environ.environ
+        kwargs = {}
+        if jobserver is not None:
+            env = dict(env)
+            env["MAKEFLAGS"] = jobserver.get_makeflags()
+            kwargs = jobserver.get_popen_kwargs()
+            jobserver.acquire()
+        try:
+            return subprocess.call(command,
+                                   shell=True,
+                                   cwd=str(self.build_dir),
+                                   env=env,
+                                   stdout=self.logger.logTxtFile,
+                                   stderr=subprocess.STDOUT,
+                                   **kwargs)
+        finally:
+            if jobserver is not None:
+                jobserver.release()
+
     ##
     # Runs make to build the module.
     def make(self, nb_proc, make_opt=""):
 
         # make
         command = 'make'
-        command = command + " -j" + str(nb_proc)
+        # with the jobserver, the number of jobs is not fixed
+        if src.jobserver.get_jobserver() is None:
+            command = command + " -j" + str(nb_proc)
         command = command + " " + make_opt
         self.log_command(command)
-        res = subprocess.call(command,
-                              shell=True,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT)
+        res = self.call_build_command(command)
         self.put_txt_log_in_appli_log_dir("make")
         if res == 0:
             return res
@@ -486,18 +508,16 @@ class Builder:
 
         if src.architecture.is_windows():
             make_options = "/maxcpucount:%s" % nb_proc
+        elif src.jobserver.get_jobserver() is not None:
+            # a -j option would disable the jobserver given by MAKEFLAGS
+            make_options = ""
         else :
             make_options = "-j%s" % nb_proc
 
         self.log_command("  " + _("Run build script %s\n") % script)
         self.complete_environment(make_options)
         
-        res = subprocess.call(script, 
-                              shell=True,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ)
+        res = self.call_build_command(script)
 
         res_check=self.check_install()
         if res_check > 0 :
@@ -270,7 +270,6 @@ def _saveConfigRecursiveDbg(config, aStream, indent, path, nb):
     '''
     
     try: #type config, mapping
-      order = object.__getattribute__(config, 'order')
       data = object.__getattribute__(config, 'data')
     except Exception:
       aStream.write("%s%s : '%s'\n" % (indstr, path, str(config)))
@@ -278,6 +277,13 @@ def _saveConfigRecursiveDbg(config, aStream, indent, path, nb):
     for key in sorted(data): #order): # data as sort alphabetical, order as initial order
       value = data[key]
       strType = str(type(value))
+      if "Deferred" in strType: # product config not read yet, read it
+        try:
+          value = config[key]
+        except Exception as e:
+          aStream.write("%s%s.%s : !!! ERROR: %s !!!\n" % (indstr, path, key, str(e)))
+          continue
+        strType = str(type(value))
       if debug: print('strType %s %s %s' % (path, key, strType))
       if "Config" in strType:
         _saveConfigRecursiveDbg(value, aStream, indentp, path+"."+key, nbp)
@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+fingerprints of the products: the hash of all what their compilation
+depends upon, written in their install directory after their compilation
+(sat-fingerprint-<product>.json, next to sat-config-<product>.pyconf).
+sat compile --update compiles again the products whose fingerprint changed.
+
+The fingerprint of a product is computed from:
+
+- its sources: the git tree of the source directory (with its local
+  modifications) for the git products, the hash of the archive for the
+  archive products, the hash of the files for the other ones,
+- its patches and its compilation script,
+- its build options (cmake_options, configure_options, build type...),
+- its environment and the one of the application,
+- the fingerprints of its dependencies.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess as SP
+
+import src
+import src.debug as DBG
+
+FINGERPRINT_FILENAME = "sat-fingerprint-" # + product name + ".json"
+
+# the keys of the product configuration used by the compilation
+_PRODUCT_KEYS = ["version", "build_source", "cmake_options",
+                 "configure_options", "buildconfigure_options",
+                 "cmake_build_type", "debug", "verbose", "properties",
+                 "environ"]
+# the keys of the application configuration used by the compilation
+_APPLICATION_KEYS = ["cmake_build_type", "debug", "cmake_generator", "environ"]
+# the keys added by sat when the environment is loaded (from the workdir)
+_IGNORED_KEYS = ["PRODUCT_ROOT_DIR"]
+
+def get_fingerprint_file(p_info):
+    """\
+    :param p_info Config: The configuration of the product
+    :return: the path of the fingerprint file in the install directory
+    :rtype: str
+    """
+    return os.path.join(p_info.install_dir,
+                        FINGERPRINT_FILENAME + p_info.name + ".json")
+
+def read_fingerprint(p_info):
+    """\
+    Read the fingerprint written at the compilation of the product
+
+    :param p_info Config: The configuration of the product
+    :return: the fingerprint file content, None if there is none
+    :rtype: dict
+    """
+    try:
+        with open(get_fingerprint_file(p_info)) as f:
+            res = json.load(f)
+        if "fingerprint" in res:
+            return res
+    except Exception:
+        pass
+    return None
+
+def write_fingerprint(p_info, fingerprint):
+    """\
+    Write the fingerprint of the product in its install directory
+
+    :param p_info Config: The configuration of the product
+    :param fingerprint dict: The fingerprint, as given by Fingerprints.get
+    """
+    try:
+        with open(get_fingerprint_file(p_info), "w") as f:
+            json.dump(fingerprint, f, indent=1, sort_keys=True)
+    except Exception as e:
+        DBG.write("cannot write the fingerprint of %s" % p_info.name, str(e))
+
+def get_changes(old, new):
+    """\
+    :param old dict: A fingerprint written at the compilation of the product
+    :param new dict: The current fingerprint of the product
+    :return: the parts of the fingerprint that changed (sources, options...)
+    :rtype: list
+    """
+    res = [k for k in sorted(new["parts"])
+           if old.get("parts", {}).get(k) != new["parts"][k]]
+    old_depends = old.get("depends", {})
+    res += ["depend " + d for d in sorted(new["depends"])
+            if old_depends.get(d) != new["depends"][d]]
+    return res
+
+class Fingerprints(object):
+    """\
+    The fingerprints of the products of an application, computed once each
+    (a product and its children share the fingerprint of the product)
+    """
+    def __init__(self, config):
+        """\
+        :param config Config: The global configuration
+        """
+        self.config = config
+        self.fingerprints = {}
+
+    def get(self, p_name):
+        """\
+        Get the fingerprint of a product
+
+        :param p_name str: The name of the product
+        :return: the fingerprint {"fingerprint": hash, "parts": {part: hash},
+                 "depends": {dependency: fingerprint}, "files": the hashes
+                 of the files (archive...) with their [mtime, size]},
+                 None if the sources of the product or of one of its
+                 dependencies cannot be read
+        :rtype: dict
+        """
+        if p_name not in self.fingerprints:
+            # set before the computation, in case of cycle in the dependencies
+            self.fingerprints[p_name] = None
+            p_info = src.product.get_product_config(self.config, p_name)
+            self.fingerprints[p_name] = self.compute(p_info)
+        return self.fingerprints[p_name]
+
+    def compute(self, p_info):
+        """\
+        Compute the fingerprint of a product
+
+        :param p_info Config: The configuration of the product
+        :return: the fingerprint (see get)
+        :rtype: dict
+        """
+        # the hashes of the files are reused while they do not change
+        old = read_fingerprint(p_info)
+        files = FileHashes(old["files"] if old and "files" in old else {})
+        parts = {}
+        if src.product.product_is_native(p_info) or \
+           src.product.product_is_fixed(p_info):
+            parts["sources"] = get_text_hash("%s %s" % (p_info.get_source,
+                                                        p_info.install_dir))
+        else:
+            parts["sources"] = get_sources_hash(self.config, p_info, files)
+            if parts["sources"] is None:
+                return None
+        patches = []
+        if src.product.product_has_patches(p_info):
+            patches = [files.get(p) for p in p_info.patches]
+        parts["patches"] = get_text_hash(" ".join(str(p) for p in patches))
+        build = [get_value_text(p_info, k) for k in _PRODUCT_KEYS]
+        if src.product.product_has_script(p_info):
+            build.append(str(files.get(p_info.compil_script)))
+        if src.product.product_has_env_script(p_info):
+            build.append(str(files.get(p_info.environ.env_script)))
+        parts["build"] = get_text_hash("\n".join(build))
+        parts["application"] = get_text_hash("\n".join(
+            get_value_text(self.config.APPLICATION, k) for k in _APPLICATION_KEYS))
+
+        depends = {}
+        l_depends = list(p_info.depend)
+        if "build_depend" in p_info:
+            l_depends += list(p_info.build_depend)
+        for d in l_depends:
+            if d not in self.config.APPLICATION.products:
+                continue # as sat compile, the optional products not in application
+            fingerprint = self.get(d)
+            if fingerprint is None:
+                return None
+            depends[d] = fingerprint["fingerprint"]
+
+        text = "\n".join(["%s %s" % (k, parts[k]) for k in sorted(parts)] +
+                         ["%s %s" % (d, depends[d]) for d in sorted(depends)])
+        return {"fingerprint": get_text_hash(text),
+                "parts": parts,
+                "depends": depends,
+                "files": files.get_used()}
+
+class FileHashes(object):
+    """\
+    The hashes of the files used by a product, computed again only
+    for the files whose modification time or size changed
+    """
+    def __init__(self, known):
+        """\
+        :param known dict: {path: [mtime, size, hash]} of the last fingerprint
+        """
+        self.known = known
+        self.used = {}
+
+    def get(self, path):
+        """\
+        :param path str: The path of the file
+        :return: the hash of its content, None if it cannot be read
+        :rtype: str
+        """
+        path = str(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stat = [st.st_mtime, st.st_size]
+        entry = self.known.get(path)
+        if entry and entry[:2] == stat:
+            res = entry[2]
+        else:
+            res = get_file_hash(path)
+        if res is not None:
+            self.used[path] = stat + [res]
+        return res
+
+    def get_used(self):
+        """\
+        :return: the hashes of the files used, to write with the fingerprint
+        :rtype: dict
+        """
+        return self.used
+
+def get_sources_hash(config, p_info, files):
+    """\
+    Get the hash of the sources of the product
+
+    :param config Config: The global configuration
+    :param p_info Config: The configuration of the product
+    :param files FileHashes: The hashes of the files
+    :return: the hash, None if the sources cannot be read
+    :rtype: str
+    """
+    if src.appli_test_property(config, "pip", "yes") and \
+       src.product.product_test_property(p_info, "pip", "yes"):
+        # the sources of the pip products are in wheels, given by their version
+        return get_text_hash("pip %s" % p_info.version)
+    if p_info.get_source == "git":
+        res = get_git_tree_hash(p_info.source_dir)
+        if res is not None:
+            return res
+    if p_info.get_source == "archive" and "archive_info" in p_info:
+        res = files.get(p_info.archive_info.archive_name)
+        if res is not None:
+            return res
+    return get_directory_hash(p_info.source_dir)
+
+def get_git_tree_hash(source_dir):
+    """\
+    Get the hash of the git tree of the working directory, with its local
+    modifications, from a copy of the git index (the index, the references
+    and the objects of the repository are not changed: the objects of the
+    modified files and of the trees are written in a temporary directory)
+
+    :param source_dir str: The source directory, a git repository
+    :return: the hash, None if it is not a git repository
+    :rtype: str
+    """
+    git_dir = os.path.join(str(source_dir), ".git")
+    if not os.path.isdir(git_dir):
+        return None
+    tmp_dir = tempfile.mkdtemp(prefix="sat_fingerprint_")
+    try:
+        # the copy of the index gives the files not modified since
+        # they were hashed, without reading them
+        index = os.path.join(tmp_dir, "index")
+        if os.path.isfile(os.path.join(git_dir, "index")):
+            shutil.copyfile(os.path.join(git_dir, "index"), index)
+        objects = os.path.join(tmp_dir, "objects")
+        os.mkdir(objects)
+        env = dict(os.environ)
+        env["GIT_INDEX_FILE"] = index
+        env["GIT_OBJECT_DIRECTORY"] = objects
+        env["GIT_ALTERNATE_OBJECT_DIRECTORIES"] = os.path.abspath(
+                                            os.path.join(git_dir, "objects"))
+        git_cmd = ["git", "--git-dir=%s" % git_dir,
+                   "--work-tree=%s" % str(source_dir)]
+        p = SP.Popen(git_cmd + ["add", "--all", "--", "."], cwd=str(source_dir),
+                     env=env, stdout=SP.PIPE, stderr=SP.PIPE)
+        p.communicate()
+        if p.returncode != 0:
+            return None
+        p = SP.Popen(git_cmd + ["write-tree"], cwd=str(source_dir),
+                     env=env, stdout=SP.PIPE, stderr=SP.PIPE)
+        out, _err = p.communicate()
+        if p.returncode != 0:
+            return None
+        return out.decode("utf-8", "ignore").strip()
+    except OSError:
+        return None # no git command
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def get_directory_hash(directory):
+    """\
+    Get the hash of the files of a directory and of their paths
+
+    :param directory str: The directory
+    :return: the hash, None if the directory does not exist
+    :rtype: str
+    """
+    directory = str(directory)
+    if not os.path.isdir(directory):
+        return None
+    res = hashlib.sha1()
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for f in sorted(files):
+            path = os.path.join(root, f)
+            res.update(os.path.relpath(path, directory).encode("utf-8"))
+            if os.path.islink(path):
+                res.update(os.readlink(path).encode("utf-8"))
+            else:
+                res.update(str(get_file_hash(path)).encode("utf-8"))
+    return res.hexdigest()
+
+def get_file_hash(path):
+    """\
+    :param path str: The path of the file
+    :return: the hash of the content of the file, None if it cannot be read
+    :rtype: str
+    """
+    res = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(1 << 20)
+                if not block:
+                    break
+                res.update(block)
+    except (IOError, OSError):
+        return None
+    return res.hexdigest()
+
+def get_text_hash(text):
+    """\
+    :param text str: A text
+    :return: the hash of the text
+    :rtype: str
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def get_value_text(config, key):
+    """\
+    Get the text of a value of a configuration, with the mappings
+    sorted by their keys
+
+    :param config Config: The configuration
+    :param key str: The key of the value
+    :return: "key value", or "key" if there is no such value
+    :rtype: str
+    """
+    if key not in config:
+        return key
+    return "%s %s" % (key, _get_text(config[key]))
+
+def _get_text(value):
+    if isinstance(value, src.pyconf.Mapping):
+        return "{%s}" % ", ".join("%s: %s" % (k, _get_text(value[k]))
+                                  for k in sorted(value.keys())
+                                  if k not in _IGNORED_KEYS)
+    if isinstance(value, src.pyconf.Sequence):
+        return "[%s]" % ", ".join(_get_text(v) for v in value)
+    return str(value)
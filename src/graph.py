@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+dependency graphs of the products of an application
+
+A graph is a dict (or a Graph instance) whose keys are the nodes,
+and values the lists of the nodes they depend upon.
+The algorithms are iterative (no recursion limit for deep graphs),
+and give the nodes in the orders of the historical recursive
+functions of commands/compile.py.
+The Graph class keeps their results for the graph of all the products
+of an application, shared by the commands (see src.product.get_dependencies_graph).
+"""
+
+import pprint as PP
+
+import src
+
+def get_products_graph(p_infos, compile_time=True):
+    """\
+    Get the dependency graph of products from their configurations
+
+    :param p_infos list: The list of (product name, product configuration)
+    :param compile_time boolean: if True, add the build_depend dependencies
+    :return: the graph {product name: [names of the products it depends upon]}
+    :rtype: dict
+    """
+    graph = {}
+    for p_name, p_info in p_infos:
+        depprod = []
+        for d in p_info.depend:
+            depprod.append(d)
+        if compile_time and "build_depend" in p_info:
+            for d in p_info.build_depend:
+                depprod.append(d)
+        graph[p_name] = depprod
+    return graph
+
+def _dependencies(graph, node):
+    """the dependencies of node, with an explicit error if it is not in graph"""
+    try:
+        return graph[node]
+    except KeyError:
+        where = [k for k in graph if node in graph[k]]
+        raise src.SatException('Error in product dependencies : %s product is '
+                               'referenced in products dependencies, but is not '
+                               'present in the application, from %s' % (node, where))
+
+def depth_search(graph, start, visited=None):
+    """\
+    Get the node start and all its dependencies, recursively,
+    in the depth-first order
+
+    :param graph dict: The graph
+    :param start str: The node
+    :param visited list: The nodes already found, not listed again
+    :return: visited completed with start and its dependencies
+    :rtype: list
+    """
+    res = list(visited or [])
+    seen = set(res)
+    if start in seen:
+        return res
+    res.append(start)
+    seen.add(start)
+    stack = [iter(_dependencies(graph, start))]
+    while stack:
+        for node in stack[-1]:
+            if node not in seen:
+                res.append(node)
+                seen.add(node)
+                stack.append(iter(_dependencies(graph, node)))
+                break
+        else:
+            stack.pop()
+    return res
+
+def has_path(graph, start, end):
+    """\
+    Check that the node start depends, recursively, on one of the nodes end.
+    The dependencies which are not in graph are not followed.
+
+    :param graph dict: The graph
+    :param start str: The node
+    :param end list: The nodes
+    :return: True if a node of end is start or one of its dependencies
+    :rtype: boolean
+    """
+    end = set(end)
+    if start in end:
+        return True
+    seen = set([start])
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        if node not in graph:
+            continue
+        for dep in graph[node]:
+            if dep in end:
+                return True
+            if dep not in seen:
+                seen.add(dep)
+                stack.append(dep)
+    return False
+
+def reverse_graph(graph):
+    """\
+    Get the reverse graph: the nodes which depend directly upon each node,
+    in the order of the nodes of graph
+
+    :param graph dict: The graph
+    :return: the reverse graph
+    :rtype: dict
+    """
+    res = dict((node, []) for node in graph)
+    for node in graph:
+        for dep in graph[node]:
+            dependents = res.setdefault(dep, [])
+            if not dependents or dependents[-1] != node:
+                dependents.append(node)
+    return res
+
+def get_dependents(graph, end, reverse=None):
+    """\
+    Get the nodes of graph which depend, recursively, on one of the nodes end
+    (as has_path for all the nodes, in one traversal of the reverse graph)
+
+    :param graph dict: The graph
+    :param end list: The nodes
+    :param reverse dict: The reverse graph of graph, if already computed
+    :return: the nodes, not in end, in the order of graph
+    :rtype: list
+    """
+    if reverse is None:
+        reverse = reverse_graph(graph)
+    end = set(end)
+    seen = set(end)
+    stack = list(end)
+    while stack:
+        node = stack.pop()
+        for dependent in reverse.get(node, []):
+            if dependent not in seen:
+                seen.add(dependent)
+                stack.append(dependent)
+    return [node for node in graph if node in seen and node not in end]
+
+def topological_sort(graph):
+    """\
+    Sort the nodes of graph: the nodes listed first do not depend
+    upon the nodes listed after (depth-first post-order)
+
+    :param graph dict: The graph
+    :return: the sorted nodes
+    :rtype: list
+    :raise SatException: if a dependency is not in graph, or for a cycle,
+                         whose nodes are given
+    """
+    res = []
+    done = set()
+    for root in graph:
+        if root in done:
+            continue
+        path = [root]
+        on_path = set(path)
+        stack = [iter(_dependencies(graph, root))]
+        while stack:
+            for node in stack[-1]:
+                if node in on_path:
+                    cycle = path[path.index(node):] + [node]
+                    raise src.SatException('Error in product dependencies : cycle '
+                                           'detection for node %s and %s (%s)' % \
+                                           (path[-1], node, " -> ".join(cycle)))
+                if node not in done:
+                    stack.append(iter(_dependencies(graph, node)))
+                    path.append(node)
+                    on_path.add(node)
+                    break
+            else:
+                stack.pop()
+                node = path.pop()
+                on_path.discard(node)
+                done.add(node)
+                res.append(node)
+    return res
+
+class Graph(object):
+    """\
+    A dependency graph, which keeps the results of the algorithms:
+    the topological sort, the reverse graph and the dependencies of
+    each node. It is used as the dict of the graph (read only).
+    """
+    def __init__(self, graph):
+        """\
+        :param graph dict: The graph,
+                           {node: [nodes it depends upon]}
+        """
+        self.nodes = list(graph)
+        # adjacency lists without duplicates, in their order
+        self.dependencies = {}
+        for node in self.nodes:
+            deps = []
+            seen = set()
+            for dep in graph[node]:
+                if dep not in seen:
+                    seen.add(dep)
+                    deps.append(dep)
+            self.dependencies[node] = deps
+        self._sorted = None
+        self._reverse = None
+        self._closures = {}
+
+    def __contains__(self, node):
+        return node in self.dependencies
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, node):
+        return self.dependencies[node]
+
+    def keys(self):
+        return list(self.nodes)
+
+    def to_dict(self):
+        """\
+        :return: the graph as a dict {node: [nodes it depends upon]}
+        :rtype: dict
+        """
+        return dict((node, list(self.dependencies[node])) for node in self.nodes)
+
+    def __repr__(self):
+        return "Graph(%s)" % PP.pformat(self.to_dict())
+
+    def topological_sort(self):
+        """\
+        :return: the sorted nodes (see topological_sort)
+        :rtype: list
+        """
+        if self._sorted is None:
+            self._sorted = topological_sort(self)
+        return list(self._sorted)
+
+    def reverse(self):
+        """\
+        :return: the reverse graph (see reverse_graph)
+        :rtype: dict
+        """
+        if self._reverse is None:
+            self._reverse = reverse_graph(self)
+        return self._reverse
+
+    def get_closure(self, node):
+        """\
+        :return: node and its dependencies, recursively (see depth_search)
+        :rtype: list
+        """
+        closure = self._closures.get(node)
+        if closure is None:
+            closure = depth_search(self, node)
+            self._closures[node] = closure
+        return list(closure)
+
+    def depth_search(self, nodes):
+        """\
+        :param nodes list: The nodes
+        :return: the nodes and all their dependencies, recursively, in the
+                 depth-first order (as successive calls to depth_search)
+        :rtype: list
+        """
+        res = []
+        seen = set()
+        for node in nodes:
+            if node in seen:
+                continue
+            for dep in self.get_closure(node):
+                if dep not in seen:
+                    seen.add(dep)
+                    res.append(dep)
+        return res
+
+    def has_path(self, start, end):
+        """\
+        :return: True if start depends, recursively, on a node of end
+        :rtype: boolean
+        """
+        end = set(end)
+        if start in end:
+            return True
+        if start not in self.dependencies:
+            return False
+        try:
+            return not end.isdisjoint(self.get_closure(start))
+        except src.SatException:
+            # a dependency is not in the graph: it is not followed
+            return has_path(self, start, end)
+
+    def get_dependents(self, end):
+        """\
+        :return: the nodes which depend, recursively, on the nodes end
+                 (see get_dependents)
+        :rtype: list
+        """
+        return get_dependents(self, end, self.reverse())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+processor slots shared by the builds of the products compiled
+at the same time (sat compile --jobs), as a GNU make jobserver.
+
+The slots are the bytes (tokens) of a named pipe, created by sat compile
+and given to the sat commands it runs by the SAT_JOBSERVER environment
+variable. A build takes a token while it runs (the slot of the make
+command itself), and make takes the other ones for its parallel jobs,
+from the MAKEFLAGS variable (--jobserver-auth, GNU make >= 4.2).
+The make commands run by cmake --build or by the build scripts inherit
+MAKEFLAGS and use the same slots.
+Not available on windows.
+"""
+
+import os
+import sys
+import time
+import errno
+import shutil
+import tempfile
+
+# the environment variable giving the path of the named pipe
+ENVIRON_VARIABLE = "SAT_JOBSERVER"
+TOKEN = b"+"
+
+class JobServer(object):
+    """\
+    The named pipe of the slots, opened in read and write mode
+    (the tokens stay in the pipe while one process has it opened)
+    """
+    def __init__(self, path, owner=False):
+        """\
+        :param path str: The path of the named pipe
+        :param owner boolean: if True, the pipe is removed by close
+        """
+        self.path = path
+        self.owner = owner
+        self.fd = os.open(path, os.O_RDWR)
+        if sys.version_info[0] >= 3:
+            os.set_inheritable(self.fd, True)
+        self.slots = 0
+        # the time spent waiting for the tokens
+        self.wait_time = 0.0
+
+    @classmethod
+    def create(cls, slots):
+        """\
+        Create the named pipe in a temporary directory, with slots tokens
+
+        :param slots int: The number of slots
+        :return: the jobserver
+        :rtype: JobServer
+        """
+        tmp_dir = tempfile.mkdtemp(prefix="sat_jobserver_")
+        path = os.path.join(tmp_dir, "slots")
+        os.mkfifo(path)
+        res = cls(path, owner=True)
+        res.slots = slots
+        os.write(res.fd, TOKEN * slots)
+        return res
+
+    def close(self):
+        """Close the pipe, and remove it if it was created by create"""
+        if self.fd is None:
+            return
+        os.close(self.fd)
+        self.fd = None
+        if self.owner:
+            shutil.rmtree(os.path.dirname(self.path), ignore_errors=True)
+
+    def acquire(self):
+        """Take a token, waiting for a free slot"""
+        t0 = time.time()
+        while True:
+            try:
+                if os.read(self.fd, 1):
+                    break
+            except OSError as e:
+                if e.errno != errno.EINTR:
+                    raise
+        self.wait_time += time.time() - t0
+
+    def release(self):
+        """Give back a token"""
+        os.write(self.fd, TOKEN)
+
+    def get_environ(self):
+        """\
+        :return: the variables of the environment of the sat commands
+                 sharing the slots
+        :rtype: dict
+        """
+        return {ENVIRON_VARIABLE: self.path}
+
+    def get_makeflags(self):
+        """\
+        :return: the MAKEFLAGS value for make to take its parallel jobs
+                 from the slots (instead of a -j<n> option)
+        :rtype: str
+        """
+        return " -j --jobserver-auth=%d,%d" % (self.fd, self.fd)
+
+    def get_popen_kwargs(self):
+        """\
+        :return: the arguments of subprocess for the commands to inherit
+                 the pipe descriptor
+        :rtype: dict
+        """
+        if sys.version_info[0] >= 3:
+            return {"pass_fds": (self.fd,)}
+        return {"close_fds": False}
+
+# the jobserver given by sat compile to the current sat command, if any
+_jobserver = None
+
+def get_jobserver():
+    """\
+    Get the jobserver of the slots shared with the other builds,
+    if the sat command is run by sat compile --jobs
+
+    :return: the jobserver, or None
+    :rtype: JobServer
+    """
+    global _jobserver
+    path = os.environ.get(ENVIRON_VARIABLE)
+    if not path or not hasattr(os, "mkfifo"):
+        return None
+    if _jobserver is None or _jobserver.path != path:
+        if _jobserver is not None:
+            _jobserver.close()
+            _jobserver = None
+        try:
+            _jobserver = JobServer(path)
+        except OSError:
+            # the pipe was removed: sat compile has ended
+            return None
+    return _jobserver
+
+def get_children_cpu_time():
+    """\
+    :return: the processor time (user and system) of the terminated
+             child processes of the current process, and of their children
+    :rtype: float
+    """
+    times = os.times()
+    return times[2] + times[3]
@@ -47,17 +47,22 @@ class Logger(object):
                  config= None,
                  silent_sysstd=False,
                  all_in_terminal=False,
-                 micro_command = False):
+                 micro_command = False,
+                 dump_config = True):
         """Initialization
         
         :param config pyconf.Config: The global configuration.
         :param silent_sysstd boolean: if True, do not write anything
                                       in terminal.
+        :param dump_config boolean: if False, the config is not dumped
+                                    in the log directory (a command using
+                                    the config of its caller)
         """
         DBG.write("src.logger.Logger", id(self))
         self.config = config
         self.default_level = 3
         self.silentSysStd = silent_sysstd
+        self.dump_config = dump_config
         
         # Construct xml log file location for sat prints.
         prefix = ""
@@ -327,6 +332,8 @@ class Logger(object):
             shutil.copy(f_init, logDir)
         
         # Dump the config in a pyconf file in the log directory
+        if not self.dump_config:
+            return
         dumpedPyconfFileName = (self.config.VARS.datehour
                                 + "_" 
                                 + self.config.VARS.command 
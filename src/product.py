@@ -23,6 +23,9 @@ relative to the product notion of salomeTools
 
 import os
 import re
+import sys
+import json
+import threading
 import pprint as PP
 
 import src
@@ -34,10 +37,143 @@ AVAILABLE_VCS = ['git', 'svn', 'cvs']
 CONFIG_FILENAME = "sat-config-" # trace product depends version(s)
 PRODUCT_FILENAME = "sat-product-" # trace product compile config
 config_expression = r"^config-\d+$"
+# index of the versions written in the config-<i>/sat-config-<product>.pyconf
+# files of a product directory in a base (see check_config_exists)
+CONFIG_INDEX_FILENAME = "sat-config-index.json"
+config_index_stats = {'hits': 0, 'misses': 0}
+
+# the lock of the change of src.pyconf.streamOpener by DeferredProductConfig
+_stream_opener_lock = threading.Lock()
+
+class DeferredProductConfig(src.pyconf.Deferred):
+    """\
+    The config of a product in the PRODUCTS section of the global config,
+    read from its pyconf file on the first access to config.PRODUCTS[name]
+    (see ConfigManager.get_config and src.pyconf.Deferred)
+    """
+    __slots__ = ('product_file_path', 'products_dir', 'stream_opener', 'prefetched')
+
+    def __init__(self, product_file_path, products_dir):
+        """\
+        :param product_file_path str: The path of the pyconf file of the product
+        :param products_dir str: The absolute path of its directory
+        """
+        self.product_file_path = product_file_path
+        self.products_dir = products_dir
+        # the files included by the pyconf file (@ syntax) are found by the
+        # stream opener of the config, which may be another one at the load
+        self.stream_opener = src.pyconf.streamOpener
+        self.prefetched = None
+
+    def prefetch(self):
+        """\
+        Read the pyconf file of the product, possibly in a worker thread
+        (see src.pyconf.prefetchDeferreds). 
+        The config, or the error, is kept for the load method.
+        """
+        try:
+            if self.stream_opener is None or \
+               src.pyconf.streamOpener is self.stream_opener:
+                prod_cfg = self.read()
+            else:
+                # the deferred configs loaded together are the ones of
+                # the same config, read one at a time with its opener
+                with _stream_opener_lock:
+                    opener = src.pyconf.streamOpener
+                    src.pyconf.streamOpener = self.stream_opener
+                    try:
+                        prod_cfg = self.read()
+                    finally:
+                        src.pyconf.streamOpener = opener
+        except Exception as e:
+            self.prefetched = (None, e)
+            return
+        prod_cfg.from_file = self.product_file_path
+        self.prefetched = (prod_cfg, None)
+
+    def read(self):
+        """Read the pyconf file of the product"""
+        return src.pyconf.Config(open(self.product_file_path),
+                                 PWD=("", self.products_dir))
+
+    def load(self):
+        """\
+        Get the config of the product, read by prefetch
+
+        :return: the config of the product, 
+                 None if the file has an error (a warning is printed)
+        :rtype: Config
+        """
+        if self.prefetched is None:
+            self.prefetch()
+        prod_cfg, error = self.prefetched
+        self.prefetched = None
+        if error is not None:
+            product_name = os.path.basename(self.product_file_path)[:-len(".pyconf")]
+            msg = _("WARNING: Error in configuration file"
+                    ": %(prod)s\n  %(error)s" % \
+                    {'prod' :  product_name, 'error': str(error) })
+            sys.stdout.write(msg)
+            return None
+        return prod_cfg
+
+    def __getstate__(self):
+        # the stream opener is set again when the config is restored
+        # from a snapshot (see set_deferred_stream_opener)
+        return (self.product_file_path, self.products_dir)
+
+    def __setstate__(self, state):
+        self.product_file_path, self.products_dir = state
+        self.stream_opener = None
+        self.prefetched = None
+
+    def __repr__(self):
+        # written as the include of the file by Config.__save__
+        return "@%r" % self.product_file_path
+
+    __str__ = __repr__
+
+def set_deferred_stream_opener(config, stream_opener):
+    """\
+    Set the stream opener of the product configs not read yet, 
+    for a config restored from a snapshot
+
+    :param config Config: The global configuration
+    :param stream_opener ConfigOpener: The stream opener of the config
+    """
+    if "PRODUCTS" not in config:
+        return
+    for value in object.__getattribute__(config.PRODUCTS, 'data').values():
+        if isinstance(value, DeferredProductConfig):
+            value.stream_opener = stream_opener
+
+# the results of get_product_config and get_dependencies_graph, 
+# {id(config): [config, {(product_name, with_install_dir): prod_info},
+#                       {compile_time: graph}, state]},
+# valid while the parts of the configuration read by compute_product_config
+# are not changed (see get_product_configs_state)
+_product_configs = {}
+# the maximum number of configurations in _product_configs (the ones of
+# the commands and of the called commands with their own options)
+_PRODUCT_CONFIGS_MAX = 4
+# the sections read by compute_product_config; not VARS, whose values used
+# by the products are fixed, the other ones being changed by each called
+# command (see ConfigManager.set_volatile_vars)
+_PRODUCT_CONFIGS_SECTIONS = ("APPLICATION", "PRODUCTS", "PATHS", "INTERNAL", "LOCAL")
+# the number of computations in progress (get_install_dir calls
+# get_product_config)
+_product_configs_state = {'depth': 0}
+product_config_stats = {'hits': 0, 'misses': 0}
 
 def get_product_config(config, product_name, with_install_dir=True):
     """Get the specific configuration of a product from the global configuration
 
+    The result is kept until a change of the parts of the configuration
+    it is computed from (the changes of get_product_config excepted), or
+    until a call to invalidate_product_config.
+    The returned configuration is a copy: its changes are not seen by the
+    other callers, nor in the global configuration.
+
     :param config Config: The global configuration
     :param product_name str: The name of the product
     :param with_install_dir boolean: If false, do not provide an install
@@ -46,6 +182,95 @@ def get_product_config(config, product_name, with_install_dir=True):
     :return: the specific configuration of the product
     :rtype: Config
     """
+    state = _product_configs_state
+    infos = _get_product_configs(config)
+    key = (product_name, with_install_dir)
+    prod_info = infos[1].get(key)
+    if prod_info is not None:
+        product_config_stats['hits'] += 1
+        return src.pyconf.copyContainer(prod_info)
+    product_config_stats['misses'] += 1
+    state['depth'] += 1
+    try:
+        prod_info = compute_product_config(config, product_name, with_install_dir)
+    finally:
+        state['depth'] -= 1
+    # the changes of the configuration are the ones of the computation
+    infos[3] = get_product_configs_state(config)
+    # the section of the product definition is changed by the next
+    # computations, the kept result is a copy
+    infos[1][key] = src.pyconf.copyContainer(prod_info)
+    return src.pyconf.copyContainer(prod_info)
+
+def get_product_configs_state(config):
+    """Get the state of the parts of the configuration read by
+    compute_product_config: the stamps of the last changes of its
+    sections (see src.pyconf.getChangeStamp).
+
+    :param config Config: The global configuration
+    :return: the state, equal to a previous one if these parts did not change
+    :rtype: list
+    """
+    data = object.__getattribute__(config, 'data')
+    # the stamp of the last change of the whole configuration first,
+    # to check quickly that nothing changed (see _get_product_configs)
+    state = [src.pyconf.getChangeStamp(config)]
+    for name in _PRODUCT_CONFIGS_SECTIONS:
+        section = data.get(name)
+        if isinstance(section, src.pyconf.Container):
+            state.append((id(section), src.pyconf.getChangeStamp(section)))
+        else:
+            state.append(section)
+    return state
+
+def _get_product_configs(config):
+    """the results of get_product_config and get_dependencies_graph for
+    config, still valid"""
+    infos = _product_configs.get(id(config))
+    if infos is None or infos[0] is not config:
+        if infos is None and len(_product_configs) >= _PRODUCT_CONFIGS_MAX:
+            _product_configs.pop(next(iter(_product_configs)))
+        infos = [config, {}, {}, None]
+        _product_configs[id(config)] = infos
+    elif _product_configs_state['depth'] == 0 and infos[3] is not None and \
+         infos[3][0] != src.pyconf.getChangeStamp(config):
+        state = get_product_configs_state(config)
+        if infos[3][1:] != state[1:]:
+            infos[1].clear()
+            infos[2].clear()
+        infos[3] = state
+    return infos
+
+def invalidate_product_config(config, product_name=None):
+    """Forget the results of get_product_config for a product, to compute 
+    them again, as after the cleaning of its installation directory
+
+    :param config Config: The global configuration
+    :param product_name str: The name of the product, 
+                             None for all the products
+    """
+    infos = _product_configs.get(id(config))
+    if infos is None or infos[0] is not config:
+        return
+    if product_name is None:
+        infos[1].clear()
+        infos[2].clear()
+        return
+    # the dependencies of the product do not change: the graphs are kept
+    for with_install_dir in (True, False):
+        infos[1].pop((product_name, with_install_dir), None)
+
+def compute_product_config(config, product_name, with_install_dir=True):
+    """Compute the specific configuration of a product from the global 
+    configuration (see get_product_config)
+
+    :param config Config: The global configuration
+    :param product_name str: The name of the product
+    :param with_install_dir boolean: If false, do not provide an install
+                                     directory
+    :return: the specific configuration of the product
+    :rtype: Config
+    """
 
     # Get the version of the product from the application definition
     version = config.APPLICATION.products[product_name]
@@ -392,6 +617,30 @@ Please provide a 'compil_script' key in its definition.""") % product_name
         prod_info.install_dir,prod_info.install_mode = get_install_dir(config, version, prod_info)
     return prod_info
 
+# the indexes of the version ranges of the sections of the products,
+# {(product name, section names): VMMP.RangesIndex_majorMinorPatch}
+_version_ranges_indexes = {}
+
+def get_version_ranges_index(product_name, product_def):
+    """Get the index of the version ranges defined by the sections of a
+    product (as 'version_1_0_0_to_2_0_0'), built once per product definition.
+    Overlapping ranges are reported when it is built.
+
+    :param product_name str: The product name
+    :param product_def Config: The definition of the product, config.PRODUCTS[name]
+    :return: the index of the version ranges
+    :rtype: VMMP.RangesIndex_majorMinorPatch
+    """
+    key = (product_name, tuple(product_def.keys()))
+    ranges_index = _version_ranges_indexes.get(key)
+    if ranges_index is None:
+        ranges_index = VMMP.RangesIndex_majorMinorPatch(key[1])
+        for names in ranges_index.overlaps:
+            DBG.tofix("overlapping version ranges in the definition of product %s" % product_name,
+                      names)
+        _version_ranges_indexes[key] = ranges_index
+    return ranges_index
+
 def get_product_section(config, product_name, version, section=None):
     """Build the product description from the configuration
 
@@ -420,7 +669,7 @@ def get_product_section(config, product_name, version, section=None):
 
     # decode version number
     try:
-      versionMMP = VMMP.MinorMajorPatch(version)
+      versionMMP = VMMP.getCached_majorMinorPatch(version)
     except Exception: # example setuptools raise "minor in major_minor_patch is not integer: '0_6c11'"
       versionMMP = None
 
@@ -443,25 +692,17 @@ def get_product_section(config, product_name, version, section=None):
 
     # Else, check if there is a description for multiple versions
     else:
-        l_section_names = aProd.keys()
-        l_section_ranges = []
+        ranges_index = get_version_ranges_index(product_name, aProd)
         tagged = []
-        for name in l_section_names:
-          aRange = VMMP.getRange_majorMinorPatch(name)
-          if aRange is not None:
-            l_section_ranges.append((name, aRange))
-
-        if versionMMP is not None and len(l_section_ranges) > 0:
-          for name, (vmin, vmax) in l_section_ranges:
-            if versionMMP >= vmin and versionMMP <= vmax:
-              tagged.append((name, [vmin, vmax]))
+        if versionMMP is not None:
+          tagged = ranges_index.find(versionMMP)
 
         if len(tagged) > 1:
           DBG.write("multiple version ranges tagged for '%s', fix it" % version,
                          PP.pformat(tagged))
           pi=None
         elif len(tagged) == 1: # ok
-          name, (vmin, vmax) = tagged[0]
+          name = tagged[0]
           pi = aProd[name]
           pi.section = name
           pi.from_file = aProd.from_file
@@ -655,6 +896,14 @@ def add_compile_config_file(p_info, config):
     aFile = os.path.join(p_info.install_dir, afilename)
     with open(aFile, 'w') as f:
       res.__save__(f)
+    # and for the index of the product directory in base
+    config_dir = os.path.basename(os.path.normpath(p_info.install_dir))
+    if re.match(config_expression, config_dir):
+      prod_dir = os.path.dirname(os.path.normpath(p_info.install_dir))
+      index = read_config_index(prod_dir)
+      versions = dict((k, res[k]) for k in res)
+      if _set_config_index_entry(index, config_dir, aFile, versions):
+        write_config_index(prod_dir, index)
 
     # this file is not mandatory, is for human eye reading
     afilename = PRODUCT_FILENAME + p_info.name + ".pyconf"
@@ -668,11 +917,82 @@ def add_compile_config_file(p_info, config):
       DBG.write("Warning : sat was not able to evaluate and write down some information in file %s" % aFile)
   
 
+def read_config_index(prod_dir):
+    """\
+    Read the index of the config-<i> directories of a product directory
+    in a base: {config-<i>: {"stat": [mtime, size] of its sat-config file,
+    "versions": {product name: version} written in this file}}
+
+    :param prod_dir str: The product installation directory path 
+                         (without config-<i>)
+    :return: the index, empty if there is no index or it cannot be read
+    :rtype: dict
+    """
+    try:
+        with open(os.path.join(prod_dir, CONFIG_INDEX_FILENAME)) as f:
+            index = json.load(f)
+        if isinstance(index, dict):
+            return index
+    except Exception:
+        pass
+    return {}
+
+def write_config_index(prod_dir, index):
+    """\
+    Write the index of the config-<i> directories of a product directory,
+    atomically (read by the other sat calls sharing the base).
+    Errors are ignored (a base which is read only for example): the index
+    is only an optimization.
+
+    :param prod_dir str: The product installation directory path 
+                         (without config-<i>)
+    :param index dict: The index (see read_config_index)
+    """
+    path = os.path.join(prod_dir, CONFIG_INDEX_FILENAME)
+    tmp = '%s.%d' % (path, os.getpid())
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        src.pyconf.replaceFile(tmp, path)
+    except Exception:
+        DBG.write("Warning : sat was not able to write the index %s" % path)
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
+
+def _get_config_file_stat(config_file):
+    """the [mtime, size] of a sat-config file, None if it does not exist"""
+    try:
+        st = os.stat(config_file)
+    except OSError:
+        return None
+    return [st.st_mtime, st.st_size]
+
+def _set_config_index_entry(index, config_dir, config_file, versions):
+    """\
+    record in index the versions of the sat-config file of config_dir,
+    if they are strings (as written by add_compile_config_file).
+    Return True if index is changed
+    """
+    stat = _get_config_file_stat(config_file)
+    if stat is None:
+        return False
+    for name, version in versions.items():
+        if not isinstance(version, str):
+            return False
+    index[config_dir] = {"stat": stat, "versions": versions}
+    return True
+
 def check_config_exists(config, prod_dir, prod_info, verbose=False):
     """\
     Verify that the installation directory of a product in a base exists.
     Check all the config-<i>/sat-config.py files found for correspondence
-    with current config and prod_info depend-version-tags
+    with current config and prod_info depend-version-tags.
+    The versions of these files are read in the index of prod_dir
+    (see read_config_index) while the files are not changed, the files
+    which are not indexed are read and added to the index.
     
     :param config Config: The global configuration
     :param prod_dir str: The product installation directory path 
@@ -700,8 +1020,12 @@ def check_config_exists(config, prod_dir, prod_info, verbose=False):
     if "build_depend" in prod_info:
         for d in prod_info.build_depend:
             depend_all.append(d)
+
+    index = read_config_index(prod_dir)
+    index_changed = False
+    found = None
+    oExpr = re.compile(config_expression)
     for dir_or_file in l_dir_and_files:
-        oExpr = re.compile(config_expression)
         if not(oExpr.search(dir_or_file)):
             # in mode BASE, not config-<i>, not interesting
             # DBG.write("not interesting", dir_or_file, True)
@@ -711,13 +1035,23 @@ def check_config_exists(config, prod_dir, prod_info, verbose=False):
         afilename = CONFIG_FILENAME + prod_info.name + ".pyconf"
         config_file = os.path.join(prod_dir, dir_or_file, afilename)
         DBG.write("check_config_exists 222", config_file, verbose)
-        if not os.path.exists(config_file):
-            continue
+        entry = index.get(dir_or_file)
+        if isinstance(entry, dict) and isinstance(entry.get("versions"), dict) and \
+           entry.get("stat") == _get_config_file_stat(config_file):
+            config_index_stats['hits'] += 1
+            compile_cfg = entry["versions"]
+        else:
+            if not os.path.exists(config_file):
+                continue
+            config_index_stats['misses'] += 1
+            compile_cfg = src.pyconf.Config(config_file)
+            if _set_config_index_entry(index, dir_or_file, config_file, 
+                                       dict((k, compile_cfg[k]) for k in compile_cfg)):
+                index_changed = True
         
         # check if there is the config described in the file corresponds the 
         # dependencies of the product
         config_corresponds = True    
-        compile_cfg = src.pyconf.Config(config_file)
         for prod_dep in depend_all:
             # if the dependency is not in the config, 
             # the config does not correspond
@@ -749,15 +1083,51 @@ def check_config_exists(config, prod_dir, prod_info, verbose=False):
                 config_corresponds = False
                 break
         
-        if config_corresponds: # returns (and stops) at first correspondence found
+        if config_corresponds: # stops at first correspondence found
             DBG.write("check_config_exists OK 444", dir_or_file, verbose)
-            return True, os.path.join(prod_dir, dir_or_file)
-
+            found = os.path.join(prod_dir, dir_or_file)
+            break
+
+    if index_changed:
+        # forget the directories removed
+        for config_dir in list(index):
+            if config_dir not in l_dir_and_files:
+                del index[config_dir]
+        write_config_index(prod_dir, index)
+
+    if found is not None:
+        return True, found
     # no correspondence found
     return False, None
             
             
     
+def get_load_workers(config):
+    """\
+    Get the number of threads reading the pyconf files of the products
+    (INTERNAL.config.load_workers, 1 if not set)
+
+    :param config Config: The global configuration
+    :return: the number of threads, at least 1
+    :rtype: int
+    """
+    try:
+        return max(1, int(config.INTERNAL.config.load_workers))
+    except Exception:
+        return 1
+
+def load_products_configs(config, lproducts):
+    """\
+    Read in parallel the pyconf files of products which are not read yet
+    (see DeferredProductConfig), as before a loop on their configs.
+    The configs are merged in the order of the list, as sequential reads do.
+
+    :param config Config: The global configuration
+    :param lproducts List: The list of product names
+    """
+    if "PRODUCTS" in config:
+        config.PRODUCTS.loadDeferreds(lproducts, get_load_workers(config))
+
 def get_products_infos(lproducts, config):
     """Get the specific configuration of a list of products
     
@@ -768,6 +1138,7 @@ def get_products_infos(lproducts, config):
     :rtype: [(str, Config)]
     """
     products_infos = []
+    load_products_configs(config, lproducts)
     # Loop on product names
     for prod in lproducts:       
         # Get the specific configuration of the product
@@ -795,6 +1166,7 @@ def get_products_list(options, cfg, logger):
     if options.products is None:
         # No options, get all products sources
         products=[]
+        load_products_configs(cfg, list(cfg.APPLICATION.products.keys()))
         for product in cfg.APPLICATION.products.keys():
             prod_info = get_product_config(cfg, product)
             git_server = None
@@ -867,6 +1239,30 @@ def get_products_list(options, cfg, logger):
     return res
 
 
+def get_dependencies_graph(config, compile_time=True):
+    """\
+    Get the dependency graph of all the products of the application,
+    shared by the callers while the configuration is not changed
+    (as the results of get_product_config)
+
+    :param config Config: The global configuration
+    :param compile_time boolean: if True, add the build_depend dependencies
+    :return: the graph of the products
+    :rtype: src.graph.Graph
+    """
+    graph = _get_product_configs(config)[2].get(compile_time)
+    if graph is not None:
+        return graph
+    all_products_infos = get_products_infos(config.APPLICATION.products, config)
+    graph = src.graph.Graph(src.graph.get_products_graph(all_products_infos,
+                                                         compile_time))
+    # the changes of the configuration are the ones of get_products_infos
+    infos = _get_product_configs(config)
+    if _product_configs_state['depth'] == 0:
+        infos[3] = get_product_configs_state(config)
+    infos[2][compile_time] = graph
+    return graph
+
 def get_product_dependencies(config, product_name, product_info):
     """\
     Get the list of products that are 
@@ -878,25 +1274,22 @@ def get_product_dependencies(config, product_name, product_info):
     :return: the list of products in dependence
     :rtype: list
     """
-    from compile import get_dependencies_graph, depth_search_graph
-    all_products_infos = get_products_infos(
-                             config.APPLICATION.products,
-                             config)
-    all_products_graph=get_dependencies_graph(all_products_infos)
-    res=[]
-    res=depth_search_graph(all_products_graph, product_name, res)
+    res = get_dependencies_graph(config).get_closure(product_name)
     return res[1:]  # remove the product himself (in first position)
 
-def check_installation(config, product_info):
+def check_installation(config, product_info, checker=None):
     """\
     Verify if a product is well installed. Checks install directory presence
     and some additional files if it is defined in the config 
     
     :param product_info Config: The configuration specific to 
                                the product
+    :param checker PresenceChecker: If given, the checker of the files,
+                                    sharing the listings of the directories
     :return: True if it is well installed
     :rtype: boolean
     """
+    exists = os.path.exists if checker is None else checker.exists
     # don't check products that are not compiled
     if not product_compiles(product_info):
         return True
@@ -924,11 +1317,11 @@ def check_installation(config, product_info):
     if src.product.product_is_fixed(product_info):
         # we check directly the install dir only for fixed products
         # (there is no pyconf file in that case)
-        if not os.path.exists(install_dir):
+        if not exists(install_dir):
             return False
     else:
         filename = CONFIG_FILENAME + product_info.name + ".pyconf"
-        if not os.path.exists(os.path.join(install_dir, filename)): 
+        if not exists(os.path.join(install_dir, filename)): 
             return False
 
     # check extra files if specified in present_files.install section
@@ -936,29 +1329,119 @@ def check_installation(config, product_info):
         "install" in product_info.present_files):
         for file_relative_path in product_info.present_files.install:
             file_path = os.path.join(install_dir, file_relative_path)
-            if not os.path.exists(file_path):
+            if not exists(file_path):
                 return False
     return True
 
-def check_source(product_info):
+def check_source(product_info, checker=None):
     """Verify if a sources of product is preset. Checks source directory presence
     
     :param product_info Config: The configuration specific to 
                                the product
+    :param checker PresenceChecker: If given, the checker of the files,
+                                    sharing the listings of the directories
     :return: True if it is well installed
     :rtype: boolean
     """
+    exists = os.path.exists if checker is None else checker.exists
     source_dir = product_info.source_dir
-    if not os.path.exists(source_dir):
+    if not exists(source_dir):
         return False
     if ("present_files" in product_info and 
         "source" in product_info.present_files):
         for file_relative_path in product_info.present_files.source:
             file_path = os.path.join(source_dir, file_relative_path)
-            if not os.path.exists(file_path):
+            if not exists(file_path):
                 return False
     return True
 
+class PresenceChecker(object):
+    """\
+    Checks of the presence of the files of the products (sources and
+    installations): each directory is listed once, the presence of its
+    files is given by its listing, as the presence of all the installation
+    directories of an application by the listing of their common directory.
+    The listings are kept until invalidate is called for the paths changed
+    (by a compilation for example): a checker is used for one pass on the
+    products of a command.
+    """
+    def __init__(self):
+        # {directory: (normalized names of its files, names of the symbolic 
+        #              links among them), None if not a directory}
+        self.listings = {}
+        self.stats = {'lookups': 0, 'listings': 0}
+
+    def listdir(self, directory):
+        """\
+        :param directory str: The path of a directory
+        :return: the names of the files of the directory, normalized by 
+                 os.path.normcase, None if it is not a directory
+        :rtype: frozenset
+        """
+        listing = self._get_listing(directory)
+        return None if listing is None else listing[0]
+
+    def _get_listing(self, directory):
+        """the listing of directory, and the symbolic links in it"""
+        directory = os.path.normpath(os.path.abspath(directory))
+        if directory in self.listings:
+            return self.listings[directory]
+        self.stats['listings'] += 1
+        listing = None
+        try:
+            if hasattr(os, "scandir"):
+                # the types of the files are given by the listing
+                names, links = [], []
+                for entry in os.scandir(directory):
+                    names.append(os.path.normcase(entry.name))
+                    if entry.is_symlink():
+                        links.append(names[-1])
+                listing = (frozenset(names), frozenset(links))
+            else:
+                # python 2: no symbolic link is known
+                names = [os.path.normcase(n) for n in os.listdir(directory)]
+                listing = (frozenset(names), frozenset())
+        except OSError:
+            pass
+        self.listings[directory] = listing
+        return listing
+
+    def exists(self, path):
+        """\
+        As os.path.exists, with the listing of the directory of path
+
+        :param path str: The path
+        :rtype: boolean
+        """
+        self.stats['lookups'] += 1
+        if os.pardir in path.replace("\\", "/").split("/"):
+            # .. after a symbolic link is not normalized
+            return os.path.exists(path)
+        directory, name = os.path.split(os.path.normpath(os.path.abspath(path)))
+        if not name:
+            return os.path.exists(path) # the root
+        listing = self._get_listing(directory)
+        name = os.path.normcase(name)
+        if listing is None or name not in listing[0]:
+            return False
+        if name in listing[1]:
+            # the target of a symbolic link may not exist
+            return os.path.exists(path)
+        return True
+
+    def invalidate(self, path):
+        """\
+        Forget the listings of path, of its directory and of the directories
+        under path, after their change
+
+        :param path str: The path of the file or directory changed
+        """
+        path = os.path.normpath(os.path.abspath(path))
+        self.listings.pop(os.path.dirname(path), None)
+        for directory in list(self.listings):
+            if directory == path or directory.startswith(path + os.sep):
+                del self.listings[directory]
+
 def product_is_salome(product_info):
     """Know if a product is a SALOME module
     
@@ -106,6 +106,13 @@ unable to open the stream, an IOError exception should be thrown.
 
 The default value of this variable is L{defaultStreamOpener}. For an example
 of how it's used, see test_config.py (search for streamOpener).
+
+@var parseCache: The L{ParseCache} used by L{ConfigReader.load} to avoid
+parsing again files which did not change, or None (the default) to always
+parse the files.
+
+@var resolutionStats: The numbers of hits and misses of the caches of the
+resolved L{Reference} and L{Expression} values of the containers.
 """
 
 __author__  = "Vinay Sajip <vinay_sajip@red-dove.com>"
@@ -113,9 +120,19 @@ __status__  = "alpha"
 __version__ = "0.3.7.1" #modified for salomeTools
 __date__    = "05 October 2007"
 
+import bisect
 import codecs
+import collections
+import gc
+import hashlib
 import os
+import re
 import sys
+import time
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
 WORD = 'a'
 NUMBER = '9'
@@ -146,6 +163,11 @@ NONE = 'None'
 
 WORDCHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_"
 
+# runs of characters scanned at once by ConfigReader.getToken
+_WHITESPACE_RE = re.compile(r'[ \t\r\n]+')
+_WORD_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_NUMBER_RE = re.compile(r'[0-9]+(?:\.[0-9]*)?')
+
 if sys.platform == 'win32':
     NEWLINE = '\r\n'
 elif os.name == 'mac':
@@ -174,6 +196,7 @@ class ConfigInputStream(object):
         @type stream: A stream (file-like object).
         """
         encoding = None
+        self.name = getattr(stream, 'name', '?')
         signature = stream.read(4)
         used = -1
         if has_utf32:
@@ -201,8 +224,8 @@ class ConfigInputStream(object):
         self.stream = stream
         self.encoding = encoding
 
-    def read(self, size):
-        if (size == 0) or (self.encoding is None):
+    def read(self, size=-1):
+        if (size <= 0) or (self.encoding is None):
             rv = self.stream.read(size)
         else:
             rv = u''
@@ -294,6 +317,127 @@ def defaultStreamOpener(name):
 
 streamOpener = None
 
+parseCache = None
+
+snapshotCache = None
+
+# the mappings keep the insertion order of their keys in their dict
+if sys.version_info >= (3, 7):
+    _OrderedDict = dict
+else:
+    _OrderedDict = collections.OrderedDict
+
+# incremented on each change of a mapping, a sequence or a namespace,
+# it invalidates the caches of resolved values of all the containers
+_generation = 0
+
+resolutionStats = {'hits': 0, 'misses': 0}
+
+# the stamp given to the changed containers and to their parents (see
+# getChangeStamp), incremented when it is read, and when the parents of
+# containers change: a container has the current stamp only if its
+# parents have it too
+_changeStamp = 1
+
+def invalidateResolutions(container=None):
+    """
+    Invalidate the cached values of the references and expressions of
+    all the containers. Called on each change of the configurations.
+
+    @param container: The changed container, None if the change does not
+    change the values of a container (as the load of a deferred value, or
+    a change of parent): it and its parents get the current change stamp
+    (see L{getChangeStamp}).
+    @type container: L{Container}
+    """
+    global _generation, _changeStamp
+    _generation += 1
+    if container is None:
+        _changeStamp += 1
+        return
+    get = object.__getattribute__
+    stamp = _changeStamp
+    while container is not None:
+        changed = get(container, 'changed')
+        if changed is None or changed == stamp:
+            # a copy (see L{copyContainer}), its parent is not changed;
+            # or the parents have the stamp already
+            break
+        object.__setattr__(container, 'changed', stamp)
+        container = get(container, 'parent')
+
+def getGeneration():
+    """
+    Return a number changed by each change of the configurations
+    (see L{invalidateResolutions}), to check that a value computed from
+    a configuration is still valid.
+
+    @rtype: int
+    """
+    return _generation
+
+def getChangeStamp(container):
+    """
+    Return the stamp of the last change of a container or of the
+    containers below it, changed by their next changes: to check that a
+    value computed from a part of a configuration is still valid, whatever
+    the changes of the other parts.
+
+    @param container: The container.
+    @type container: L{Container}
+    @rtype: int
+    """
+    global _changeStamp
+    rv = object.__getattribute__(container, 'changed')
+    if rv == _changeStamp:
+        _changeStamp += 1
+    return rv
+
+def copyContainer(container):
+    """
+    Copy a mapping or a sequence, and the containers below it. The copy
+    has the parent of the original: its references and expressions are
+    resolved as the ones of the original. The changes of the copy do not
+    change the stamp of its parent (see L{getChangeStamp}).
+
+    @param container: The container to copy.
+    @type container: L{Container}
+    @return: The copy.
+    @rtype: L{Container}
+    """
+    rv = _copyContainer(container, object.__getattribute__(container, 'parent'))
+    object.__setattr__(rv, 'changed', None)
+    return rv
+
+def _copyContainer(container, parent, get=object.__getattribute__,
+                   set=object.__setattr__):
+    cls = type(container)
+    rv = cls.__new__(cls)
+    set(rv, 'parent', parent)
+    try:
+        set(rv, 'path', get(container, 'path'))
+    except AttributeError:
+        pass
+    set(rv, 'resolved', None)
+    set(rv, 'changed', 0)
+    comments = get(container, 'comments')
+    set(rv, 'comments', dict(comments) if comments else comments)
+    data = get(container, 'data')
+    if cls is Sequence:
+        copied = [_copyContainer(value, rv) if isinstance(value, Container) else value
+                  for value in data]
+    else:
+        copied = _OrderedDict(data)
+        for key, value in data.items():
+            if isinstance(value, Container):
+                copied[key] = _copyContainer(value, rv)
+    set(rv, 'data', copied)
+    if isinstance(container, Config):
+        set(rv, 'reader', ConfigReader(rv))
+        set(rv, 'namespaces', list(get(container, 'namespaces')))
+        set(rv, 'pathIndex', None)
+    return rv
+
 __resolveOverwrite__ = True
 
 class ConfigError(Exception):
@@ -366,6 +510,145 @@ def makePath(prefix, suffix):
         rv = prefix + '.' + suffix
     return rv
 
+# the steps of a path: .identifier, [number] or ['string']
+_PATH_STEP_RE = re.compile(r"""\s*(?:\.\s*([A-Za-z_][A-Za-z0-9_]*)|\[\s*(-?[0-9]+|'[^'\\]*'|"[^"\\]*")\s*\])""")
+_PATH_FIRST_RE = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)')
+
+# compiled paths, conditions and rules, by source, shared by all the files
+_compiledPaths = {}
+_compiledConditions = {}
+_compiledRules = {}
+
+def compilePath(path):
+    """\
+    Compile a path of a configuration into the list of its steps.
+
+    Examples:
+    compilePath('a.b') -> [(False, 'a'), (False, 'b')]
+    compilePath("a['b-c'][0]") -> [(False, 'a'), (True, 'b-c'), (True, 0)]
+    compilePath('a + b') -> None
+
+    @param path: The path, relative to a container.
+    @type path: str
+    @return: The list of the (isIndex, key) steps of the path, or None if
+    the path is not made of identifiers, numbers or strings indexes.
+    @rtype: list
+    """
+    if path in _compiledPaths:
+        return _compiledPaths[path]
+    rv = None
+    match = _PATH_FIRST_RE.match(path)
+    if match:
+        rv = [(False, match.group(1))]
+        pos = match.end()
+        while pos < len(path):
+            match = _PATH_STEP_RE.match(path, pos)
+            if not match:
+                if path[pos:].strip():
+                    rv = None
+                break
+            if match.group(1):
+                rv.append((False, match.group(1)))
+            else:
+                rv.append((True, eval(match.group(2))))
+            pos = match.end()
+    _compiledPaths[path] = rv
+    return rv
+
+def setByPath(container, steps, value):
+    """\
+    Set a value in a configuration, as the statement
+    'container.<path> = value' does.
+
+    @param container: The container of the path.
+    @type container: L{Container}
+    @param steps: The path, compiled by L{compilePath}.
+    @type steps: list
+    @param value: The value to set.
+    @type value: any
+    """
+    for isIndex, key in steps[:-1]:
+        if isIndex:
+            container = container[key]
+        else:
+            container = getattr(container, key)
+    isIndex, key = steps[-1]
+    if isIndex:
+        container[key] = value
+    else:
+        setattr(container, key, value)
+
+def evalCondition(condition, container):
+    """\
+    Evaluate a condition (a python expression) in the context of a container,
+    the names of the expression being the keys of the container.
+    The code of the conditions is compiled once.
+
+    @param condition: The condition, as "VARS.dist in ['CO7']".
+    @type condition: str
+    @param container: The container.
+    @type container: L{Mapping}
+    @return: The value of the condition.
+    @rtype: any
+    """
+    code = _compiledConditions.get(condition)
+    if code is None:
+        code = compile(condition, '<__condition__>', 'eval')
+        _compiledConditions[condition] = code
+    return eval(code, globals(), container)
+
+def _overwriteValue(value):
+    """\
+    Return the value set by an overwrite instruction: the value evaluated
+    from its repr (or its str) for the values which are not scalars.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    try:
+        if isinstance(value, unicode):
+            return value
+    except NameError: # Python 3 compatibility
+        pass
+    try:
+        return eval(repr(value))
+    except Exception:
+        return eval(str(value))
+
+def applyOverwriteRule(config, rule, namespace=None):
+    """\
+    Apply an overwrite rule of the command line, as "LOCAL.workdir='/tmp'",
+    to a configuration. It is the same as the statement 'cfg.<rule>'
+    executed with the names of namespace and cfg, the configuration.
+    The rules are compiled once in a path and the code of the value,
+    the other rules (as "VARS.dist += '.9'") are executed.
+
+    @param config: The configuration.
+    @type config: L{Config}
+    @param rule: The rule: a path, '=', and a python expression.
+    @type rule: str
+    @param namespace: The global names of the rule, those of this module
+    if None (the globals of the caller, as the previous exec('cfg.' + rule)).
+    @type namespace: dict
+    """
+    if namespace is None:
+        namespace = globals()
+    compiled = _compiledRules.get(rule)
+    if compiled is None:
+        compiled = False
+        path, sep, expression = rule.partition('=')
+        steps = compilePath(path)
+        if sep and steps and not expression.startswith('='):
+            try:
+                compiled = (steps, compile(expression.strip(), '<overwrite>', 'eval'))
+            except SyntaxError:
+                pass
+        _compiledRules[rule] = compiled
+    if compiled:
+        steps, code = compiled
+        setByPath(config, steps, eval(code, namespace, {'cfg': config}))
+    else:
+        exec('cfg.' + rule, namespace, {'cfg': config})
+
 
 class Container(object):
     """
@@ -378,6 +661,10 @@ class Container(object):
 
         a.list.of[1].or['more'].elements
     """
+    # as there are many containers in a configuration, the attributes are
+    # slots, and the optional ones are None until they are needed
+    __slots__ = ('parent', 'path', 'resolved', 'changed')
+
     def __init__(self, parent):
         """
         Initialize an instance.
@@ -386,6 +673,46 @@ class Container(object):
         @type parent: A L{Container} instance.
         """
         object.__setattr__(self, 'parent', parent)
+        # None or [generation, {item: value}], see evaluate
+        object.__setattr__(self, 'resolved', None)
+        # the stamp of the last change, see getChangeStamp
+        object.__setattr__(self, 'changed', 0)
+
+    def __getstate__(self):
+        """
+        Get the state of this mapping or sequence, to pickle it.
+
+        The pickled configurations (see L{SnapshotCache}) keep the
+        parents and the shared containers of the original tree. The
+        cached resolutions are not kept.
+
+        @return: The parent, the path (None if not set), the data and
+        the comments.
+        @rtype: tuple
+        """
+        get = object.__getattribute__
+        try:
+            path = get(self, 'path')
+        except AttributeError:
+            path = None
+        return (get(self, 'parent'), path, get(self, 'data'), get(self, 'comments'))
+
+    def __setstate__(self, state):
+        """
+        Restore the state of this mapping or sequence, when it is unpickled.
+
+        @param state: The state returned by L{__getstate__}.
+        @type state: tuple
+        """
+        parent, path, data, comments = state
+        set = object.__setattr__
+        set(self, 'parent', parent)
+        if path is not None:
+            set(self, 'path', path)
+        set(self, 'data', data)
+        set(self, 'comments', comments)
+        set(self, 'resolved', None)
+        set(self, 'changed', 0)
 
     def setPath(self, path):
         """
@@ -404,17 +731,32 @@ class Container(object):
         and L{Expression} instances are evaluated using
         L{Expression.evaluate}.
 
+        The evaluated values are cached in the container until the next
+        change of a configuration (see L{invalidateResolutions}).
+
         @param item: The item to be evaluated.
         @type item: any
         @return: If the item is an instance of L{Reference} or L{Expression},
         the evaluated value is returned, otherwise the item is returned
         unchanged.
         """
+        if not isinstance(item, (Reference, Expression)):
+            return item
+        resolved = object.__getattribute__(self, 'resolved')
+        if (resolved is None) or (resolved[0] != _generation):
+            resolved = [_generation, {}]
+            object.__setattr__(self, 'resolved', resolved)
+        cache = resolved[1]
+        if item in cache:
+            resolutionStats['hits'] += 1
+            return cache[item]
+        resolutionStats['misses'] += 1
         if isinstance(item, Reference):
-            item = item.resolve(self)
-        elif isinstance(item, Expression):
-            item = item.evaluate(self)
-        return item
+            rv = item.resolve(self)
+        else:
+            rv = item.evaluate(self)
+        cache[item] = rv
+        return rv
 
     def writeToStream(self, stream, indent, container, evaluated=False):
         """
@@ -433,24 +775,79 @@ class Container(object):
         raise NotImplementedError
 
     def writeValue(self, value, stream, indent, evaluated=False):
-        if isinstance(self, Mapping):
-            indstr = ' '
-        else:
-            indstr = indent * '  '
-        if isinstance(value, Reference) or isinstance(value, Expression):
-            if not evaluated:
-                stream.write('%s%r%s' % (indstr, value, NEWLINE))
-            else:
-                stream.write('%s%r%s' % (indstr, self.evaluate(value), NEWLINE))
-        else:
-            if isinstance(value, str): # and not isWord(value):
-                value = repr(value)
-            stream.write('%s%s%s' % (indstr, value, NEWLINE))
+        parts = []
+        ConfigWriter(evaluated).writeValue(parts, value, self, indent)
+        ConfigWriter.flush(stream, parts)
+
+class Deferred(object):
+    """
+    This class is the base class of the values of a mapping which are
+    loaded on their first access, as the configuration of a file which
+    is only read if it is used.
+
+    A deferred value is added with L{Mapping.addMapping}, as any value;
+    the first access to its key with L{Mapping.__getitem__} (or its
+    attribute, or a membership test) calls L{load}, and the loaded value
+    replaces it in the mapping. The other operations on the mapping,
+    as its keys, do not load it, and it is written by L{ConfigWriter}
+    as the include of its file, if any.
+    """
+    __slots__ = ()
+
+    def load(self):
+        """
+        Load the value. Should be redefined in subclasses.
+
+        @return: The value, or None if it cannot be loaded:
+        its key is then removed from the mapping.
+        @raise NotImplementedError: If a subclass does not override this
+        """
+        raise NotImplementedError
+
+    def prefetch(self):
+        """
+        Do the work of L{load} which can run in a worker thread, as reading
+        and parsing a file, and keep its result for L{load}. Called by
+        L{prefetchDeferreds}; does nothing by default.
+        """
+        pass
+
+def _prefetch(deferred):
+    deferred.prefetch()
+
+def prefetchDeferreds(deferreds, workers=1):
+    """
+    Call the L{Deferred.prefetch} method of deferred values, in a pool of
+    threads if more than one worker is asked. Their L{Deferred.load} method
+    is then to be called in the calling thread, in a deterministic order.
+
+    @param deferreds: The deferred values.
+    @type deferreds: list of L{Deferred}
+    @param workers: The maximum number of threads.
+    @type workers: int
+    """
+    workers = min(workers, len(deferreds))
+    if workers <= 1:
+        for deferred in deferreds:
+            deferred.prefetch()
+        return
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(workers)
+    try:
+        pool.map(_prefetch, deferreds, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
 
 class Mapping(Container):
     """
     This internal class implements key-value mappings in configurations.
+
+    The keys are kept in their insertion order by the data dict, and
+    the comments dict, only created for the first comment, has only
+    the keys having a comment.
     """
+    __slots__ = ('data', 'comments')
 
     def __init__(self, parent=None):
         """
@@ -461,9 +858,8 @@ class Mapping(Container):
         """
         Container.__init__(self, parent)
         object.__setattr__(self, 'path', '')
-        object.__setattr__(self, 'data', {})
-        object.__setattr__(self, 'order', [])   # to preserve ordering
-        object.__setattr__(self, 'comments', {})
+        object.__setattr__(self, 'data', _OrderedDict())
+        object.__setattr__(self, 'comments', None)
 
     def __delitem__(self, key):
         """
@@ -472,20 +868,73 @@ class Mapping(Container):
         data = object.__getattribute__(self, 'data')
         if key not in data:
             raise AttributeError(key)
-        order = object.__getattribute__(self, 'order')
         comments = object.__getattribute__(self, 'comments')
         del data[key]
-        order.remove(key)
-        del comments[key]
+        if comments:
+            comments.pop(key, None)
+        invalidateResolutions(self)
 
     def __getitem__(self, key):
         data = object.__getattribute__(self, 'data')
         if key not in data:
             raise AttributeError("Unknown pyconf key: '%s'" % key)
         rv = data[key]
+        if isinstance(rv, Deferred):
+            rv = self.loadDeferred(key)
         return self.evaluate(rv)
 
     __getattr__ = __getitem__
+
+    def loadDeferred(self, key):
+        """
+        Load a deferred value (see L{Deferred}), which replaces it.
+
+        @param key: The key of the deferred value.
+        @type key: str
+        @return: The loaded value.
+        @raise AttributeError: If the value cannot be loaded, the key is
+        removed.
+        """
+        data = object.__getattribute__(self, 'data')
+        value = data[key].load()
+        if value is None:
+            self.__delitem__(key)
+            raise AttributeError("Unknown pyconf key: '%s'" % key)
+        data[key] = value
+        if isinstance(value, Container):
+            object.__setattr__(value, 'parent', self)
+        invalidateResolutions()
+        return value
+
+    def loadDeferreds(self, keys=None, workers=1):
+        """
+        Load the deferred values of some keys (see L{Deferred}), their
+        prefetch being done by several threads (see L{prefetchDeferreds}).
+        The values are loaded in the order of the keys; the keys whose
+        value cannot be loaded are removed.
+
+        @param keys: The keys, all the keys of the mapping if None.
+        The keys which are not in the mapping are ignored.
+        @type keys: list of str
+        @param workers: The maximum number of threads.
+        @type workers: int
+        @return: The keys whose value was loaded.
+        @rtype: list of str
+        """
+        data = object.__getattribute__(self, 'data')
+        if keys is None:
+            keys = list(data.keys())
+        keys = [key for key in keys
+                if isinstance(data.get(key), Deferred)]
+        prefetchDeferreds([data[key] for key in keys], workers)
+        loaded = []
+        for key in keys:
+            try:
+                self.loadDeferred(key)
+            except AttributeError:
+                continue
+            loaded.append(key)
+        return loaded
     
     '''
     def __getattribute__(self, name):
@@ -512,8 +961,13 @@ class Mapping(Container):
         raise StopIteration
 
     def __contains__(self, item):
-        order = object.__getattribute__(self, 'order')
-        return item in order
+        data = object.__getattribute__(self, 'data')
+        if isinstance(data.get(item), Deferred):
+            try:
+                self.loadDeferred(item)
+            except AttributeError:
+                return False
+        return item in data
 
     def addMapping(self, key, value, comment, setting=False):
         """
@@ -531,15 +985,19 @@ class Mapping(Container):
         again and setting is False.
         """
         data = object.__getattribute__(self, 'data')
-        order = object.__getattribute__(self, 'order')
         comments = object.__getattribute__(self, 'comments')
 
-        data[key] = value
-        if key not in order:
-            order.append(key)
-        elif not setting:
+        if (key in data) and not setting:
             raise ConfigFormatError("repeated key: %s" % key)
-        comments[key] = comment
+        data[key] = value
+        if comment:
+            if comments is None:
+                comments = {}
+                object.__setattr__(self, 'comments', comments)
+            comments[key] = comment
+        elif comments:
+            comments.pop(key, None)
+        invalidateResolutions(self)
 
     def __setattr__(self, name, value):
         self.addMapping(name, value, None, True)
@@ -550,7 +1008,7 @@ class Mapping(Container):
         """
         Return the keys in a similar way to a dictionary.
         """
-        return object.__getattribute__(self, 'order')
+        return list(object.__getattribute__(self, 'data'))
 
     def get(self, key, default=None):
         """
@@ -561,20 +1019,21 @@ class Mapping(Container):
         return default
 
     def __str__(self):
-        return str(object.__getattribute__(self, 'data'))
+        return self.__repr__()
 
     def __repr__(self):
-        return repr(object.__getattribute__(self, 'data'))
+        data = object.__getattribute__(self, 'data')
+        return '{%s}' % ', '.join(['%r: %r' % item for item in data.items()])
 
     def __len__(self):
-        return len(object.__getattribute__(self, 'order'))
+        return len(object.__getattribute__(self, 'data'))
 
     def __iter__(self):
         return self.iterkeys()
 
     def iterkeys(self):
-        order = object.__getattribute__(self, 'order')
-        return order.__iter__()
+        # on a copy of the keys, the mapping can be changed in the loop
+        return self.keys().__iter__()
 
     def writeToStream(self, stream, indent, container, evaluated=False):
         """
@@ -589,50 +1048,27 @@ class Mapping(Container):
         @param container: The container of this instance
         @type container: L{Container}
         """
-        indstr = indent * '  '
-        if len(self) == 0:
-            stream.write(' { }%s' % NEWLINE)
-        else:
-            if isinstance(container, Mapping):
-                stream.write(NEWLINE)
-            stream.write('%s{%s' % (indstr, NEWLINE))
-            self.__save__(stream, indent + 1, evaluated=evaluated)
-            stream.write('%s}%s' % (indstr, NEWLINE))
+        parts = []
+        ConfigWriter(evaluated).writeContainer(parts, self, indent, container)
+        ConfigWriter.flush(stream, parts)
 
     def __save__(self, stream, indent=0, evaluated=False):
         """
         Save this configuration to the specified stream.
+        The text is built by a L{ConfigWriter}, and written at once.
         @param stream: A stream to which the configuration is written.
         @type stream: A write-only stream (file-like object).
         @param indent: The indentation level for the output.
         @type indent: int
         """
-        indstr = indent * '  '
-        order = object.__getattribute__(self, 'order')
-        data = object.__getattribute__(self, 'data')
-        maxlen = 0 # max(map(lambda x: len(x), order))
-        for key in order:
-            comment = self.comments[key]
-            if isWord(key):
-                skey = key
-            else:
-                skey = repr(key)
-            if comment:
-                stream.write('%s#%s' % (indstr, comment))
-            if skey.startswith("u'"):
-                skey = skey[1:]
-            stream.write('%s%-*s :' % (indstr, maxlen, skey))
-            value = data[key]
-            if isinstance(value, Container):
-                value.writeToStream(stream, indent, self, evaluated=evaluated)
-            else:
-                self.writeValue(value, stream, indent, evaluated=evaluated)
+        ConfigWriter(evaluated).write(stream, self, indent)
 
 class Config(Mapping):
     """
     This class represents a configuration, and is the only one which clients
     need to interface to, under normal circumstances.
     """
+    __slots__ = ('reader', 'namespaces', 'pathIndex')
 
     class Namespace(object):
         """
@@ -665,6 +1101,8 @@ class Config(Mapping):
         Mapping.__init__(self, parent)
         object.__setattr__(self, 'reader', ConfigReader(self))
         object.__setattr__(self, 'namespaces', [Config.Namespace()])
+        # None or [generation, {steps: value}], see getByPath
+        object.__setattr__(self, 'pathIndex', None)
         if streamOrFile is not None:
             if isinstance(streamOrFile, str) or isinstance(streamOrFile, bytes):
                 global streamOpener
@@ -681,6 +1119,30 @@ class Config(Mapping):
                 else:
                     self[key].PWD = pwd
 
+    def __getstate__(self):
+        """
+        Get the state of this instance, to pickle it.
+
+        The reader and the path index are not kept, nor the default
+        namespace, which is recreated.
+
+        @raise ConfigError: If a namespace was added with L{addNamespace}.
+        """
+        for ns in object.__getattribute__(self, 'namespaces'):
+            if not isinstance(ns, Config.Namespace) or \
+               sorted(vars(ns)) != ['os', 'sys']:
+                raise ConfigError("configurations with namespaces cannot be pickled")
+        return Mapping.__getstate__(self)
+
+    def __setstate__(self, state):
+        """
+        Restore the state of this instance, when it is unpickled.
+        """
+        Mapping.__setstate__(self, state)
+        object.__setattr__(self, 'reader', ConfigReader(self))
+        object.__setattr__(self, 'namespaces', [Config.Namespace()])
+        object.__setattr__(self, 'pathIndex', None)
+
     def load(self, stream):
         """
         Load the configuration from the specified stream. Multiple streams can
@@ -712,6 +1174,7 @@ class Config(Mapping):
             namespaces.append(ns)
         else:
             setattr(namespaces[0], name, ns)
+        invalidateResolutions(self)
 
     def removeNamespace(self, ns, name=None):
         """
@@ -726,6 +1189,7 @@ class Config(Mapping):
             namespaces.remove(ns)
         else:
             delattr(namespaces[0], name)
+        invalidateResolutions(self)
 
     def __save__(self, stream, indent=0, no_close=False, evaluated=False):
         """
@@ -744,22 +1208,62 @@ class Config(Mapping):
     def getByPath(self, path):
         """
         Obtain a value in the configuration via its path.
+
+        The values found for the path and its prefixes are indexed until
+        the next change of a configuration (see L{invalidateResolutions}):
+        the queries of a path, or of the children of a path, do not walk
+        the tree again.
+
         @param path: The path of the required value
         @type path: str
         @return the value at the specified path.
         @rtype: any
         @raise ConfigError: If the path is invalid
         """
-        s = 'self.' + path
+        steps = compilePath(path)
+        if steps is None:
+            s = 'self.' + path
+            try:
+                return eval(s)
+            except Exception as e:
+                raise ConfigError(str(e))
+        index = object.__getattribute__(self, 'pathIndex')
+        if (index is None) or (index[0] != _generation):
+            index = [_generation, {}]
+            object.__setattr__(self, 'pathIndex', index)
+        paths = index[1]
+        key = tuple(steps)
+        if key in paths:
+            return paths[key]
+        # start from the longest indexed prefix of the path
+        start = len(steps) - 1
+        while (start > 0) and (tuple(steps[:start]) not in paths):
+            start -= 1
+        if start > 0:
+            rv = paths[tuple(steps[:start])]
+        else:
+            rv = self
         try:
-            return eval(s)
+            for i in range(start, len(steps)):
+                isIndex, name = steps[i]
+                if isIndex:
+                    rv = rv[name]
+                else:
+                    rv = getattr(rv, name)
+                paths[tuple(steps[:i + 1])] = rv
         except Exception as e:
             raise ConfigError(str(e))
+        return rv
 
 class Sequence(Container):
     """
     This internal class implements a value which is a sequence of other values.
+
+    The comments dict, only created for the first comment, has only the
+    indexes of the items having a comment.
     """
+    __slots__ = ('data', 'comments')
+
     class SeqIter(object):
         """
         This internal class implements an iterator for a L{Sequence} instance.
@@ -796,7 +1300,7 @@ class Sequence(Container):
         """
         Container.__init__(self, parent)
         object.__setattr__(self, 'data', [])
-        object.__setattr__(self, 'comments', [])
+        object.__setattr__(self, 'comments', None)
 
     def append(self, item, comment):
         """
@@ -808,9 +1312,14 @@ class Sequence(Container):
         @type comment: str
         """
         data = object.__getattribute__(self, 'data')
-        comments = object.__getattribute__(self, 'comments')
+        if comment:
+            comments = object.__getattribute__(self, 'comments')
+            if comments is None:
+                comments = {}
+                object.__setattr__(self, 'comments', comments)
+            comments[len(data)] = comment
         data.append(item)
-        comments.append(comment)
+        invalidateResolutions(self)
 
     def __getitem__(self, index):
         data = object.__getattribute__(self, 'data')
@@ -853,15 +1362,9 @@ class Sequence(Container):
         @param container: The container of this instance
         @type container: L{Container}
         """
-        indstr = indent * '  '
-        if len(self) == 0:
-            stream.write(' [ ]%s' % NEWLINE)
-        else:
-            if isinstance(container, Mapping):
-                stream.write(NEWLINE)
-            stream.write('%s[%s' % (indstr, NEWLINE))
-            self.__save__(stream, indent + 1, evaluated=evaluated)
-            stream.write('%s]%s' % (indstr, NEWLINE))
+        parts = []
+        ConfigWriter(evaluated).writeContainer(parts, self, indent, container)
+        ConfigWriter.flush(stream, parts)
 
     def __save__(self, stream, indent, evaluated=False):
         """
@@ -873,23 +1376,213 @@ class Sequence(Container):
         """
         if indent == 0:
             raise ConfigError("sequence cannot be saved as a top-level item")
-        data = object.__getattribute__(self, 'data')
-        comments = object.__getattribute__(self, 'comments')
+        ConfigWriter(evaluated).write(stream, self, indent)
+
+class ConfigWriter(object):
+    """
+    This class writes configurations in the pyconf format.
+
+    The text of a whole configuration is built in one pass in a list of
+    strings, and written to the stream with a single call of its write
+    method, instead of a few calls for each item. The keys, which are the
+    same in a lot of mappings, are formatted once per writer.
+    """
+
+    def __init__(self, evaluated=False):
+        """
+        Initialize an instance.
+
+        @param evaluated: If true, the references and expressions are
+        written as their values, else as their text.
+        @type evaluated: bool
+        """
+        self.evaluated = evaluated
+        self.keys = {}
+
+    def dumps(self, container, indent=0):
+        """
+        Get the text of a container, as written by L{write}.
+
+        @param container: The container to write.
+        @type container: L{Mapping} or L{Sequence}
+        @param indent: The indentation level for the output.
+        @type indent: int
+        @return: The text of the container.
+        @rtype: str
+        """
+        parts = []
+        self.writeItems(parts, container, indent)
+        return ''.join(parts)
+
+    def write(self, stream, container, indent=0):
+        """
+        Write the items of a container to a stream.
+
+        @param stream: A stream to which the configuration is written.
+        @type stream: A write-only stream (file-like object).
+        @param container: The container to write.
+        @type container: L{Mapping} or L{Sequence}
+        @param indent: The indentation level for the output.
+        @type indent: int
+        """
+        parts = []
+        self.writeItems(parts, container, indent)
+        ConfigWriter.flush(stream, parts)
+
+    @staticmethod
+    def flush(stream, parts):
+        """
+        Write a list of strings to a stream, in one call if possible.
+
+        With Python 2, byte strings with non ascii characters cannot be
+        joined to unicode strings: they are written one by one, as the
+        former writer did.
+
+        @param stream: A stream to which the strings are written.
+        @type stream: A write-only stream (file-like object).
+        @param parts: The strings to write.
+        @type parts: list
+        """
+        try:
+            text = ''.join(parts)
+        except UnicodeError:
+            for part in parts:
+                stream.write(part)
+        else:
+            stream.write(text)
+
+    def formatKey(self, key):
+        """
+        Format a key of a mapping.
+
+        @param key: The key.
+        @type key: str
+        @return: The key, quoted if it is not a word.
+        @rtype: str
+        """
+        skey = self.keys.get(key)
+        if skey is None:
+            if isWord(key):
+                skey = key
+            else:
+                skey = repr(key)
+            if skey.startswith("u'"):
+                skey = skey[1:]
+            self.keys[key] = skey
+        return skey
+
+    def writeItems(self, parts, container, indent):
+        """
+        Append the text of the items of a container to a list of strings.
+
+        This is the loop on all the items of a configuration: the
+        scalar values are formatted inline, with the key for a mapping.
+
+        @param parts: The list of strings.
+        @type parts: list
+        @param container: The container.
+        @type container: L{Mapping} or L{Sequence}
+        @param indent: The indentation level of the items.
+        @type indent: int
+        """
+        append = parts.append
         indstr = indent * '  '
-        for i in range(0, len(data)):
-            value = data[i]
-            comment = comments[i]
-            if comment:
-                stream.write('%s#%s' % (indstr, comment))
-            if isinstance(value, Container):
-                value.writeToStream(stream, indent, self, evaluated=evaluated)
+        data = object.__getattribute__(container, 'data')
+        comments = object.__getattribute__(container, 'comments')
+        if isinstance(container, Mapping):
+            items = data.items()
+            keys = self.keys
+            formatKey = self.formatKey
+        else:
+            items = enumerate(data)
+            keys = None
+        for key, value in items:
+            if comments:
+                comment = comments.get(key)
+                if comment:
+                    append('%s#%s' % (indstr, comment))
+            if keys is None:
+                prefix = indstr
+            else:
+                skey = keys.get(key)
+                if skey is None:
+                    skey = formatKey(key)
+                prefix = '%s%s : ' % (indstr, skey)
+            if isinstance(value, str):
+                append('%s%r%s' % (prefix, value, NEWLINE))
+            elif isinstance(value, Container):
+                if keys is not None:
+                    append(prefix[:-1])
+                self.writeContainer(parts, value, indent, container)
+            elif isinstance(value, (Reference, Expression)):
+                if self.evaluated:
+                    value = container.evaluate(value)
+                append('%s%r%s' % (prefix, value, NEWLINE))
             else:
-                self.writeValue(value, stream, indent, evaluated=evaluated)
+                append('%s%s%s' % (prefix, value, NEWLINE))
+
+    def writeContainer(self, parts, value, indent, container):
+        """
+        Append the text of a container value to a list of strings.
+
+        @param parts: The list of strings.
+        @type parts: list
+        @param value: The container value.
+        @type value: L{Mapping} or L{Sequence}
+        @param indent: The indentation level of the value.
+        @type indent: int
+        @param container: The container of the value.
+        @type container: L{Container}
+        """
+        if isinstance(value, Mapping):
+            start, end = '{', '}'
+        else:
+            start, end = '[', ']'
+        if not object.__getattribute__(value, 'data'):
+            parts.append(' %s %s%s' % (start, end, NEWLINE))
+            return
+        indstr = indent * '  '
+        if isinstance(container, Mapping):
+            parts.append(NEWLINE)
+        parts.append('%s%s%s' % (indstr, start, NEWLINE))
+        self.writeItems(parts, value, indent + 1)
+        parts.append('%s%s%s' % (indstr, end, NEWLINE))
+
+    def writeValue(self, parts, value, container, indent):
+        """
+        Append the text of a scalar value to a list of strings.
+
+        The references and expressions are evaluated with
+        L{Container.evaluate}, so each one is resolved once.
+
+        @param parts: The list of strings.
+        @type parts: list
+        @param value: The value.
+        @type value: any
+        @param container: The container of the value.
+        @type container: L{Container}
+        @param indent: The indentation level of the value.
+        @type indent: int
+        """
+        if isinstance(container, Mapping):
+            indstr = ' '
+        else:
+            indstr = indent * '  '
+        if isinstance(value, (Reference, Expression)):
+            if self.evaluated:
+                value = container.evaluate(value)
+            parts.append('%s%r%s' % (indstr, value, NEWLINE))
+        else:
+            if isinstance(value, str): # and not isWord(value):
+                value = repr(value)
+            parts.append('%s%s%s' % (indstr, value, NEWLINE))
 
 class Reference(object):
     """
     This internal class implements a value which is a reference to another value.
     """
+    __slots__ = ('config', 'type', 'elements')
+
     def __init__(self, config, type, ident):
         """
         Initialize an instance.
@@ -990,6 +1683,8 @@ class Expression(object):
     """
     This internal class implements a value which is obtained by evaluating an expression.
     """
+    __slots__ = ('op', 'lhs', 'rhs')
+
     def __init__(self, op, lhs, rhs):
         """
         Initialize an instance.
@@ -1050,6 +1745,12 @@ class Expression(object):
 class ConfigReader(object):
     """
     This internal class implements a parser for configurations.
+
+    The whole stream is read once into a string buffer which is then scanned
+    by index, with precompiled regular expressions for the runs of whitespace,
+    words and numbers. The token stream, the comments and the locations given
+    in error messages are the same as the ones of the historical
+    character-at-a-time reader (StreamConfigReader of test/benchmark_pyconf.py).
     """
 
     def __init__(self, config):
@@ -1069,6 +1770,12 @@ class ConfigReader(object):
         self.pbchars = []
         self.pbtokens = []
         self.comment = None
+        self.buf = ''
+        self.pos = 0   # index of the next character to tokenize
+        self.hwm = 0   # index of the next character never looked at
+        self.commentSpans = [] # (start, end) of the text of each comment
+        self.eofReads = 0      # attempts to read past the end of the buffer
+        self.eofPending = False
 
     def location(self):
         """
@@ -1080,28 +1787,58 @@ class ConfigReader(object):
         @return: A string representing a location in the stream being read.
         @rtype: str
         """
+        self.computeLocation()
         return "%s(%d,%d)" % (self.filename, self.lineno, self.colno)
 
+    def computeLocation(self):
+        """
+        Set lineno and colno from the furthest character looked at.
+
+        Lines and columns are counted the way the historical reader does it:
+        the text of a comment is skipped as a whole, so it does not move the
+        column and its end counts for one line, and each attempt to read past
+        the end of the stream moves the column.
+        """
+        buf = self.buf
+        hwm = self.hwm
+        spans = self.commentSpans
+        lineno = 1 + buf.count('\n', 0, hwm)
+        if spans and spans[-1][1] <= hwm and \
+           not buf.endswith('\n', spans[-1][0], spans[-1][1]):
+            # comment ending the stream without a newline
+            lineno += 1
+        # last newline which was not part of a comment
+        i = bisect.bisect_right(spans, (hwm,))
+        nl = buf.rfind('\n', 0, hwm)
+        while nl >= 0 and i > 0:
+            start, end = spans[i - 1]
+            if nl >= end:
+                break
+            if nl >= start:
+                nl = buf.rfind('\n', 0, start)
+            i -= 1
+        colno = hwm - nl
+        for start, end in spans:
+            if start > nl and end <= hwm:
+                colno -= end - start
+        self.lineno = lineno
+        self.colno = colno + self.eofReads
+
     def getChar(self):
         """
-        Get the next char from the stream. Update line and column numbers
-        appropriately.
+        Get the next char from the buffer.
 
         @return: The next character from the stream.
         @rtype: str
         """
         if self.pbchars:
-            c = self.pbchars.pop()
-            if isinstance(c,bytes):
-                c = c.decode()
-        else:
-            c = self.stream.read(1)
-            if isinstance(c,bytes):
-                c = c.decode()
-            self.colno += 1
-            if c == '\n':
-                self.lineno += 1
-                self.colno = 1
+            return self.pbchars.pop()
+        pos = self.pos
+        c = self.buf[pos:pos + 1]
+        if c:
+            self.pos = pos + 1
+            if self.hwm < self.pos:
+                self.hwm = self.pos
         return c
 
     def __repr__(self):
@@ -1111,7 +1848,7 @@ class ConfigReader(object):
 
     def getToken(self):
         """
-        Get a token from the stream. String values are returned in a form
+        Get a token from the buffer. String values are returned in a form
         where you need to eval() the returned value to get the actual
         string. The return value is (token_type, token_value).
 
@@ -1122,57 +1859,69 @@ class ConfigReader(object):
         """
         if self.pbtokens:
             return self.pbtokens.pop()
-        stream = self.stream
+        buf = self.buf
+        pos = self.pos
+        end = len(buf)
+        lookahead = pos # furthest character looked at by this token
         self.comment = None
         token = ''
         tt = EOF
-        while True:
-            c = self.getChar()
-            if not c:
-                break
-            elif c == '#':
+        while pos < end:
+            c = buf[pos]
+            if c == '#':
+                eol = buf.find('\n', pos + 1)
+                if eol < 0:
+                    eol = end
+                else:
+                    eol += 1
                 if self.comment :
-                    self.comment += '#' + stream.readline()
+                    self.comment += '#' + buf[pos + 1:eol]
                 else :
-                    self.comment = stream.readline()
-                self.lineno += 1
+                    self.comment = buf[pos + 1:eol]
+                self.commentSpans.append((pos + 1, eol))
+                pos = lookahead = eol
                 continue
-            if c in self.quotes:
-                token = c
+            if c in self.whitespace:
+                pos = lookahead = _WHITESPACE_RE.match(buf, pos).end()
+                self.lastc = buf[pos - 1]
+                continue
+            elif c in self.quotes:
                 quote = c
                 tt = STRING
-                escaped = False
-                multiline = False
-                c1 = self.getChar()
-                if c1 == quote:
-                    c2 = self.getChar()
-                    if c2 == quote:
-                        multiline = True
-                        token += quote
-                        token += quote
-                    else:
-                        self.pbchars.append(c2)
-                        self.pbchars.append(c1)
+                start = pos
+                pos += 1
+                if buf.startswith(quote * 2, pos):
+                    multiline = True
+                    pos += 2
                 else:
-                    self.pbchars.append(c1)
+                    multiline = False
+                    if buf.startswith(quote, pos):
+                        # empty string: the character after it was read
+                        if pos + 1 < end:
+                            lookahead = pos + 2
+                        else:
+                            self.eofReads += 1
+                            self.eofPending = True
+                content = pos
                 while True:
-                    c = self.getChar()
-                    if not c:
+                    pos = buf.find(quote, pos)
+                    if pos < 0:
+                        self.hwm = end
+                        self.eofReads += 1
+                        raise ConfigFormatError('%s: Unterminated quoted string: %r, %r' % (self.location(), buf[start:], ''))
+                    backslashes = 0
+                    while pos - backslashes > content and \
+                          buf[pos - backslashes - 1] == '\\':
+                        backslashes += 1
+                    pos += 1
+                    if backslashes % 2:
+                        continue # escaped quote
+                    if not multiline or (pos - start >= 6 and
+                                         buf.startswith(quote * 3, pos - 3) and
+                                         buf[pos - 4] != '\\'):
                         break
-                    token += c
-                    if (c == quote) and not escaped:
-                        if not multiline or (len(token) >= 6 and token.endswith(token[:3]) and token[-4] != '\\'):
-                            break
-                    if c == '\\':
-                        escaped = not escaped
-                    else:
-                        escaped = False
-                if not c:
-                    raise ConfigFormatError('%s: Unterminated quoted string: %r, %r' % (self.location(), token, c))
+                token = buf[start:pos]
                 break
-            if c in self.whitespace:
-                self.lastc = c
-                continue
             elif c in self.punct:
                 token = c
                 tt = c
@@ -1181,32 +1930,31 @@ class ConfigReader(object):
                         tt = LBRACK2
                     elif c == '(':
                         tt = LPAREN2
+                pos += 1
                 break
             elif c in self.digits:
-                token = c
                 tt = NUMBER
-                while True:
-                    c = self.getChar()
-                    if not c:
-                        break
-                    if c in self.digits:
-                        token += c
-                    elif (c == '.') and token.find('.') < 0:
-                        token += c
+                m = _NUMBER_RE.match(buf, pos)
+                token = m.group()
+                pos = m.end()
+                if pos < end:
+                    if buf[pos] in self.whitespace:
+                        # the separator is swallowed with the number
+                        pos += 1
                     else:
-                        if c and (c not in self.whitespace):
-                            self.pbchars.append(c)
-                        break
+                        lookahead = pos + 1
+                else:
+                    self.eofReads += 1
                 break
             elif c in self.wordchars:
-                token = c
                 tt = WORD
-                c = self.getChar()
-                while c and (c in self.identchars):
-                    token += c
-                    c = self.getChar()
-                if c: # and c not in self.whitespace:
-                    self.pbchars.append(c)
+                m = _WORD_RE.match(buf, pos)
+                token = m.group()
+                pos = m.end()
+                if pos < end:
+                    lookahead = pos + 1
+                else:
+                    self.eofReads += 1
                 if token == "True":
                     tt = TRUE
                 elif token == "False":
@@ -1215,13 +1963,21 @@ class ConfigReader(object):
                     tt = NONE
                 break
             else:
+                self.hwm = pos + 1
                 raise ConfigFormatError('%s: Unexpected character: %r' % (self.location(), c))
+        if tt == EOF:
+            if self.eofPending:
+                self.eofPending = False
+            else:
+                self.eofReads += 1
+        self.pos = pos
+        self.hwm = max(pos, lookahead)
         if token:
             self.lastc = token[-1]
         else:
             self.lastc = None
         self.last_token = tt
-        
+
         # Python 2.x specific unicode conversion
         if sys.version_info[0] == 2 and tt == WORD and isinstance(token, unicode):
             token = token.encode('ascii')
@@ -1247,14 +2003,20 @@ class ConfigReader(object):
                 raise ConfigError("internal error: load called with parent but no suffix")
             self.config.setPath(makePath(object.__getattribute__(parent, 'path'), suffix))
         self.setStream(stream)
-        self.token = self.getToken()
-        self.parseMappingBody(self.config)
-        if self.token[0] != EOF:
-            raise ConfigFormatError('%s: expecting EOF, found %r' % (self.location(), self.token[1]))
+        cache = parseCache
+        if (cache is None) or (parent is not None) or not cache.restore(self):
+            self.token = self.getToken()
+            self.parseMappingBody(self.config)
+            if self.token[0] != EOF:
+                raise ConfigFormatError('%s: expecting EOF, found %r' % (self.location(), self.token[1]))
+            if (cache is not None) and (parent is None):
+                cache.store(self)
+        # the text is not needed any more, and the reader is kept by its config
+        self.buf = None
 
     def setStream(self, stream):
         """
-        Set the stream to the specified value, and prepare to read from it.
+        Set the stream to the specified value, and read it in the buffer.
 
         @param stream: A stream from which to load the configuration.
         @type stream: A stream (file-like object).
@@ -1265,6 +2027,15 @@ class ConfigReader(object):
         else:
             filename = '?'
         self.filename = filename
+        buf = stream.read(-1)
+        if isinstance(buf, bytes):
+            buf = buf.decode()
+        self.buf = buf
+        self.pos = 0
+        self.hwm = 0
+        self.commentSpans = []
+        self.eofReads = 0
+        self.eofPending = False
         self.lineno = 1
         self.colno = 1
 
@@ -1523,6 +2294,420 @@ RCURLY, COMMA, found %r"
             self.match(RBRACK)
             ref.addElement(LBRACK, tv)
 
+def _getCacheFilesStats(directory):
+    """
+    Return the number of cache files of a directory, and their total size.
+    """
+    entries = 0
+    size = 0
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.pickle'):
+                entries += 1
+                size += os.path.getsize(os.path.join(directory, name))
+    return entries, size
+
+def replaceFile(source, destination):
+    """
+    Rename a file, replacing the destination atomically: the other
+    processes reading it see the previous file or the new one, never no
+    file. With Python 2 on windows, where os.rename does not replace a
+    file and os.replace does not exist, the destination is removed first.
+
+    @param source: The path of the file to rename (a temporary file).
+    @type source: str
+    @param destination: The path of the file to replace.
+    @type destination: str
+    """
+    if hasattr(os, 'replace'):
+        os.replace(source, destination)
+        return
+    if sys.platform == 'win32' and os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
+
+class ParseCache(object):
+    """
+    This class implements an on-disk cache of the parsed configuration files.
+
+    The tree of L{Mapping}, L{Sequence}, L{Reference} and L{Expression}
+    instances read from a file is stored as nested tuples in a pickle file
+    of the cache directory, named from the absolute path of the file.
+    An entry is used only if the modification time, the size and the sha1
+    hash of the file are the ones recorded when it was stored.
+
+    Files including other files (the @ syntax) are not cached.
+
+    To be used, an instance is assigned to the module variable L{parseCache}.
+
+    @ivar directory: the directory of the cache files.
+    @ivar hits: the number of files restored from the cache.
+    @ivar misses: the number of files parsed (and stored in the cache).
+    """
+
+    # change it when the stored format changes
+    FORMAT = 1
+
+    def __init__(self, directory):
+        """
+        Initialize an instance.
+
+        @param directory: The directory of the cache files, created if needed.
+        @type directory: str
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def getEntryPath(self, filename):
+        """
+        Return the path of the cache file of a configuration file.
+
+        @param filename: The path of the configuration file.
+        @type filename: str
+        @rtype: str
+        """
+        key = hashlib.sha1(os.path.abspath(filename).encode('utf-8'))
+        return os.path.join(self.directory, key.hexdigest() + '.pickle')
+
+    def getSignature(self, reader):
+        """
+        Return the signature of the file read by a reader, or None if the
+        reader does not read a file.
+
+        @param reader: The reader, after its L{ConfigReader.setStream} call.
+        @type reader: L{ConfigReader}
+        @return: (format, python version, mtime, size, sha1 of the content)
+        @rtype: tuple
+        """
+        buf = getattr(reader, 'buf', None)
+        filename = reader.filename
+        if (buf is None) or not os.path.isfile(filename):
+            return None
+        st = os.stat(filename)
+        digest = hashlib.sha1(buf.encode('utf-8')).hexdigest()
+        return (self.FORMAT, sys.version_info[:2], st.st_mtime, st.st_size, digest)
+
+    def restore(self, reader):
+        """
+        Fill the configuration of a reader from the cache.
+
+        @param reader: The reader, after its L{ConfigReader.setStream} call.
+        @type reader: L{ConfigReader}
+        @return: True if the configuration was found in the cache.
+        @rtype: bool
+        """
+        try:
+            signature = self.getSignature(reader)
+            if signature is None:
+                return False
+            with open(self.getEntryPath(reader.filename), 'rb') as f:
+                entry = pickle.load(f)
+            if entry[0] != signature:
+                self.misses += 1
+                return False
+        except Exception:
+            self.misses += 1
+            return False
+        config = reader.config
+        for key, value, comment in entry[1]:
+            config.addMapping(key, self.decode(value, config, config), comment)
+        self.hits += 1
+        return True
+
+    def store(self, reader):
+        """
+        Store in the cache the configuration just parsed by a reader.
+        Errors are ignored: the cache is only an optimization.
+
+        @param reader: The reader, after its L{ConfigReader.load} call.
+        @type reader: L{ConfigReader}
+        """
+        try:
+            signature = self.getSignature(reader)
+            if signature is None:
+                return
+            entry = (signature, self.encodeItems(reader.config))
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            path = self.getEntryPath(reader.filename)
+            tmp = '%s.%d' % (path, os.getpid())
+            with open(tmp, 'wb') as f:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+            replaceFile(tmp, path)
+        except Exception:
+            pass
+
+    def getStats(self):
+        """
+        Return the statistics of the cache.
+
+        @return: the hits and misses of this instance, and the number of
+        entries and their total size in the cache directory.
+        @rtype: dict
+        """
+        entries, size = _getCacheFilesStats(self.directory)
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': entries, 'size': size}
+
+    def encode(self, value):
+        """
+        Return a value of a configuration as nested tuples.
+
+        @raise ConfigError: If the value includes another configuration.
+        """
+        if isinstance(value, Config):
+            raise ConfigError("included configurations are not cached")
+        if isinstance(value, Mapping):
+            return ('M', object.__getattribute__(value, 'path'),
+                    self.encodeItems(value))
+        if isinstance(value, Sequence):
+            data = object.__getattribute__(value, 'data')
+            comments = object.__getattribute__(value, 'comments') or {}
+            items = [(self.encode(data[i]), comments.get(i)) for i in range(len(data))]
+            return ('S', object.__getattribute__(value, 'path'), items)
+        if isinstance(value, Reference):
+            return ('R', value.type, value.elements)
+        if isinstance(value, Expression):
+            return ('E', value.op, self.encode(value.lhs), self.encode(value.rhs))
+        return value
+
+    def encodeItems(self, mapping):
+        """
+        Return the (key, encoded value, comment) items of a mapping.
+        """
+        data = object.__getattribute__(mapping, 'data')
+        comments = object.__getattribute__(mapping, 'comments') or {}
+        return [(key, self.encode(data[key]), comments.get(key))
+                for key in data]
+
+    def decode(self, value, parent, config):
+        """
+        Return the value of a configuration encoded by L{encode}.
+
+        The items of a sequence have the parent of the sequence as parent,
+        as they have when they are parsed.
+        """
+        if not isinstance(value, tuple):
+            return value
+        kind = value[0]
+        if kind == 'M':
+            rv = Mapping(parent)
+            rv.setPath(value[1])
+            for key, item, comment in value[2]:
+                rv.addMapping(key, self.decode(item, rv, config), comment)
+        elif kind == 'S':
+            rv = Sequence(parent)
+            rv.setPath(value[1])
+            for item, comment in value[2]:
+                rv.append(self.decode(item, parent, config), comment)
+        elif kind == 'R':
+            rv = Reference(config, value[1], value[2][0])
+            for element in value[2][1:]:
+                rv.addElement(*element)
+        else:
+            rv = Expression(value[1], self.decode(value[2], parent, config),
+                            self.decode(value[3], parent, config))
+        return rv
+
+class SnapshotCache(object):
+    """
+    This class implements an on-disk cache of whole configurations.
+
+    A configuration built from several files, and merged, is pickled
+    under a key given by the caller (the parameters of its build), with
+    the fingerprints of its input files and directories. An entry is used
+    only if none of them was changed, added or removed since it was
+    stored: the modification time and the size of each one are checked,
+    not the contents.
+
+    The modification time of an entry is the time of its last use: when
+    a configuration is stored, the entries not used for maxAge seconds are
+    removed, then the least recently used ones beyond maxEntries.
+
+    To be used, an instance is assigned to the module variable
+    L{snapshotCache}.
+
+    @ivar directory: the directory of the cache files.
+    @ivar maxEntries: the maximum number of entries of the directory.
+    @ivar maxAge: the maximum time in seconds since the last use of an entry.
+    @ivar hits: the number of configurations restored from the cache.
+    @ivar misses: the number of configurations not found, or out of date.
+    @ivar stores: the number of configurations stored in the cache.
+    """
+
+    # change it when the stored format changes
+    FORMAT = 2
+
+    def __init__(self, directory, maxEntries=100, maxAge=30 * 24 * 3600):
+        """
+        Initialize an instance.
+
+        @param directory: The directory of the cache files, created if needed.
+        @type directory: str
+        @param maxEntries: The maximum number of entries.
+        @type maxEntries: int
+        @param maxAge: The maximum time in seconds since the last use of
+        an entry.
+        @type maxAge: float
+        """
+        self.directory = directory
+        self.maxEntries = maxEntries
+        self.maxAge = maxAge
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def getEntryPath(self, key):
+        """
+        Return the path of the cache file of a key.
+
+        @param key: The key of a configuration.
+        @type key: str
+        @rtype: str
+        """
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + '.pickle')
+
+    @staticmethod
+    def fingerprint(paths):
+        """
+        Return the fingerprints of files or directories.
+
+        @param paths: The paths, in any order, with duplicates or not.
+        @type paths: list
+        @return: sorted (path, (mtime, size)) items, (path, None) for the
+        paths which do not exist.
+        @rtype: list
+        """
+        res = []
+        for path in sorted(set(paths)):
+            try:
+                st = os.stat(path)
+                res.append((path, (st.st_mtime, st.st_size)))
+            except OSError:
+                res.append((path, None))
+        return res
+
+    def restore(self, key):
+        """
+        Restore the configuration stored for a key, if it is up to date.
+
+        @param key: The key of the configuration.
+        @type key: str
+        @return: (configuration, extra data given to L{store}), or None.
+        @rtype: tuple
+        """
+        try:
+            with open(self.getEntryPath(key), 'rb') as f:
+                header = pickle.load(f)
+                if header[0] != (self.FORMAT, sys.version_info[:2], key) or \
+                   header[1] != self.fingerprint([p for p, _ in header[1]]):
+                    self.misses += 1
+                    return None
+                # the collector would run again and again on the new objects
+                gcEnabled = gc.isenabled()
+                gc.disable()
+                try:
+                    config, extra = pickle.load(f)
+                finally:
+                    if gcEnabled:
+                        gc.enable()
+        except Exception:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            os.utime(self.getEntryPath(key), None) # the time of last use
+        except OSError:
+            pass
+        return config, extra
+
+    def store(self, key, inputs, config, extra=None):
+        """
+        Store a configuration in the cache.
+        Errors are ignored: the cache is only an optimization.
+
+        @param key: The key of the configuration.
+        @type key: str
+        @param inputs: The paths of the files and of the directories from
+        which the configuration was built.
+        @type inputs: list
+        @param config: The configuration.
+        @type config: L{Config}
+        @param extra: Data to restore with the configuration.
+        @type extra: any picklable value
+        @return: True if the configuration was stored.
+        @rtype: bool
+        """
+        try:
+            header = ((self.FORMAT, sys.version_info[:2], key),
+                      self.fingerprint(inputs))
+            data = pickle.dumps((config, extra), pickle.HIGHEST_PROTOCOL)
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            path = self.getEntryPath(key)
+            tmp = '%s.%d' % (path, os.getpid())
+            with open(tmp, 'wb') as f:
+                pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+                f.write(data)
+            replaceFile(tmp, path)
+        except Exception:
+            return False
+        self.stores += 1
+        self.prune()
+        return True
+
+    def prune(self):
+        """
+        Remove the entries not used for maxAge seconds, then the least
+        recently used ones beyond maxEntries, and the temporary files
+        left by the interrupted processes.
+        Errors are ignored: the entries may be removed by another process.
+
+        @return: The number of entries removed.
+        @rtype: int
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return removed
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                mtime = os.path.getmtime(path)
+                if now - mtime > self.maxAge:
+                    os.remove(path)
+                    if name.endswith('.pickle'):
+                        removed += 1
+                elif name.endswith('.pickle'):
+                    entries.append((mtime, path))
+            except OSError:
+                pass
+        entries.sort()
+        for _mtime, path in entries[:max(0, len(entries) - self.maxEntries)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def getStats(self):
+        """
+        Return the statistics of the cache.
+
+        @return: the hits, misses and stores of this instance, and the
+        number of entries and their total size in the cache directory.
+        @rtype: dict
+        """
+        entries, size = _getCacheFilesStats(self.directory)
+        return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores,
+                'entries': entries, 'size': size}
+
 def defaultMergeResolve(map1, map2, key):
     """\
     A default resolver for merge conflicts. 
@@ -1583,6 +2768,11 @@ class ConfigMerger(object):
     merge operand to the merge target. If a key exists in both configurations,
     then a resolver (a callable) is called to decide how to handle the
     conflict.
+
+    The entries are not deep-copied: a container of the merge operand is
+    shared with the merge target, which becomes its parent. So the cost of
+    a merge depends on the keys of the merge operand along the clashing
+    paths, not on the size of its subtrees.
     """
 
     def __init__(self, resolver=defaultMergeResolve):
@@ -1610,6 +2800,8 @@ class ConfigMerger(object):
         @type mergee: L{Config}.
         """
         self.mergeMapping(merged, mergee)
+        # the parents of the merged containers changed
+        invalidateResolutions()
 
     def overwriteKeys(self, map1, seq2):
         """
@@ -1624,22 +2816,23 @@ class ConfigMerger(object):
         overwrite_list = object.__getattribute__(seq2, 'data')
         for overwrite_instruction in overwrite_list:
             object.__setattr__(overwrite_instruction, 'parent', map1)
-            if "__condition__" in overwrite_instruction.keys():
+            invalidateResolutions()
+            if "__condition__" in overwrite_instruction:
                 overwrite_condition = overwrite_instruction["__condition__"]
-                if eval(overwrite_condition, globals(), map1):
-                    for key in overwrite_instruction.keys():
-                        if key == "__condition__":
-                            continue
-                        try:
-                            exec( 'map1.' + key + " = " + repr(overwrite_instruction[key]))
-                        except Exception:
-                            exec('map1.' + key + " = " + str(overwrite_instruction[key]))
-            else:
-                for key in overwrite_instruction.keys():
+                if not evalCondition(overwrite_condition, map1):
+                    continue
+            for key in overwrite_instruction.keys():
+                if key == "__condition__":
+                    continue
+                steps = compilePath(key)
+                if steps is None:
                     try:
                         exec('map1.' + key + " = " + repr(overwrite_instruction[key]))
                     except Exception:
                         exec('map1.' + key + " = " + str(overwrite_instruction[key]))
+                else:
+                    value = _overwriteValue(overwrite_instruction[key])
+                    setByPath(map1, steps, value)
 
     def mergeMapping(self, map1, map2):
         """
@@ -1651,16 +2844,20 @@ class ConfigMerger(object):
         @param map2: The mapping to merge.
         @type map2: L{Mapping}.
         """
-        keys = map1.keys()
         global __resolveOverwrite__
+        data1 = object.__getattribute__(map1, 'data')
         for key in map2.keys():
             if __resolveOverwrite__ and key == "__overwrite__":
                 self.overwriteKeys(map1,map2[key])
 
-            elif key not in keys:
-                map1[key] = map2[key]
-                if isinstance(map1[key], Container) :
-                    object.__setattr__(map1[key], 'parent', map1)
+            elif key not in data1:
+                # the subtree is shared, not copied
+                # (the change of parent is covered by the invalidation of
+                # the resolutions done by the assignment)
+                obj2 = map2[key]
+                map1[key] = obj2
+                if isinstance(obj2, Container):
+                    object.__setattr__(obj2, 'parent', map1)
             else:
                 obj1 = map1[key]
                 obj2 = map2[key]
@@ -1671,13 +2868,14 @@ class ConfigMerger(object):
                     self.mergeSequence(obj1, obj2)
                 elif decision == "overwrite":
                     map1[key] = obj2
-                    if isinstance(map1[key], Container):
-                        object.__setattr__(map1[key], 'parent', map1)
+                    if isinstance(obj2, Container):
+                        object.__setattr__(obj2, 'parent', map1)
                 elif decision == "mismatch":
                     self.handleMismatch(obj1, obj2)
                 else:
                     msg = "unable to merge: don't know how to implement %r"
                     raise ValueError(msg % decision)
+        invalidateResolutions(map1)
 
     def mergeSequence(self, seq1, seq2):
         """
@@ -1692,12 +2890,17 @@ class ConfigMerger(object):
         """
         data1 = object.__getattribute__(seq1, 'data')
         data2 = object.__getattribute__(seq2, 'data')
-        for obj in data2:
-            data1.append(obj)
-        comment1 = object.__getattribute__(seq1, 'comments')
+        offset = len(data1)
+        data1.extend(data2)
         comment2 = object.__getattribute__(seq2, 'comments')
-        for obj in comment2:
-            comment1.append(obj)
+        if comment2:
+            comment1 = object.__getattribute__(seq1, 'comments')
+            if comment1 is None:
+                comment1 = {}
+                object.__setattr__(seq1, 'comments', comment1)
+            for index, comment in comment2.items():
+                comment1[offset + index] = comment
+        invalidateResolutions(seq1)
 
     def handleMismatch(self, obj1, obj2):
         """
@@ -22,6 +22,7 @@ like open a browser or an editor, or call a git command
 '''
 
 import os
+import json
 import subprocess as SP
 import time
 import tarfile
@@ -103,6 +104,17 @@ python3 -m http.server %(port)s &> /dev/null &
 
 def git_describe(repo_path):
     '''Use git describe --tags command to return tag description of the git repository"
+    The description is kept by gitDescribeCache, if set, while the
+    repository does not change.
+
+    :param repo_path str: The git repository to describe
+    '''
+    if gitDescribeCache is not None:
+        return gitDescribeCache.describe(repo_path)
+    return run_git_describe(repo_path)
+
+def run_git_describe(repo_path):
+    '''Run git describe --tags to return tag description of the git repository"
     :param repo_path str: The git repository to describe
     '''
     git_cmd="cd %s;git describe --tags" % repo_path
@@ -117,6 +129,139 @@ def git_describe(repo_path):
             tag_description=tag_description.decode("utf-8", "ignore")
         return tag_description
 
+def git_describe_inputs(repo_path):
+    '''Get the paths of the git files on which git_describe depends:
+    HEAD, the reference of the current branch, the packed references
+    and the directory of the tags, or the .git paths looked for
+    if repo_path is not in a git repository.
+
+    :param repo_path str: The git repository to describe
+    :return: The paths, or None for the repositories with a .git file
+             (worktrees, submodules):
+             'paths' the paths of all the files and directories, of which
+             the modification times and sizes are to be checked,
+             'contents' those of HEAD and of the reference of the current
+             branch, small files of which the contents are to be checked
+    :rtype: dict
+    '''
+    paths = []
+    path = os.path.abspath(repo_path)
+    while True:
+        git_dir = os.path.join(path, ".git")
+        paths.append(git_dir)
+        if os.path.isfile(git_dir):
+            return None
+        if os.path.isdir(git_dir):
+            break
+        parent = os.path.dirname(path)
+        if parent == path:
+            # not a git repository
+            return {"paths": paths, "contents": []}
+        path = parent
+    head = os.path.join(git_dir, "HEAD")
+    contents = [head]
+    paths += [head,
+              os.path.join(git_dir, "packed-refs"),
+              os.path.join(git_dir, "refs", "tags")]
+    try:
+        with open(head) as f:
+            ref = f.read().strip()
+    except IOError:
+        ref = ""
+    if ref.startswith("ref:"):
+        ref_path = os.path.join(git_dir, *ref[4:].strip().split("/"))
+        paths.append(ref_path)
+        contents.append(ref_path)
+    return {"paths": paths, "contents": contents}
+
+class GitDescribeCache(object):
+    '''The results of git_describe, stored in a file of a directory with
+    the fingerprints of the git files they depend upon (see 
+    git_describe_inputs): their modification times and sizes, and the 
+    contents of HEAD and of the reference of the current branch.
+    The git command is run only for the repositories changed since.
+    '''
+    FILENAME = "git_describe.json"
+
+    def __init__(self, directory):
+        '''
+        :param directory str: The directory of the cache file, created if needed
+        '''
+        self.directory = directory
+        self.entries = None # {repository path: [fingerprint, description]}
+        self.hits = 0
+        self.misses = 0
+
+    def get_path(self):
+        return os.path.join(self.directory, self.FILENAME)
+
+    @staticmethod
+    def fingerprint(repo_path):
+        '''The fingerprint of the git files of a repository, None if it 
+        cannot be given (worktrees, submodules)
+
+        :param repo_path str: The git repository
+        :rtype: list
+        '''
+        inputs = git_describe_inputs(repo_path)
+        if inputs is None:
+            return None
+        res = [[path, list(stat) if stat else None] 
+               for path, stat in src.pyconf.SnapshotCache.fingerprint(inputs["paths"])]
+        for path in inputs["contents"]:
+            if os.path.isfile(path):
+                with open(path) as f:
+                    res.append([path, f.read().strip()])
+        return res
+
+    def describe(self, repo_path):
+        '''As git_describe, with the description kept if the repository
+        does not change
+
+        :param repo_path str: The git repository to describe
+        '''
+        key = os.path.abspath(repo_path)
+        try:
+            fingerprint = self.fingerprint(repo_path)
+        except Exception:
+            fingerprint = None
+        if fingerprint is None:
+            return run_git_describe(repo_path)
+        # as the json file gives it
+        fingerprint = json.loads(json.dumps(fingerprint))
+        if self.entries is None:
+            try:
+                with open(self.get_path()) as f:
+                    self.entries = json.load(f)
+            except Exception:
+                self.entries = {}
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        description = run_git_describe(repo_path)
+        self.entries[key] = [fingerprint, description]
+        self.store()
+        return description
+
+    def store(self):
+        '''Write the cache file. Errors are ignored: the cache is only 
+        an optimization.'''
+        path = self.get_path()
+        tmp = '%s.%d' % (path, os.getpid())
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with open(tmp, 'w') as f:
+                json.dump(self.entries, f)
+            src.pyconf.replaceFile(tmp, path)
+        except Exception:
+            pass
+
+# the cache of git_describe, set by the ConfigManager
+gitDescribeCache = None
+
 def git_extract(from_what, tag, git_options, git_commands, where, logger, environment=None):
   '''Extracts sources from a git repository.
 87
@@ -420,9 +565,18 @@ def svn_extract(user,
                            stderr=SP.STDOUT)
     return (res == 0)
 
-def get_pkg_check_cmd(dist_name):
-    '''Build the command to use for checking if a linux package is installed or not.'''
+# the commands of get_pkg_check_cmd, {dist_name: command}
+_pkg_check_cmds = {}
 
+def get_pkg_check_cmd(dist_name):
+    '''Build the command to use for checking if a linux package is installed or not.
+    The package managers are searched once per sat call.'''
+    if dist_name not in _pkg_check_cmds:
+        _pkg_check_cmds[dist_name] = _find_pkg_check_cmd(dist_name)
+    return list(_pkg_check_cmds[dist_name])
+
+def _find_pkg_check_cmd(dist_name):
+    '''the command of get_pkg_check_cmd, searched with which'''
     if dist_name in ["CO","FD","MG","MD","CO","OS"]: # linux using rpm
         linux="RH"  
         manager_msg_err="Error : command failed because sat was not able to find apt command"
@@ -454,8 +608,145 @@ def get_pkg_check_cmd(dist_name):
                     raise src.SatException(manager_msg_err)
     return cmd_is_package_installed
 
+# the databases of the installed packages, read once while not changed
+DPKG_STATUS_FILE = "/var/lib/dpkg/status"
+RPM_DATABASE_FILES = ["/var/lib/rpm/rpmdb.sqlite", "/var/lib/rpm/Packages",
+                      "/var/lib/rpm/Packages.db", "/usr/lib/sysimage/rpm/rpmdb.sqlite"]
+# {"dpkg" or "rpm": (modification times of the database, installed packages)}
+_pkg_snapshots = {}
+pkg_snapshot_stats = {'queries': 0, 'snapshots': 0}
+
+def _get_mtimes(paths):
+    '''the modification times of the paths which exist'''
+    res = []
+    for path in paths:
+        try:
+            res.append((path, os.stat(path).st_mtime))
+        except OSError:
+            pass
+    return res
+
+def _read_dpkg_status(status_file):
+    '''the packages of the dpkg database (the status file, as dpkg-query),
+    [(name, version, architecture, status)], status is as in dpkg-query -l
+    ("ii" installed, "ri" to remove but still installed...)'''
+    abbrev_want = {"unknown": "u", "install": "i", "hold": "h", 
+                   "deinstall": "r", "purge": "p"}
+    abbrev_status = {"not-installed": "n", "config-files": "c", 
+                     "half-installed": "H", "unpacked": "U", 
+                     "half-configured": "F", "triggers-awaited": "W", 
+                     "triggers-pending": "t", "installed": "i"}
+    res = []
+    fields = {}
+    with open(status_file, "rb") as f:
+        for line in f.read().decode("utf-8", "ignore").splitlines() + [""]:
+            if not line.strip():
+                if "Package" in fields:
+                    status = fields.get("Status", "").split()
+                    if len(status) == 3:
+                        status = abbrev_want.get(status[0], "?") + abbrev_status.get(status[2], "?")
+                    else:
+                        status = "??"
+                    res.append((fields["Package"], fields.get("Version", ""),
+                                fields.get("Architecture", ""), status))
+                fields = {}
+            elif not line[0].isspace() and ":" in line:
+                key, value = line.split(":", 1)
+                fields[key] = value.strip()
+    return res
+
+def _query_rpm_database():
+    '''the installed packages of the rpm database, [(name, name-version-release.arch)]
+    (the output of rpm -q)'''
+    cmd = ["rpm", "-qa", "--qf", "%{NAME} %{NAME}-%{VERSION}-%{RELEASE}%|ARCH?{.%{ARCH}}:{}|\\n"]
+    with open(os.devnull, 'w') as devnull:
+        p = SP.Popen(cmd, stdout=SP.PIPE, stderr=devnull)
+        output, _ = p.communicate()
+    if p.returncode != 0:
+        raise src.SatException("command failed: %s" % " ".join(cmd))
+    res = []
+    for line in output.decode("utf-8", "ignore").splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            res.append((parts[0], parts[1]))
+    return res
+
+def get_installed_pkgs(check_cmd):
+    '''Get the packages of the database of the system package manager, 
+    read once, and again if the database is changed (its modification time).
+
+    :param check_cmd list: the command of the system package manager
+                           (see get_pkg_check_cmd)
+    :return: the packages (see _read_dpkg_status and _query_rpm_database), 
+             None if the database is not found
+    :rtype: list
+    '''
+    if check_cmd[0] in ["dpkg-query", "apt"]:
+        manager, paths = "dpkg", [DPKG_STATUS_FILE]
+    elif check_cmd[0] == "rpm":
+        manager, paths = "rpm", RPM_DATABASE_FILES
+    else:
+        return None
+    mtimes = _get_mtimes(paths)
+    if not mtimes:
+        return None
+    snapshot = _pkg_snapshots.get(manager)
+    if snapshot is not None and snapshot[0] == mtimes:
+        return snapshot[1]
+    try:
+        if manager == "rpm":
+            pkgs = _query_rpm_database()
+        else:
+            pkgs = _read_dpkg_status(DPKG_STATUS_FILE)
+    except Exception as e:
+        DBG.write("Warning : sat was not able to read the installed packages", str(e))
+        return None
+    pkg_snapshot_stats['snapshots'] += 1
+    _pkg_snapshots[manager] = (mtimes, pkgs)
+    return pkgs
+
+def _get_pkg_check_output(check_cmd, pkgs):
+    '''the output of the command check_cmd for pkgs, as run by check_system_pkgs,
+    given by the snapshot of the installed packages if possible'''
+    pkg_snapshot_stats['queries'] += 1
+    installed = get_installed_pkgs(check_cmd)
+    if installed is not None:
+        if check_cmd[0] == "dpkg-query":
+            # as dpkg-query -l p*, sorted by name
+            lines = ["%s  %s:%s  %s  %s" % (status, name, arch, version, arch)
+                     for name, version, arch, status in sorted(installed)
+                     if any(name.startswith(p) for p in pkgs)]
+            return "\n".join(lines)
+        if check_cmd[0] == "apt":
+            # as apt list --installed p*
+            lines = sorted(["%s/now %s %s [installed]" % (name, version, arch)
+                            for name, version, arch, status in installed
+                            if status[1] == "i" and any(name.startswith(p) for p in pkgs)])
+            return "\n".join(lines)
+        if check_cmd[0] == "rpm":
+            # as rpm -q pkgs, if the packages are given by their names
+            names = set(name for name, nevra in installed)
+            if all(p in names for p in pkgs):
+                lines = []
+                for p in pkgs:
+                    lines += [nevra for name, nevra in installed if name == p]
+                return "\n".join(lines)
+    # the package manager is run
+    cmd = list(check_cmd)
+    if check_cmd[0] == "rpm":
+        cmd.extend(pkgs)
+    else:
+        cmd.extend([p + "*" for p in pkgs])
+    with open(os.devnull, 'w') as devnull:
+        p = SP.Popen(cmd, stdout=SP.PIPE, stderr=devnull)
+        output, _ = p.communicate()
+    return output.decode("utf-8", "ignore")
+
 def check_system_pkgs(check_cmd, pkgs):
-    '''Check if a list of packages are installed
+    '''Check if a list of packages are installed.
+    The packages are searched in the snapshot of the installed packages
+    (see get_installed_pkgs) if possible, else with check_cmd.
+
     :param check_cmd list: the list of command to use system package manager
     :param pkgs list: the list of pkg names to check
     :rtype: dict
@@ -465,14 +756,9 @@ def check_system_pkgs(check_cmd, pkgs):
         return {}
 
     results = {pkg: src.printcolors.printcError("KO") + " (package is not installed!)\n" for pkg in pkgs}
-    FNULL = open(os.devnull, 'w')
-    cmd = list(check_cmd)
 
     if check_cmd[0] == "apt":
-        cmd.extend([p + "*" for p in pkgs])
-        p = SP.Popen(cmd, stdout=SP.PIPE, stderr=FNULL)
-        output, _ = p.communicate()
-        output = output.decode("utf-8", "ignore")
+        output = _get_pkg_check_output(check_cmd, pkgs)
         
         installed_pkgs_names = set()
         for line in output.splitlines():
@@ -489,10 +775,7 @@ def check_system_pkgs(check_cmd, pkgs):
                 results[best_match] = src.printcolors.printcSuccess("OK") + " ({} is installed)\n".format(installed_name)
 
     elif check_cmd[0] == "dpkg-query":
-        cmd.extend([p + "*" for p in pkgs])
-        p = SP.Popen(cmd, stdout=SP.PIPE, stderr=FNULL)
-        output, _ = p.communicate()
-        output = output.decode("utf-8", "ignore")
+        output = _get_pkg_check_output(check_cmd, pkgs)
 
         installed_packages = []
         for line in output.splitlines():
@@ -513,10 +796,7 @@ def check_system_pkgs(check_cmd, pkgs):
                 results[best_match] = src.printcolors.printcSuccess("OK") + " ({} {} is installed)\n".format(installed['name'], installed['version'])
 
     elif check_cmd[0] == "rpm":
-        cmd.extend(pkgs)
-        p = SP.Popen(cmd, stdout=SP.PIPE, stderr=SP.PIPE)
-        stdout, _ = p.communicate()
-        stdout = stdout.decode("utf-8", "ignore")
+        stdout = _get_pkg_check_output(check_cmd, pkgs)
         
         stdout_lines = stdout.strip().split('\n')
         
@@ -533,7 +813,6 @@ def check_system_pkgs(check_cmd, pkgs):
             if best_match and not results[best_match].startswith('OK'):
                 results[best_match] = src.printcolors.printcSuccess("OK") + " ({})\n".format(installed_name.strip())
 
-    FNULL.close()
     return results
 
 def check_system_pkg(check_cmd,pkg):
@@ -31,6 +31,7 @@ and range of versions
 
 import os
 import sys
+import bisect
 
 verbose = False # True
 
@@ -272,3 +273,83 @@ class MinorMajorPatch(object):
   def __ne__(self, other):
     res = (self.toList() != other.toList())
     return res
+
+
+#############################################
+_majorMinorPatch_cache = {}
+
+def getCached_majorMinorPatch(aStr):
+  """
+  Returns the MinorMajorPatch instance of a version string,
+  parsed once and shared by the callers (which have not to change it).
+
+  :param aStr: string to work, as '1.2.3'
+  :return: MinorMajorPatch instance
+  | raise exception if problem, as MinorMajorPatch(aStr)
+  """
+  try:
+    res = _majorMinorPatch_cache[aStr]
+  except KeyError:
+    try:
+      res = MinorMajorPatch(aStr)
+    except Exception as e:
+      res = e
+    _majorMinorPatch_cache[aStr] = res
+  if isinstance(res, Exception):
+    raise res
+  return res
+
+#############################################
+class RangesIndex_majorMinorPatch(object):
+  """\
+  index of the version ranges of a list of names (as the sections of a
+  product definition, see getRange_majorMinorPatch), to find the ranges
+  of a version by bisection
+
+  | The ranges [min, max] are stored as half-open intervals of
+  | [major, minor, patch] lists [min, max + 0.0.1[, cut at their bounds
+  | in consecutive segments, each one with the names of the ranges
+  | containing it.
+  | Overlapping ranges are listed in self.overlaps.
+  """
+
+  def __init__(self, names):
+    """
+    :param names: list of names, the ones which are not a range are ignored
+    | raise exception if a name is an incorrect range, 
+    | as getRange_majorMinorPatch
+    """
+    self.ranges = []
+    for name in names:
+      aRange = getRange_majorMinorPatch(name)
+      if aRange is not None:
+        vmin, vmax = aRange
+        self.ranges.append((name, vmin.toList(), vmax.toList()[:2] + [vmax.patch + 1]))
+
+    bounds = set()
+    for name, lo, hi in self.ranges:
+      bounds.add(tuple(lo))
+      bounds.add(tuple(hi))
+    self.bounds = [list(b) for b in sorted(bounds)]
+    self.segments = [[] for b in self.bounds]
+    for name, lo, hi in self.ranges:
+      for i in range(bisect.bisect_left(self.bounds, lo),
+                     bisect.bisect_left(self.bounds, hi)):
+        self.segments[i].append(name)
+
+    self.overlaps = []
+    for segment in self.segments:
+      if len(segment) > 1 and segment not in self.overlaps:
+        self.overlaps.append(segment)
+
+  def find(self, version):
+    """
+    :param version: MinorMajorPatch instance
+    :return: list of the names of the ranges containing version,
+             in the order of the names given to the index
+    """
+    i = bisect.bisect_right(self.bounds, version.toList()) - 1
+    if i < 0:
+      return []
+    return self.segments[i]
+
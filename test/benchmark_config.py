@@ -0,0 +1,437 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+benchmarks of the sat configuration of an application (not a unittest file)
+
+A synthetic project of --nb_products products and its application
+are written in a temporary directory, used as data directory.
+
+| Usage:
+| >> python benchmark_config.py get_config --nb_products 300
+| >> python benchmark_config.py get_config --profile
+| >> python benchmark_config.py lookup --nb_products 1000
+| >> python benchmark_config.py save --nb_products 1000
+| >> python benchmark_config.py one_product --nb_products 1000
+| >> python benchmark_config.py load_products --nb_products 300 --latency 0.005
+| >> python benchmark_config.py products_infos --nb_products 400
+| >> python benchmark_config.py product_configs --nb_products 400
+| >> python benchmark_config.py product_section --nb_products 10 --nb_sections 50
+| >> python benchmark_config.py compile_products --nb_products 100
+| >> python benchmark_config.py base_configs --nb_products 10 --nb_sections 100
+| >> python benchmark_config.py presence --nb_products 300 --latency 0.001
+| >> python benchmark_config.py nested_commands --nb_products 100
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse as AP
+
+import benchmark_pyconf as BPYF # set sys.path for src and commands
+
+import src
+import src.pyconf as PYF
+import src.product as PROD
+import src.compilation as COMP
+import commands.config as CFG
+
+class NoSnapshotConfigManager(CFG.ConfigManager):
+  """the config manager, without the snapshots of the final configs"""
+  def get_snapshot_key(self, var, application, options):
+    return None
+
+def get_config(datadir, application, snapshot=True):
+  """the config of the application, as sat gives it to the commands"""
+  if snapshot:
+    manager = CFG.ConfigManager()
+  else:
+    manager = NoSnapshotConfigManager()
+  return manager.get_config(application=application, datadir=datadir)
+
+def bench_get_config(datadir, application, options):
+  """time of the config of the application, restored from its snapshot or not"""
+  for snapshot in (False, True):
+    # once to have the same state of the caches for all the runs
+    get_config(datadir, application, snapshot)
+    best = BPYF.timeit(lambda: get_config(datadir, application, snapshot), options.repeat)
+    print("get_config: %d products, snapshot=%-5s, best of %d: %.3f s" % \
+          (options.nb_products, snapshot, options.repeat, best))
+
+def bench_one_product(datadir, application, options):
+  """
+  time of the config of the application and of the config of one of
+  its products, as for a command on one product (sat compile -p name)
+  """
+  name = BPYF.product_name(options.nb_products // 2)
+  def one_product():
+    cfg = get_config(datadir, application, snapshot)
+    PROD.get_product_config(cfg, name)
+  for snapshot in (False, True):
+    one_product()
+    best = BPYF.timeit(one_product, options.repeat)
+    print("one_product: %d products, snapshot=%-5s, best of %d: %.3f s" % \
+          (options.nb_products, snapshot, options.repeat, best))
+
+def bench_load_products(datadir, application, options):
+  """
+  time of the reading of the pyconf files of all the products,
+  as before a command on all of them, with 1 to 8 threads.
+  --latency seconds are added to the opening of each file,
+  as a stand-in for a project directory on a slow network file system.
+  """
+  def latency_open(*args, **kwargs):
+    time.sleep(options.latency)
+    return open(*args, **kwargs)
+  names = [BPYF.product_name(i) for i in range(options.nb_products)]
+  PROD.open = latency_open # used by DeferredProductConfig instead of builtin
+  try:
+    for workers in (1, 2, 4, 8):
+      def load_products():
+        cfg = get_config(datadir, application, snapshot=False)
+        cfg.INTERNAL.config.load_workers = workers
+        PROD.load_products_configs(cfg, names)
+      best = BPYF.timeit(load_products, options.repeat)
+      print("load_products: %d products, latency %.3f s, %d workers, best of %d: %.3f s" % \
+            (options.nb_products, options.latency, workers, options.repeat, best))
+  finally:
+    del PROD.open
+
+def bench_products_infos(datadir, application, options):
+  """
+  time of the configs of all the products, as for a command on all of them
+  (sat prepare), and number of directory listings it does
+  """
+  names = [BPYF.product_name(i) for i in range(options.nb_products)]
+  listdir = os.listdir
+  counts = [0]
+  def counting_listdir(path):
+    counts[0] += 1
+    return listdir(path)
+  def products_infos():
+    cfg = get_config(datadir, application)
+    PROD.get_products_infos(names, cfg)
+  # as a project not just written (see src.get_directory_listing)
+  past = time.time() - 60
+  for root, dirs, files in os.walk(os.path.dirname(datadir)):
+    os.utime(root, (past, past))
+  os.listdir = counting_listdir
+  try:
+    products_infos()
+    first = counts[0]
+    best = BPYF.timeit(products_infos, options.repeat)
+  finally:
+    os.listdir = listdir
+  print("products_infos: %d products, best of %d: %.3f s, listdir calls: %d (first run), %d (next runs)" % \
+        (options.nb_products, options.repeat, best, first, (counts[0] - first) // options.repeat))
+
+def bench_product_configs(datadir, application, options):
+  """
+  time of the configs of all the products asked several times,
+  as sat compile does: once for all the products, then once per product
+  before its compilation and for its environment
+  """
+  names = [BPYF.product_name(i) for i in range(options.nb_products)]
+  def product_configs():
+    cfg = get_config(datadir, application)
+    PROD.get_products_infos(names, cfg)
+    for name in names:
+      PROD.get_product_config(cfg, name)
+      PROD.get_product_config(cfg, name)
+  product_configs()
+  stats = getattr(PROD, "product_config_stats", None)
+  if stats is not None:
+    stats["hits"] = stats["misses"] = 0
+  best = BPYF.timeit(product_configs, options.repeat)
+  print("product_configs: %d products, best of %d: %.3f s" % \
+        (options.nb_products, options.repeat, best))
+  if stats is not None:
+    print("  hits %d, misses %d" % (stats["hits"], stats["misses"]))
+
+def bench_product_section(datadir, application, options):
+  """
+  time of the selection of the section of a product for versions in its
+  version ranges, with --nb_sections sections per product
+  """
+  cfg = get_config(datadir, application)
+  name = BPYF.product_name(0)
+  versions = ["%d.%d.%d" % (1 + i // 5, i % 5, i % 10) for i in range(options.nb_sections)]
+  def product_section():
+    for i in range(10):
+      for version in versions:
+        PROD.get_product_section(cfg, name, version)
+  best = BPYF.timeit(product_section, options.repeat)
+  print("product_section: %d sections, %d lookups, best of %d: %.3f s" % \
+        (options.nb_sections, 10 * len(versions), options.repeat, best))
+
+def bench_base_configs(datadir, application, options):
+  """
+  time of the search of the installation of a product in a base,
+  among --nb_sections config-<i> directories, the last one corresponding
+  """
+  cfg = get_config(datadir, application)
+  name = BPYF.product_name(1)
+  p_info = PROD.get_product_config(cfg, name)
+  depend = sorted(set(list(p_info.depend) + list(p_info.get("build_depend", []))))
+  prod_dir = os.path.join(os.path.dirname(datadir), "base", name + "-" + p_info.version)
+  for i in range(options.nb_sections):
+    config_dir = os.path.join(prod_dir, "config-%d" % (i + 1))
+    os.makedirs(config_dir)
+    with open(os.path.join(config_dir, PROD.CONFIG_FILENAME + name + ".pyconf"), "w") as f:
+      f.write("%s : '%s'\n" % (name, p_info.version))
+      for dep in depend:
+        last = i == options.nb_sections - 1
+        version = PROD.get_product_config(cfg, dep).version if last else "0.%d" % i
+        f.write("%s : '%s'\n" % (dep, version))
+  res = PROD.check_config_exists(cfg, prod_dir, p_info)
+  assert res == (True, config_dir), res
+  def base_configs():
+    for i in range(10):
+      PROD.check_config_exists(cfg, prod_dir, p_info)
+  best = BPYF.timeit(base_configs, options.repeat)
+  print("base_configs: %d config-<i> directories, 10 searches, best of %d: %.3f s" % \
+        (options.nb_sections, options.repeat, best))
+
+def bench_presence(datadir, application, options):
+  """
+  number of the file system calls (and time with --latency seconds added
+  to each call) of the checks of the sources and installations of all 
+  the products, as sat compile --show, with a PresenceChecker or not.
+  The sources and the installations of half the products are present.
+  """
+  cfg = get_config(datadir, application)
+  names = [BPYF.product_name(i) for i in range(options.nb_products)]
+  products_infos = PROD.get_products_infos(names, cfg)
+  for i, (name, p_info) in enumerate(products_infos):
+    if i % 2:
+      continue
+    for d in (p_info.source_dir, p_info.install_dir):
+      os.makedirs(d)
+    open(os.path.join(p_info.install_dir, PROD.CONFIG_FILENAME + name + ".pyconf"), "w").close()
+    for present_file in p_info.present_files.install:
+      os.makedirs(os.path.join(p_info.install_dir, present_file))
+  calls = [0]
+  def counting(func):
+    def counting_func(*args, **kwargs):
+      calls[0] += 1
+      if options.latency:
+        time.sleep(options.latency)
+      return func(*args, **kwargs)
+    return counting_func
+  functions = dict((f, getattr(os, f)) for f in ("stat", "lstat", "listdir", "scandir") if hasattr(os, f))
+  for with_checker in (False, True):
+    for f in functions:
+      setattr(os, f, counting(functions[f]))
+    calls[0] = 0
+    t0 = time.time()
+    try:
+      checker = PROD.PresenceChecker() if with_checker else None
+      res = [(PROD.check_source(p_info, checker), PROD.check_installation(cfg, p_info, checker))
+             for name, p_info in products_infos]
+    finally:
+      for f in functions:
+        setattr(os, f, functions[f])
+    assert res == [(i % 2 == 0, i % 2 == 0) for i in range(len(res))], res
+    print("presence: %d products, checker=%-5s: %.3f s, %d file system calls" % \
+          (options.nb_products, with_checker, time.time() - t0, calls[0]))
+
+class NullLogger(object):
+  """a logger which does not write, for the builders"""
+  def __init__(self):
+    self.logTxtFile = self
+  def write(self, *args, **kwargs):
+    pass
+  def flush(self):
+    pass
+  def warning(self, *args, **kwargs):
+    pass
+  def error(self, *args, **kwargs):
+    pass
+
+def bench_compile_products(datadir, application, options):
+  """
+  number of calls to get_product_config (and of the computations of a
+  product config) per compiled product, as sat compile does without
+  building: the config of the product, then its build environment
+  for the 3 steps (sat configure, sat make, sat makeinstall),
+  with one config for all the steps, or one config per step (sat subcommands)
+  """
+  names = [BPYF.product_name(i) for i in range(options.nb_products)]
+  logger = NullLogger()
+  get_product_config = PROD.get_product_config
+  calls = [0]
+  def counting_get_product_config(*args, **kwargs):
+    calls[0] += 1
+    return get_product_config(*args, **kwargs)
+  stats = getattr(PROD, "product_config_stats", {"misses": 0})
+  for config_per_step in (False, True):
+    PROD.get_product_config = counting_get_product_config
+    calls[0] = 0
+    misses = stats["misses"]
+    t0 = time.time()
+    try:
+      cfg = get_config(datadir, application)
+      for name in names:
+        if hasattr(PROD, "invalidate_product_config"):
+          PROD.invalidate_product_config(cfg, name)
+        p_info = PROD.get_product_config(cfg, name)
+        for step in ("configure", "make", "makeinstall"):
+          if config_per_step:
+            cfg = get_config(datadir, application)
+            p_info = PROD.get_product_config(cfg, name)
+          COMP.Builder(cfg, logger, name, p_info).prepare()
+    finally:
+      PROD.get_product_config = get_product_config
+    print("compile_products: %d products, one config per step=%-5s: %.3f s, "
+          "per product: %.1f get_product_config calls, %.1f computations" % \
+          (options.nb_products, config_per_step, time.time() - t0,
+           calls[0] / float(options.nb_products),
+           (stats["misses"] - misses) / float(options.nb_products)))
+
+def bench_lookup(datadir, application, options):
+  """
+  time of the membership tests in APPLICATION.products,
+  and of the path queries done by sat config --value
+  """
+  cfg = get_config(datadir, application)
+  names = [BPYF.product_name(i) for i in range(0, 2 * options.nb_products, 2)]
+  paths = ["PRODUCTS.%s.default.build_dir" % n for n in names[:options.nb_products // 2]]
+  def membership():
+    for name in names:
+      name in cfg.APPLICATION.products
+  def get_by_path():
+    for path in paths:
+      cfg.getByPath(path)
+  t_in = BPYF.timeit(membership, options.repeat)
+  t_path = BPYF.timeit(get_by_path, options.repeat)
+  print("lookup: %d products" % options.nb_products)
+  print("  'name in APPLICATION.products' : %6.2f us" % (1e6 * t_in / len(names)))
+  print("  getByPath('PRODUCTS.x.default.build_dir') : %6.2f us" % (1e6 * t_path / len(paths)))
+
+def bench_nested_commands(datadir, application, options):
+  """
+  time of the commands called by another one, as sat compile calls
+  sat configure, sat make and sat makeinstall for each product
+  (here sat clean --build of products without build directory),
+  with the config of the caller, or reading the config for each of them
+  """
+  # the commands import each other, as in the sat script
+  cmds_dir = os.path.join(BPYF.satdir, "commands")
+  if cmds_dir not in sys.path:
+    sys.path.insert(0, cmds_dir)
+  import src.salomeTools as SAT
+  runner = SAT.Sat(src.logger.getDefaultLogger())
+  runner.setInternals(opt=["-b"], datadir=datadir)
+  names = [BPYF.product_name(i) for i in range(options.nb_products)]
+  for reuse in (True, False):
+    runner.cfg = get_config(datadir, application)
+    logger = src.logger.Logger(runner.cfg, silent_sysstd=True)
+    stats = dict(SAT.config_stats)
+    t0 = time.time()
+    for name in names:
+      for step in range(3):
+        runner.clean(application + " --products " + name + " --build",
+                     options=None if reuse else runner.options,
+                     batch=True, verbose=0, logger_add_link=logger)
+    duration = time.time() - t0
+    logger.end_write({})
+    print("nested_commands: %d products, config of the caller=%-5s: %.3f s, "
+          "configs read: %d, reused: %d" % \
+          (options.nb_products, reuse, duration,
+           SAT.config_stats["loaded"] - stats["loaded"],
+           SAT.config_stats["reused"] - stats["reused"]))
+
+class CountingStream(object):
+  """a file-like object counting the calls of write, keeping nothing"""
+  def __init__(self):
+    self.writes = 0
+    self.size = 0
+  def write(self, text):
+    self.writes += 1
+    self.size += len(text)
+  def close(self):
+    pass
+
+def bench_save(datadir, application, options):
+  """
+  throughput of Config.__save__ on the config of the application,
+  as the dump of the config in the LOGS/OUT directory by the logger
+  """
+  cfg = get_config(datadir, application)
+  tmpfile = os.path.join(datadir, "save_bench.pyconf")
+  print("save: %d products" % options.nb_products)
+  for evaluated in (False, True):
+    counter = CountingStream()
+    cfg.__save__(counter, evaluated=evaluated)
+    def save():
+      with open(tmpfile, "w") as f:
+        cfg.__save__(f, evaluated=evaluated)
+    best = BPYF.timeit(save, options.repeat)
+    print("  evaluated=%-5s: %.1f kB, %6d calls of write, best of %d: %.3f s, %.1f MB/s" % \
+          (evaluated, counter.size / 1e3, counter.writes, options.repeat, best,
+           counter.size / 1e6 / best))
+
+_BENCHS = {
+  "get_config": bench_get_config,
+  "load_products": bench_load_products,
+  "lookup": bench_lookup,
+  "nested_commands": bench_nested_commands,
+  "one_product": bench_one_product,
+  "base_configs": bench_base_configs,
+  "compile_products": bench_compile_products,
+  "presence": bench_presence,
+  "product_configs": bench_product_configs,
+  "product_section": bench_product_section,
+  "products_infos": bench_products_infos,
+  "save": bench_save,
+}
+
+def main(args):
+  parser = AP.ArgumentParser(description="benchmarks of the sat configuration")
+  parser.add_argument("bench", choices=sorted(_BENCHS.keys()))
+  parser.add_argument("--repeat", type=int, default=3)
+  parser.add_argument("--nb_products", type=int, default=300)
+  parser.add_argument("--nb_sections", type=int, default=10,
+                      help="number of version sections of each product")
+  parser.add_argument("--latency", type=float, default=0.0,
+                      help="seconds added to each opening of a product file")
+  parser.add_argument("--profile", action="store_true",
+                      help="print the profile of one run instead")
+  options = parser.parse_args(args)
+
+  tmpdir = tempfile.mkdtemp(prefix="sat_bench_")
+  try:
+    datadir, application = BPYF.write_synthetic_sat_project(tmpdir, options.nb_products,
+                                                            options.nb_sections)
+    if options.profile:
+      import cProfile
+      import pstats
+      get_config(datadir, application)
+      profiler = cProfile.Profile()
+      profiler.runcall(_BENCHS[options.bench], datadir, application, options)
+      pstats.Stats(profiler).sort_stats("cumulative").print_stats(30)
+    else:
+      _BENCHS[options.bench](datadir, application, options)
+  finally:
+    shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+  main(sys.argv[1:])
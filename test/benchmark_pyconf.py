@@ -0,0 +1,588 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+benchmarks of the pyconf.py module (not a unittest file)
+
+| Usage:
+| >> python benchmark_pyconf.py tokenizer
+| >> python benchmark_pyconf.py tokenizer --repeat 5 /path/to/SAT_SALOME/products
+| >> python benchmark_pyconf.py parse_cache
+| >> python benchmark_pyconf.py memory --nb_products 1000
+| >> python benchmark_pyconf.py merge --nb_products 1000
+|
+| Without directories, the pyconf files of the sat tree and a synthetic
+| project of --nb_products products are used.
+"""
+
+import os
+import sys
+import glob
+import time
+import shutil
+import tempfile
+import argparse as AP
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+
+import src.pyconf as PYF
+
+_PRODUCT_TEMPLATE = """\
+default :
+{
+    name : "%(name)s"
+    build_source : "cmake"
+    cmake_options : "-DCMAKE_BUILD_TYPE=Release -DBUILD_SHARED_LIBS=ON"
+    get_source : "archive"
+    system_info :
+    {
+        rpm : []
+        rpm_dev : []
+        apt : []
+        apt_dev : []
+    }
+    environ :
+    {
+       env_script : $name + ".py" # environment of %(name)s
+    }
+    depend : [%(depend)s]
+    build_depend : [%(build_depend)s]
+    opt_depend : []
+    source_dir : $APPLICATION.workdir + $VARS.sep + 'SOURCES' + $VARS.sep + $name
+    build_dir : $APPLICATION.workdir + $VARS.sep + 'BUILD' + $VARS.sep + $name
+    install_dir : 'base'
+    properties :
+    {
+        incremental : "yes"
+        compile_time : "no"
+    }
+    patches : []
+    # files which are checked after the installation
+    present_files :
+    {
+        install : ['bin', 'lib']
+    }
+}
+"""
+
+_SECTION_TEMPLATE = """
+version_%(major)d_%(minor)d_0_to_%(major)d_%(minor)d_9 :
+{
+    cmake_options : "-DCMAKE_BUILD_TYPE=Release -DVERSION=%(major)d.%(minor)d"
+    patches : ['%(name)s-%(major)d.%(minor)d.patch']
+    depend : [%(depend)s]
+    comment : '''historical section
+%(name)s %(major)d.%(minor)d'''
+}
+"""
+
+def product_name(index):
+  """name of the synthetic product of the given index"""
+  return "PRODUCT_%03d" % index
+
+def product_pyconf(index, nb_sections=10):
+  """text of the synthetic pyconf file of a product, with nb_sections versions"""
+  name = product_name(index)
+  # each product depends on some of the previous ones
+  depend = ", ".join('"%s"' % product_name(d) for d in range(max(0, index - 3), index))
+  # and the first one is a build tool of the others
+  build_depend = '"%s"' % product_name(0) if index > 0 else ""
+  res = _PRODUCT_TEMPLATE % {"name": name, "depend": depend,
+                             "build_depend": build_depend}
+  for i in range(nb_sections):
+    res += _SECTION_TEMPLATE % {"name": name, "depend": depend,
+                                "major": 1 + i // 5, "minor": i % 5}
+  return res
+
+def write_synthetic_project(root, nb_products, nb_sections=10):
+  """
+  write in root/products the pyconf files of nb_products synthetic products,
+  and returns the list of their paths
+  """
+  products_dir = os.path.join(root, "products")
+  if not os.path.isdir(products_dir):
+    os.makedirs(products_dir)
+  res = []
+  for i in range(nb_products):
+    path = os.path.join(products_dir, product_name(i) + ".pyconf")
+    with open(path, "w") as f:
+      f.write(product_pyconf(i, nb_sections))
+    res.append(path)
+  return res
+
+_PROJECT_TEMPLATE = """\
+# synthetic project for the benchmarks
+project_path : $PWD + "/"
+APPLICATIONPATH : $project_path + "applications/"
+PRODUCTPATH : $project_path + "products/"
+ARCHIVEPATH : $project_path + "archives/"
+JOBPATH : $project_path + "jobs/"
+MACHINEPATH : $project_path + "machines/"
+git_info :
+{
+    default_git_server : "https://git.example.org/"
+}
+"""
+
+_APPLICATION_TEMPLATE = """\
+APPLICATION :
+{
+    name : '%(name)s'
+    workdir : $LOCAL.workdir + $VARS.sep + $APPLICATION.name + '-' + $VARS.dist
+    tag : 'master'
+    base : 'no'
+    environ :
+    {
+        build : { CMAKE_GENERATOR : "Unix Makefiles" }
+    }
+    products :
+    {
+%(products)s
+    }
+}
+"""
+
+_LOCAL_TEMPLATE = """\
+  LOCAL :
+  {
+    base : 'default'
+    workdir : '%(workdir)s'
+    log_dir : '%(logdir)s'
+    archive_dir : 'default'
+    VCS : 'unknown'
+    tag : 'unknown'
+  }
+  PROJECTS :
+  {
+    project_file_paths :
+    [
+      '%(project)s'
+    ]
+  }
+"""
+
+# version of the synthetic products in the synthetic application
+APPLICATION_VERSION = "2.3.4"
+
+_ENV_SCRIPT_TEMPLATE = """\
+def set_env(env, prereq_dir, version):
+    pass
+
+def set_nativ_env(env):
+    pass
+"""
+
+def write_synthetic_sat_project(root, nb_products, nb_sections=10):
+  """
+  write in root a synthetic sat project of nb_products products,
+  its application and a data directory using it.
+
+  :return: (the data directory, the name of the application)
+  """
+  write_synthetic_project(root, nb_products, nb_sections)
+  for d in ["applications", "archives", "jobs", "machines", "data", "work",
+            "products/env_scripts", "products/patches"]:
+    if not os.path.isdir(os.path.join(root, d)):
+      os.makedirs(os.path.join(root, d))
+  # the files of the products, for src.product.get_product_config
+  for i in range(nb_products):
+    files = [os.path.join("env_scripts", product_name(i) + ".py")]
+    for section in range(nb_sections):
+      files.append(os.path.join("patches", "%s-%d.%d.patch" % \
+                                (product_name(i), 1 + section // 5, section % 5)))
+    for f in files:
+      with open(os.path.join(root, "products", f), "w") as fs:
+        if f.endswith(".py"):
+          fs.write(_ENV_SCRIPT_TEMPLATE)
+  project_file = os.path.join(root, "synthetic.pyconf")
+  with open(project_file, "w") as f:
+    f.write(_PROJECT_TEMPLATE)
+  name = "SYNTHETIC_%d" % nb_products
+  products = "\n".join(["        %s : '%s'" % (product_name(i), APPLICATION_VERSION)
+                        for i in range(nb_products)])
+  with open(os.path.join(root, "applications", name + ".pyconf"), "w") as f:
+    f.write(_APPLICATION_TEMPLATE % {"name": name, "products": products})
+  datadir = os.path.join(root, "data")
+  with open(os.path.join(datadir, "local.pyconf"), "w") as f:
+    f.write(_LOCAL_TEMPLATE % {"workdir": os.path.join(root, "work"),
+                               "logdir": os.path.join(root, "logs"),
+                               "project": project_file})
+  return datadir, name
+
+def sat_pyconf_files():
+  """the pyconf files shipped in the sat tree"""
+  res = []
+  for pattern in ["src/internal_config/*.pyconf",
+                  "data/*.pyconf",
+                  "test/APPLI_TEST/*.pyconf"]:
+    res.extend(sorted(glob.glob(os.path.join(satdir, pattern))))
+  return res
+
+def pyconf_files_in(paths):
+  """all the pyconf files in the given files or directories"""
+  res = []
+  for path in paths:
+    if os.path.isdir(path):
+      res.extend(sorted(glob.glob(os.path.join(path, "*.pyconf"))))
+    else:
+      res.append(path)
+  return res
+
+class StreamConfigReader(PYF.ConfigReader):
+  """
+  This internal class implements the historical parser for configurations,
+  which reads the stream one character at a time.
+
+  It is kept as the reference implementation of the tokenizer of
+  pyconf.ConfigReader, for the unit tests and the benchmarks.
+  """
+
+  def location(self):
+    """
+    Return the current location (filename, line, column) in the stream
+    as a string.
+
+    Used when printing error messages,
+
+    @return: A string representing a location in the stream being read.
+    @rtype: str
+    """
+    return "%s(%d,%d)" % (self.filename, self.lineno, self.colno)
+
+  def getChar(self):
+    """
+    Get the next char from the stream. Update line and column numbers
+    appropriately.
+
+    @return: The next character from the stream.
+    @rtype: str
+    """
+    if self.pbchars:
+      c = self.pbchars.pop()
+      if isinstance(c,bytes):
+        c = c.decode()
+    else:
+      c = self.stream.read(1)
+      if isinstance(c,bytes):
+        c = c.decode()
+      self.colno += 1
+      if c == '\n':
+        self.lineno += 1
+        self.colno = 1
+    return c
+
+  def __repr__(self):
+    return "<StreamConfigReader at 0x%08x>" % id(self)
+
+  __str__ = __repr__
+
+  def getToken(self):
+    """
+    Get a token from the stream. String values are returned in a form
+    where you need to eval() the returned value to get the actual
+    string. The return value is (token_type, token_value).
+
+    Multiline string tokenizing is thanks to David Janes (BlogMatrix)
+
+    @return: The next token.
+    @rtype: A token tuple.
+    """
+    if self.pbtokens:
+      return self.pbtokens.pop()
+    stream = self.stream
+    self.comment = None
+    token = ''
+    tt = PYF.EOF
+    while True:
+      c = self.getChar()
+      if not c:
+        break
+      elif c == '#':
+        if self.comment :
+          self.comment += '#' + stream.readline()
+        else :
+          self.comment = stream.readline()
+        self.lineno += 1
+        continue
+      if c in self.quotes:
+        token = c
+        quote = c
+        tt = PYF.STRING
+        escaped = False
+        multiline = False
+        c1 = self.getChar()
+        if c1 == quote:
+          c2 = self.getChar()
+          if c2 == quote:
+            multiline = True
+            token += quote
+            token += quote
+          else:
+            self.pbchars.append(c2)
+            self.pbchars.append(c1)
+        else:
+          self.pbchars.append(c1)
+        while True:
+          c = self.getChar()
+          if not c:
+            break
+          token += c
+          if (c == quote) and not escaped:
+            if not multiline or (len(token) >= 6 and token.endswith(token[:3]) and token[-4] != '\\'):
+              break
+          if c == '\\':
+            escaped = not escaped
+          else:
+            escaped = False
+        if not c:
+          raise PYF.ConfigFormatError('%s: Unterminated quoted string: %r, %r' % (self.location(), token, c))
+        break
+      if c in self.whitespace:
+        self.lastc = c
+        continue
+      elif c in self.punct:
+        token = c
+        tt = c
+        if (self.lastc == ']') or (self.lastc in self.identchars):
+          if c == '[':
+            tt = PYF.LBRACK2
+          elif c == '(':
+            tt = PYF.LPAREN2
+        break
+      elif c in self.digits:
+        token = c
+        tt = PYF.NUMBER
+        while True:
+          c = self.getChar()
+          if not c:
+            break
+          if c in self.digits:
+            token += c
+          elif (c == '.') and token.find('.') < 0:
+            token += c
+          else:
+            if c and (c not in self.whitespace):
+              self.pbchars.append(c)
+            break
+        break
+      elif c in self.wordchars:
+        token = c
+        tt = PYF.WORD
+        c = self.getChar()
+        while c and (c in self.identchars):
+          token += c
+          c = self.getChar()
+        if c: # and c not in self.whitespace:
+          self.pbchars.append(c)
+        if token == "True":
+          tt = PYF.TRUE
+        elif token == "False":
+          tt = PYF.FALSE
+        elif token == "None":
+          tt = PYF.NONE
+        break
+      else:
+        raise PYF.ConfigFormatError('%s: Unexpected character: %r' % (self.location(), c))
+    if token:
+      self.lastc = token[-1]
+    else:
+      self.lastc = None
+    self.last_token = tt
+    
+    # Python 2.x specific unicode conversion
+    if sys.version_info[0] == 2 and tt == PYF.WORD and isinstance(token, unicode):
+      token = token.encode('ascii')
+    return (tt, token)
+
+  def setStream(self, stream):
+    """
+    Set the stream to the specified value, and prepare to read from it.
+
+    @param stream: A stream from which to load the configuration.
+    @type stream: A stream (file-like object).
+    """
+    self.stream = stream
+    if hasattr(stream, 'name'):
+      filename = stream.name
+    else:
+      filename = '?'
+    self.filename = filename
+    self.lineno = 1
+    self.colno = 1
+
+def parse(path, readerClass):
+  """parse the file path with an instance of readerClass"""
+  cfg = PYF.Config()
+  object.__setattr__(cfg, 'reader', readerClass(cfg))
+  cfg.load(open(path))
+  return cfg
+
+def timeit(func, repeat):
+  """best time of repeat calls of func"""
+  best = None
+  for i in range(repeat):
+    t0 = time.time()
+    func()
+    dt = time.time() - t0
+    if best is None or dt < best:
+      best = dt
+  return best
+
+def bench_tokenizer(files, repeat):
+  """compare the parse times of the buffered and of the historical readers"""
+  nb_bytes = sum(os.path.getsize(f) for f in files)
+  def run(readerClass):
+    for f in files:
+      parse(f, readerClass)
+  t_old = timeit(lambda: run(StreamConfigReader), repeat)
+  t_new = timeit(lambda: run(PYF.ConfigReader), repeat)
+  print("tokenizer: %d files, %.1f kB" % (len(files), nb_bytes / 1024.))
+  print("  StreamConfigReader (char by char) : %8.3f s" % t_old)
+  print("  ConfigReader (buffered)           : %8.3f s" % t_new)
+  print("  speedup                           : %8.2f" % (t_old / max(t_new, 1e-9)))
+
+def bench_parse_cache(files, repeat):
+  """compare the load times without parse cache, and with a cold and a warm cache"""
+  def run():
+    for f in files:
+      PYF.Config(open(f))
+  cache_dir = tempfile.mkdtemp(prefix="sat_bench_cache_")
+  try:
+    PYF.parseCache = None
+    t_none = timeit(run, repeat)
+    PYF.parseCache = PYF.ParseCache(cache_dir)
+    t_cold = timeit(run, 1)
+    t_warm = timeit(run, repeat)
+    hits = PYF.parseCache.hits
+  finally:
+    PYF.parseCache = None
+    shutil.rmtree(cache_dir)
+  print("parse cache: %d files, %d hits" % (len(files), hits))
+  print("  no cache   : %8.3f s" % t_none)
+  print("  cold cache : %8.3f s" % t_cold)
+  print("  warm cache : %8.3f s (%.2f ms per file)" % (t_warm, 1000. * t_warm / max(len(files), 1)))
+
+def load_products(files):
+  """load the files as the PRODUCTS section of a config, as sat config does"""
+  cfg = PYF.Config()
+  products_cfg = PYF.Config()
+  products_cfg.addMapping("PRODUCTS", PYF.Mapping(products_cfg), "The products\n")
+  for f in files:
+    name = os.path.splitext(os.path.basename(f))[0]
+    prod_cfg = PYF.Config(open(f), PWD=("", os.path.dirname(f)))
+    prod_cfg.from_file = f
+    products_cfg.PRODUCTS[name] = prod_cfg
+  PYF.ConfigMerger().merge(cfg, products_cfg)
+  return cfg
+
+def count_nodes(value):
+  """number of mappings, sequences, references and expressions of a config"""
+  res = 1
+  if isinstance(value, PYF.Mapping):
+    data = object.__getattribute__(value, 'data')
+    for key in value.keys():
+      res += count_nodes(data[key])
+  elif isinstance(value, PYF.Sequence):
+    for item in object.__getattribute__(value, 'data'):
+      res += count_nodes(item)
+  elif isinstance(value, PYF.Expression):
+    res += count_nodes(value.lhs) + count_nodes(value.rhs)
+  elif not isinstance(value, PYF.Reference):
+    res = 0
+  return res
+
+def bench_memory(files, repeat):
+  """memory of the PRODUCTS section of a config, measured with tracemalloc"""
+  import gc
+  try:
+    import tracemalloc
+  except ImportError:
+    print("memory: tracemalloc is not available with python %s" % sys.version.split()[0])
+    return
+  gc.collect()
+  tracemalloc.start()
+  t0 = time.time()
+  cfg = load_products(files)
+  dt = time.time() - t0
+  gc.collect()
+  current, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  nodes = count_nodes(cfg)
+  print("memory: %d files, %d nodes, loaded in %.3f s" % (len(files), nodes, dt))
+  print("  current : %8.1f kB (%.0f bytes per node)" % (current / 1024., float(current) / max(nodes, 1)))
+  print("  peak    : %8.1f kB" % (peak / 1024.))
+
+def bench_merge(files, repeat):
+  """
+  time of the merge of the PRODUCTS section into a config,
+  and of the merge of a second PRODUCTS section clashing with the first one
+  """
+  t_first = t_second = None
+  nb_files = len(files)
+  for i in range(repeat):
+    first = load_products(files)
+    second = load_products(files[:nb_files // 2])
+    third = load_products(files[nb_files // 2:])
+    cfg = PYF.Config()
+    t0 = time.time()
+    PYF.ConfigMerger().merge(cfg, first)
+    t1 = time.time()
+    PYF.ConfigMerger().merge(second, third)
+    t2 = time.time()
+    if t_first is None or t1 - t0 < t_first:
+      t_first = t1 - t0
+    if t_second is None or t2 - t1 < t_second:
+      t_second = t2 - t1
+  print("merge: %d files, %d nodes" % (nb_files, count_nodes(cfg)))
+  print("  PRODUCTS into a config          : %8.2f ms" % (1000. * t_first))
+  print("  PRODUCTS into a PRODUCTS section : %8.2f ms" % (1000. * t_second))
+
+_BENCHS = {
+  "tokenizer": bench_tokenizer,
+  "parse_cache": bench_parse_cache,
+  "memory": bench_memory,
+  "merge": bench_merge,
+}
+
+def main(args):
+  parser = AP.ArgumentParser(description="benchmarks of pyconf.py")
+  parser.add_argument("bench", choices=sorted(_BENCHS.keys()))
+  parser.add_argument("paths", nargs="*",
+                      help="pyconf files or directories of pyconf files")
+  parser.add_argument("--repeat", type=int, default=3)
+  parser.add_argument("--nb_products", type=int, default=300)
+  options = parser.parse_args(args)
+
+  tmpdir = None
+  if options.paths:
+    files = pyconf_files_in(options.paths)
+  else:
+    tmpdir = tempfile.mkdtemp(prefix="sat_bench_")
+    files = sat_pyconf_files() + write_synthetic_project(tmpdir, options.nb_products)
+  try:
+    _BENCHS[options.bench](files, options.repeat)
+  finally:
+    if tmpdir is not None:
+      shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+  main(sys.argv[1:])
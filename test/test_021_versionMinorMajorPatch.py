@@ -220,6 +220,35 @@ toto_from_2""".split("\n")
     with self.assertRaises(Exception): VMMP.getRange_majorMinorPatch("_from_3_to_2")
     with self.assertRaises(Exception): VMMP.getRange_majorMinorPatch("_from_3.2.5_to_V2_1_1")
 
+  def test_070(self):
+    MMP = VMMP.MinorMajorPatch
+    names = """\
+default
+version_7_8_0
+_from_1_to_2
+_from_2.0.1_to_3.5.0
+_from_3.5.0_to_4
+_from_10_to_12.0.3""".split("\n")
+    index = VMMP.RangesIndex_majorMinorPatch(names)
+    self.assertEqual(index.find(MMP("0.9.9")), [])
+    self.assertEqual(index.find(MMP("1")), ["_from_1_to_2"])
+    self.assertEqual(index.find(MMP("2.0.0")), ["_from_1_to_2"])
+    self.assertEqual(index.find(MMP("2.0.1")), ["_from_2.0.1_to_3.5.0"])
+    self.assertEqual(index.find(MMP("3.5.0")), ["_from_2.0.1_to_3.5.0", "_from_3.5.0_to_4"])
+    self.assertEqual(index.find(MMP("3.5.1")), ["_from_3.5.0_to_4"])
+    self.assertEqual(index.find(MMP("7.8.0")), [])
+    self.assertEqual(index.find(MMP("12.0.3")), ["_from_10_to_12.0.3"])
+    self.assertEqual(index.find(MMP("12.0.4")), [])
+    self.assertEqual(index.overlaps, [["_from_2.0.1_to_3.5.0", "_from_3.5.0_to_4"]])
+    self.assertEqual(VMMP.RangesIndex_majorMinorPatch(["default"]).find(MMP("1")), [])
+    with self.assertRaises(Exception): VMMP.RangesIndex_majorMinorPatch(["_from_3_to_2"])
+
+    v = VMMP.getCached_majorMinorPatch("V1_2_3")
+    self.assertEqual(v, MMP("1.2.3"))
+    self.assertIs(VMMP.getCached_majorMinorPatch("V1_2_3"), v)
+    with self.assertRaises(Exception): VMMP.getCached_majorMinorPatch("0_6c11")
+    with self.assertRaises(Exception): VMMP.getCached_majorMinorPatch("0_6c11")
+
 if __name__ == '__main__':
   unittest.main(exit=False)
   pass
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+dependency graphs of the products of an application
+"""
+
+import os
+import sys
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.graph as GRA
+
+verbose = False # True
+
+class TestCase(unittest.TestCase):
+  "Test the graph.py"""
+
+  def setUp(self):
+    # dependencies as the products of an application
+    self.dict_graph = {
+      "KERNEL": ["Python", "boost", "Python"],
+      "GUI": ["KERNEL", "qt"],
+      "Python": [],
+      "boost": ["Python"],
+      "qt": [],
+      "GEOM": ["GUI", "KERNEL"],
+    }
+
+  def test_010(self):
+    graph = GRA.Graph(self.dict_graph)
+    self.assertEqual(graph["KERNEL"], ["Python", "boost"])
+    self.assertEqual(graph.get_closure("GUI"), ["GUI", "KERNEL", "Python", "boost", "qt"])
+    self.assertEqual(graph.depth_search(["boost", "GUI"]), ["boost", "Python", "GUI", "KERNEL", "qt"])
+    self.assertEqual(GRA.depth_search(self.dict_graph, "GUI", ["KERNEL"]), ["KERNEL", "GUI", "qt"])
+
+    sorted_nodes = graph.topological_sort()
+    self.assertEqual(sorted(sorted_nodes), sorted(self.dict_graph))
+    for node in sorted_nodes:
+      for dep in graph[node]:
+        self.assertLess(sorted_nodes.index(dep), sorted_nodes.index(node))
+
+  def test_020(self):
+    graph = GRA.Graph(self.dict_graph)
+    self.assertEqual(graph.reverse()["Python"], ["KERNEL", "boost"])
+    self.assertEqual(graph.get_dependents(["boost"]), ["KERNEL", "GUI", "GEOM"])
+    self.assertEqual(graph.get_dependents(["GEOM"]), [])
+    self.assertTrue(graph.has_path("GEOM", ["boost", "qt"]))
+    self.assertTrue(graph.has_path("qt", ["qt"]))
+    self.assertFalse(graph.has_path("qt", ["GUI"]))
+    self.assertFalse(graph.has_path("unknown", ["GUI"]))
+
+  def test_030(self):
+    # errors, with all the nodes of a cycle
+    self.dict_graph["boost"].append("GEOM")
+    with self.assertRaises(src.SatException) as cm:
+      GRA.topological_sort(self.dict_graph)
+    self.assertIn("KERNEL -> boost -> GEOM -> GUI -> KERNEL", str(cm.exception))
+
+    self.dict_graph["boost"] = ["numpy"]
+    with self.assertRaises(src.SatException) as cm:
+      GRA.Graph(self.dict_graph).topological_sort()
+    self.assertIn("numpy product is referenced", str(cm.exception))
+    self.assertTrue(GRA.Graph(self.dict_graph).has_path("GEOM", ["numpy"]))
+
+  def test_040(self):
+    # no recursion limit
+    nb = 3 * sys.getrecursionlimit()
+    chain = dict(("P%d" % i, ["P%d" % (i - 1)] if i else []) for i in range(nb))
+    graph = GRA.Graph(chain)
+    self.assertEqual(len(graph.get_closure("P%d" % (nb - 1))), nb)
+    self.assertEqual(graph.topological_sort()[:2], ["P0", "P1"])
+    self.assertEqual(len(graph.get_dependents(["P0"])), nb - 1)
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
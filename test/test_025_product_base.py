@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+installations of the products: config-<i> directories in a base
+and their index, checks of the presence of the files,
+search of the files in the directories of a path,
+sections of the product definitions
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.debug as DBG
+import src.pyconf as PYF
+import src.product as PROD
+
+verbose = False # True
+
+class TestCase(unittest.TestCase):
+  "Test the check_config_exists and PresenceChecker of product.py, find_file_in_lpath"""
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp(prefix="sat_test_025_")
+    self.prod_dir = os.path.join(self.tmpdir, "PROD-1.0")
+    os.makedirs(os.path.join(self.prod_dir, "config-1"))
+    self.write_sat_config("config-1", "1.0")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def write_sat_config(self, config_dir, version):
+    config_file = os.path.join(self.prod_dir, config_dir, "sat-config-PROD.pyconf")
+    with open(config_file, "w") as f:
+      f.write("PROD : '%s'\n" % version)
+    return config_file
+
+  def get_prod_info(self, version):
+    prod_info = PYF.Config()
+    prod_info.name = "PROD"
+    prod_info.version = version
+    prod_info.depend = PYF.Sequence()
+    prod_info.install_dir = os.path.join(self.prod_dir, "config-2")
+    return prod_info
+
+  def check(self, version):
+    stats = dict(PROD.config_index_stats)
+    res = PROD.check_config_exists(None, self.prod_dir, self.get_prod_info(version))
+    return res, dict((k, PROD.config_index_stats[k] - stats[k]) for k in stats)
+
+  def test_010(self):
+    # the sat-config file is read once, then found in the index
+    expected = (True, os.path.join(self.prod_dir, "config-1"))
+    self.assertEqual(self.check("1.0"), (expected, {"hits": 0, "misses": 1}))
+    self.assertTrue(os.path.exists(os.path.join(self.prod_dir, PROD.CONFIG_INDEX_FILENAME)))
+    self.assertEqual(self.check("1.0"), (expected, {"hits": 1, "misses": 0}))
+    self.assertEqual(self.check("2.0"), ((False, None), {"hits": 1, "misses": 0}))
+
+  def test_020(self):
+    # a changed sat-config file is read again
+    self.check("1.0")
+    config_file = self.write_sat_config("config-1", "2.0")
+    st = os.stat(config_file)
+    os.utime(config_file, (st.st_atime, st.st_mtime + 10))
+    expected = (True, os.path.join(self.prod_dir, "config-1"))
+    self.assertEqual(self.check("2.0"), (expected, {"hits": 0, "misses": 1}))
+    self.assertEqual(self.check("1.0"), ((False, None), {"hits": 1, "misses": 0}))
+
+  def test_030(self):
+    # the index is completed by add_compile_config_file
+    self.check("1.0")
+    prod_info = self.get_prod_info("2.0")
+    os.makedirs(prod_info.install_dir)
+    PROD.add_compile_config_file(prod_info, None)
+    index = PROD.read_config_index(self.prod_dir)
+    self.assertEqual(sorted(index), ["config-1", "config-2"])
+    self.assertEqual(index["config-2"]["versions"], {"PROD": "2.0"})
+    expected = (True, prod_info.install_dir)
+    res, stats = self.check("2.0")
+    self.assertEqual((res, stats["misses"]), (expected, 0))
+
+    # and without index, the config-<i> directories are read
+    os.remove(os.path.join(self.prod_dir, PROD.CONFIG_INDEX_FILENAME))
+    res, stats = self.check("2.0")
+    self.assertEqual((res, stats["hits"]), (expected, 0))
+
+  def test_040(self):
+    # the presence of the files, with one listing per directory
+    checker = PROD.PresenceChecker()
+    prod_info = self.get_prod_info("1.0")
+    prod_info.install_dir = os.path.join(self.prod_dir, "config-1")
+    prod_info.get_source = "archive"
+    prod_info.present_files = PYF.Mapping()
+    prod_info.present_files.install = PYF.Sequence()
+    prod_info.present_files.install.append("bin", None)
+    self.assertFalse(PROD.check_installation(None, prod_info, checker))
+    os.mkdir(os.path.join(prod_info.install_dir, "bin"))
+    # the listing is kept until invalidate
+    self.assertFalse(PROD.check_installation(None, prod_info, checker))
+    checker.invalidate(os.path.join(prod_info.install_dir, "bin"))
+    self.assertTrue(PROD.check_installation(None, prod_info, checker))
+    self.assertEqual(checker.stats["listings"], 2)
+    for path in [self.prod_dir, "config-1", "config-1/bin", "config-1/bin/", "config-2",
+                 "config-1/../config-1/bin", "config-1/sat-config-PROD.pyconf/x"]:
+      path = os.path.join(self.prod_dir, path)
+      self.assertEqual(checker.exists(path), os.path.exists(path), path)
+
+  def make_old(self, path, age):
+    # not modified in the last seconds: its listing is kept
+    t = int(time.time()) - age
+    os.utime(path, (t, t))
+
+  def listings(self, func):
+    stats = dict(src.directory_listing_stats)
+    res = func()
+    return res, src.directory_listing_stats["listings"] - stats["listings"]
+
+  def test_050(self):
+    # the first directory of the path having the file wins,
+    # the missing directories and the files of the path are ignored
+    dirs = [os.path.join(self.tmpdir, d) for d in ["d1", "d2", "d3"]]
+    for d in dirs[1:]:
+      os.makedirs(os.path.join(d, "sub"))
+      with open(os.path.join(d, "sub", "a.pyconf"), "w") as f:
+        f.write("")
+    with open(os.path.join(dirs[2], "b.pyconf"), "w") as f:
+      f.write("")
+    lpath = [dirs[0], os.path.join(dirs[2], "b.pyconf")] + dirs[1:]
+    self.assertEqual(src.find_file_in_lpath("a.pyconf", lpath, "sub"),
+                     os.path.join(dirs[1], "sub", "a.pyconf"))
+    self.assertEqual(src.find_file_in_lpath("b.pyconf", lpath),
+                     os.path.join(dirs[2], "b.pyconf"))
+    self.assertFalse(src.find_file_in_lpath("c.pyconf", lpath))
+    self.assertFalse(src.find_file_in_lpath("b.pyconf", lpath, "sub"))
+    self.assertIsNone(src.get_directory_listing(dirs[0]))
+    self.assertIsNone(src.get_directory_listing(os.path.join(dirs[2], "b.pyconf")))
+
+  def test_060(self):
+    # a directory is listed again when it changes, or if it was just modified
+    directory = os.path.join(self.tmpdir, "products")
+    os.mkdir(directory)
+    path = os.path.join(directory, "a.pyconf")
+    with open(path, "w") as f:
+      f.write("")
+    find = lambda: src.find_file_in_lpath("a.pyconf", [directory])
+    self.assertEqual(self.listings(find), (path, 1))
+    self.assertEqual(self.listings(find), (path, 1)) # just modified, not kept
+    self.make_old(directory, 200)
+    self.assertEqual(self.listings(find), (path, 1))
+    self.assertEqual(self.listings(find), (path, 0))
+    # a removed file
+    os.remove(path)
+    self.assertEqual(self.listings(find), (False, 1))
+    # an added file, with an old modification time of the directory
+    with open(path, "w") as f:
+      f.write("")
+    self.make_old(directory, 100)
+    self.assertEqual(self.listings(find), (path, 1))
+    self.assertEqual(self.listings(find), (path, 0))
+    # a removed directory
+    shutil.rmtree(directory)
+    self.assertEqual(self.listings(find), (False, 0))
+    self.assertNotIn(directory, src._directory_listings)
+
+  def get_section(self, cfg, version):
+    pi = PROD.get_product_section(cfg, "P", version)
+    return None if pi is None else pi.section
+
+  def test_070(self):
+    # the section of a version: the version_ section, else the only range
+    # containing it, else the default section
+    cfg = PYF.Config(DBG.InStream("""\
+PRODUCTS : { P : {
+  from_file : 'P.pyconf'
+  default : { name : 'default' }
+  version_1_5_0 : { name : '1.5.0' }
+  version_1_0_0_to_2_0_0 : { name : 'range 1 to 2' }
+  _from_2_0_1_to_3_0_0 : { name : 'range 2.0.1 to 3' }
+  _from_3_0_0_to_4_0_0 : { name : 'range 3 to 4' }
+} }
+"""))
+    self.assertEqual(self.get_section(cfg, "1_5_0"), "version_1_5_0")
+    self.assertEqual(self.get_section(cfg, "1.5.1"), "version_1_0_0_to_2_0_0")
+    self.assertEqual(self.get_section(cfg, "2.0.0"), "version_1_0_0_to_2_0_0")
+    self.assertEqual(self.get_section(cfg, "2.0.1"), "_from_2_0_1_to_3_0_0")
+    self.assertEqual(self.get_section(cfg, "V4_0_0"), "_from_3_0_0_to_4_0_0")
+    self.assertEqual(self.get_section(cfg, "4.0.1"), "default")
+    self.assertEqual(self.get_section(cfg, "0_9"), "default")
+    # not a version number
+    self.assertEqual(self.get_section(cfg, "master"), "default")
+    self.assertEqual(self.get_section(cfg, "0_6c11"), "default")
+    # in two overlapping ranges: no section
+    self.assertIsNone(self.get_section(cfg, "3.0.0"))
+
+  def test_080(self):
+    # the index of the ranges is built again when the sections change
+    cfg = PYF.Config(DBG.InStream("""\
+PRODUCTS : { P : {
+  from_file : 'P.pyconf'
+  default : { name : 'default' }
+  _from_1_to_2 : { name : 'range 1 to 2' }
+} }
+"""))
+    index = PROD.get_version_ranges_index("P", cfg.PRODUCTS.P)
+    self.assertIs(PROD.get_version_ranges_index("P", cfg.PRODUCTS.P), index)
+    self.assertEqual(self.get_section(cfg, "3.0.0"), "default")
+    cfg.PRODUCTS.P["_from_3_to_4"] = PYF.Config(DBG.InStream("name : 'range 3 to 4'\n"))
+    self.assertIsNot(PROD.get_version_ranges_index("P", cfg.PRODUCTS.P), index)
+    self.assertEqual(self.get_section(cfg, "3.0.0"), "_from_3_to_4")
+    self.assertEqual(self.get_section(cfg, "1.5.0"), "_from_1_to_2")
+    # another product with the same sections has its own index
+    self.assertIsNot(PROD.get_version_ranges_index("Q", cfg.PRODUCTS.P),
+                     PROD.get_version_ranges_index("P", cfg.PRODUCTS.P))
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
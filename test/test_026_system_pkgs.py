@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+checks of the system packages, with the snapshot of the dpkg database
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.system as SYSS
+
+verbose = False # True
+
+_STATUS = """\
+Package: libfoo1
+Status: install ok installed
+Architecture: amd64
+Multi-Arch: same
+Version: 1.2-3
+Description: a library
+ on two lines
+
+Package: libfoo-dev
+Status: deinstall ok config-files
+Architecture: amd64
+Version: 1.2-3
+
+Package: bar
+Status: deinstall ok installed
+Architecture: all
+Version: 4.0
+"""
+
+class TestCase(unittest.TestCase):
+  "Test the check_system_pkgs of system.py"""
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp(prefix="sat_test_026_")
+    self.status_file = os.path.join(self.tmpdir, "status")
+    with open(self.status_file, "w") as f:
+      f.write(_STATUS)
+    self.saved = SYSS.DPKG_STATUS_FILE
+    SYSS.DPKG_STATUS_FILE = self.status_file
+
+  def tearDown(self):
+    SYSS.DPKG_STATUS_FILE = self.saved
+    SYSS._pkg_snapshots.pop("dpkg", None)
+    shutil.rmtree(self.tmpdir)
+
+  def test_010(self):
+    self.assertEqual(SYSS._read_dpkg_status(self.status_file),
+                     [("libfoo1", "1.2-3", "amd64", "ii"),
+                      ("libfoo-dev", "1.2-3", "amd64", "rc"),
+                      ("bar", "4.0", "all", "ri")])
+
+  def test_020(self):
+    # the database is read once, while not changed
+    snapshots = SYSS.pkg_snapshot_stats["snapshots"]
+    for cmd in (["dpkg-query", "-l"], ["apt", "list", "--installed"]):
+      res = SYSS.check_system_pkgs(cmd, ["libfoo", "libfoo-dev", "bar"])
+      self.assertIn("libfoo1", res["libfoo"])
+      self.assertIn("not installed", res["libfoo-dev"])
+      self.assertIn("bar", res["bar"])
+    self.assertEqual(SYSS.pkg_snapshot_stats["snapshots"], snapshots + 1)
+
+    with open(self.status_file, "a") as f:
+      f.write("\nPackage: libfoo-dev\nStatus: install ok installed\nVersion: 1.2-3\n")
+    st = os.stat(self.status_file)
+    os.utime(self.status_file, (st.st_atime, st.st_mtime + 10))
+    res = SYSS.check_system_pkgs(["dpkg-query", "-l"], ["libfoo-dev"])
+    self.assertIn("libfoo-dev 1.2-3 is installed", res["libfoo-dev"])
+    self.assertEqual(SYSS.pkg_snapshot_stats["snapshots"], snapshots + 2)
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+descriptions of the git repositories, kept while they do not change
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess as SP
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.system as SYSS
+
+verbose = False # True
+
+class TestCase(unittest.TestCase):
+  "Test the GitDescribeCache of system.py"""
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp(prefix="sat_test_027_")
+    self.repo = os.path.join(self.tmpdir, "repo")
+    os.mkdir(self.repo)
+    self.git("init", "-q")
+    self.commit("first")
+    self.git("tag", "V1")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def git(self, *args):
+    cmd = ["git", "-c", "user.name=sat", "-c", "user.email=sat@sat"] + list(args)
+    SP.check_call(cmd, cwd=self.repo)
+
+  def commit(self, message):
+    self.git("commit", "-q", "--allow-empty", "-m", message)
+
+  def test_010(self):
+    cache = SYSS.GitDescribeCache(os.path.join(self.tmpdir, "cache"))
+    self.assertEqual(cache.describe(self.repo), "V1")
+    self.assertEqual(cache.describe(self.repo), "V1")
+    self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    # read again from the cache file
+    cache = SYSS.GitDescribeCache(os.path.join(self.tmpdir, "cache"))
+    self.assertEqual(cache.describe(self.repo), "V1")
+    self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    # a new commit, a new tag
+    self.commit("second")
+    self.assertTrue(cache.describe(self.repo).startswith("V1-1-g"))
+    self.git("tag", "V2")
+    self.assertEqual(cache.describe(self.repo), "V2")
+    self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    # not a git repository
+    self.assertFalse(cache.describe(self.tmpdir))
+
+  def test_020(self):
+    git_dir = os.path.join(self.repo, ".git")
+    self.git("checkout", "-q", "-b", "dev")
+    inputs = SYSS.git_describe_inputs(self.repo)
+    head = os.path.join(git_dir, "HEAD")
+    ref = os.path.join(git_dir, "refs", "heads", "dev")
+    self.assertEqual(inputs["contents"], [head, ref])
+    for path in [git_dir, head, os.path.join(git_dir, "packed-refs"),
+                 os.path.join(git_dir, "refs", "tags"), ref]:
+      self.assertIn(path, inputs["paths"])
+
+    # the contents of HEAD and of the reference are in the fingerprint
+    fingerprint = SYSS.GitDescribeCache.fingerprint(self.repo)
+    contents = dict((path, value) for path, value in fingerprint
+                    if path in inputs["contents"])
+    self.assertEqual(contents[head], "ref: refs/heads/dev")
+    with open(ref) as f:
+      self.assertEqual(contents[ref], f.read().strip())
+
+    # a detached HEAD has no reference
+    self.git("checkout", "-q", "--detach")
+    self.assertEqual(SYSS.git_describe_inputs(self.repo)["contents"], [head])
+
+    # not a git repository
+    inputs = SYSS.git_describe_inputs(self.tmpdir)
+    self.assertEqual(inputs["contents"], [])
+    self.assertIn(os.path.join(self.tmpdir, ".git"), inputs["paths"])
+
+    # a worktree has a .git file
+    worktree = os.path.join(self.tmpdir, "worktree")
+    self.git("worktree", "add", "-q", worktree)
+    self.assertIsNone(SYSS.git_describe_inputs(worktree))
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
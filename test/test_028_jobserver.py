@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+processor slots shared by the builds of sat compile --jobs
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.jobserver as JOBS
+
+verbose = False # True
+
+_MAKEFILE = """\
+all: t1 t2 t3 t4
+t1 t2 t3 t4:
+\t@echo $@ >> started; sleep 0.3
+"""
+
+def has_make():
+  try:
+    return subprocess.call(["make", "--version"], stdout=subprocess.PIPE,
+                           stderr=subprocess.STDOUT) == 0
+  except OSError:
+    return False
+
+@unittest.skipIf(not hasattr(os, "mkfifo"), "no named pipes")
+class TestCase(unittest.TestCase):
+  "Test the jobserver.py"""
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp(prefix="sat_test_028_")
+    self.jobserver = JOBS.JobServer.create(2)
+
+  def tearDown(self):
+    self.jobserver.close()
+    shutil.rmtree(self.tmpdir)
+    os.environ.pop(JOBS.ENVIRON_VARIABLE, None)
+
+  def get_free_slots(self):
+    res = 0
+    os.environ.update(self.jobserver.get_environ())
+    other = JOBS.get_jobserver()  # as a sat command run by sat compile
+    self.assertEqual(other.path, self.jobserver.path)
+    import select
+    while select.select([other.fd], [], [], 0)[0]:
+      other.acquire()
+      res += 1
+    for i in range(res):
+      other.release()
+    return res
+
+  def test_010(self):
+    self.assertIsNone(JOBS.get_jobserver())
+    self.jobserver.acquire()
+    self.assertEqual(self.get_free_slots(), 1)
+    self.jobserver.release()
+    self.assertEqual(self.get_free_slots(), 2)
+
+  @unittest.skipIf(not has_make(), "no make command")
+  def test_020(self):
+    # make takes its jobs from the slots: 2 jobs at most, the tokens are given back
+    with open(os.path.join(self.tmpdir, "Makefile"), "w") as f:
+      f.write(_MAKEFILE)
+    env = dict(os.environ)
+    env["MAKEFLAGS"] = self.jobserver.get_makeflags()
+    self.jobserver.acquire()
+    t0 = time.time()
+    res = subprocess.call("make", shell=True, cwd=self.tmpdir, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          **self.jobserver.get_popen_kwargs())
+    duration = time.time() - t0
+    self.jobserver.release()
+    self.assertEqual(res, 0)
+    with open(os.path.join(self.tmpdir, "started")) as f:
+      self.assertEqual(len(f.readlines()), 4)
+    self.assertGreater(duration, 0.55)
+    self.assertEqual(self.get_free_slots(), 2)
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
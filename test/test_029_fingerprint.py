@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+fingerprints of the products for sat compile --update
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.fingerprint as FP
+
+verbose = False # True
+
+def has_git():
+  try:
+    return subprocess.call(["git", "--version"], stdout=subprocess.PIPE,
+                           stderr=subprocess.STDOUT) == 0
+  except OSError:
+    return False
+
+class TestCase(unittest.TestCase):
+  "Test the fingerprint.py"""
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp(prefix="sat_test_029_")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def write(self, name, content):
+    path = os.path.join(self.tmpdir, name)
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+      f.write(content)
+
+  def git(self, *args):
+    cmd = ["git", "-c", "user.name=sat", "-c", "user.email=sat@test"] + list(args)
+    subprocess.check_call(cmd, cwd=self.tmpdir,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+  def test_010(self):
+    # the files in sub directories, not the dates of the directories
+    self.write("a.txt", "a")
+    self.write("sub/b.txt", "b")
+    res = FP.get_directory_hash(self.tmpdir)
+    self.assertEqual(FP.get_directory_hash(self.tmpdir), res)
+    self.write("sub/b.txt", "c")
+    self.assertNotEqual(FP.get_directory_hash(self.tmpdir), res)
+    self.assertIsNone(FP.get_directory_hash(os.path.join(self.tmpdir, "none")))
+
+  @unittest.skipIf(not has_git(), "no git command")
+  def get_git_objects(self):
+    res = []
+    for root, dirs, files in os.walk(os.path.join(self.tmpdir, ".git", "objects")):
+      res += [os.path.join(root, f) for f in files]
+    return sorted(res)
+
+  def test_020(self):
+    # the git tree of the working directory, with its local modifications
+    self.write("a.txt", "a")
+    self.write("sub/b.txt", "b")
+    self.git("init", "-q", ".")
+    self.git("add", "--all")
+    self.git("commit", "-q", "-m", "init")
+    objects = self.get_git_objects()
+    res = FP.get_git_tree_hash(self.tmpdir)
+    self.assertEqual(len(res), 40)
+    self.write("sub/b.txt", "c")
+    modified = FP.get_git_tree_hash(self.tmpdir)
+    self.assertNotEqual(modified, res)
+    self.write("sub/b.txt", "b")
+    self.assertEqual(FP.get_git_tree_hash(self.tmpdir), res)
+    # the index of the repository is not changed
+    self.write("sub/c.txt", "c")
+    self.assertNotEqual(FP.get_git_tree_hash(self.tmpdir), res)
+    out = subprocess.check_output(["git", "status", "--porcelain"], cwd=self.tmpdir)
+    self.assertEqual(out.decode().split(), ["??", "sub/c.txt"])
+    # and no object is written in the repository
+    self.assertEqual(self.get_git_objects(), objects)
+    self.assertIsNone(FP.get_git_tree_hash(os.path.join(self.tmpdir, "sub")))
+
+  def test_030(self):
+    old = {"fingerprint": "1", "parts": {"sources": "s", "build": "b"},
+           "depends": {"A": "a", "B": "b"}}
+    new = {"fingerprint": "2", "parts": {"sources": "t", "build": "b"},
+           "depends": {"A": "a", "B": "c"}}
+    self.assertEqual(FP.get_changes(old, new), ["sources", "depend B"])
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+artifact cache of the installations of the compiled products
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.artifacts as ART
+
+verbose = False # True
+
+class TestCase(unittest.TestCase):
+  "Test the artifacts.py"""
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp(prefix="sat_test_030_")
+    self.cache = ART.ArtifactCache(os.path.join(self.tmpdir, "cache"))
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def make_install(self, name, size=100):
+    install_dir = os.path.join(self.tmpdir, "INSTALL", name)
+    os.makedirs(os.path.join(install_dir, "lib"))
+    with open(os.path.join(install_dir, "lib", "lib%s.so" % name), "wb") as f:
+      f.write(os.urandom(size)) # not compressed
+    os.symlink("lib%s.so" % name, os.path.join(install_dir, "lib", "lib%s.so.1" % name))
+    return install_dir
+
+  def test_010(self):
+    # the installation is stored, and restored as it was
+    install_dir = self.make_install("A")
+    self.assertFalse(self.cache.restore("A", "k1", install_dir))
+    self.assertTrue(self.cache.store("A", "k1", install_dir))
+    shutil.rmtree(install_dir)
+    self.assertFalse(self.cache.restore("A", "k2", install_dir))
+    self.assertTrue(self.cache.restore("A", "k1", install_dir))
+    self.assertEqual(os.readlink(os.path.join(install_dir, "lib", "libA.so.1")), "libA.so")
+    self.assertEqual(os.path.getsize(os.path.join(install_dir, "lib", "libA.so")), 100)
+    stats = self.cache.get_stats()
+    self.assertEqual(stats["archives"], 1)
+    self.assertEqual(list(stats["products"].keys()), ["A"])
+
+  def test_020(self):
+    # the least recently used archives are removed first
+    for i, name in enumerate(["A", "B", "C"]):
+      self.assertTrue(self.cache.store(name, "k", self.make_install(name, 10000)))
+      os.utime(self.cache.get_path(name, "k"), (1000 + i, 1000 + i))
+    # A is used again
+    self.assertTrue(self.cache.restore("A", "k", os.path.join(self.tmpdir, "other")))
+    sizes = dict((a[2], a[1]) for a in self.cache.get_archives())
+    removed, removed_size = self.cache.prune(sizes["A"] + sizes["C"])
+    self.assertEqual(removed, [self.cache.get_path("B", "k")])
+    self.assertEqual(removed_size, sizes["B"])
+    self.assertEqual([a[2] for a in self.cache.get_archives()], ["C", "A"])
+    # with a maximum size, the cache is pruned when an installation is stored
+    self.cache.max_size = sizes["A"]
+    os.utime(self.cache.get_path("A", "k"), (2000, 2000))
+    self.assertTrue(self.cache.store("D", "k", self.make_install("D", 10)))
+    self.assertEqual([a[2] for a in self.cache.get_archives()], ["D"])
+
+  def test_030(self):
+    # the files of the previous installation are removed before the restore
+    install_dir = self.make_install("A")
+    self.assertTrue(self.cache.store("A", "k", install_dir))
+    stale = os.path.join(install_dir, "lib", "libOld.so")
+    with open(stale, "w") as f:
+      f.write("old")
+    self.assertTrue(self.cache.restore("A", "k", install_dir))
+    self.assertFalse(os.path.exists(stale))
+    self.assertTrue(os.path.isfile(os.path.join(install_dir, "lib", "libA.so")))
+    # a damaged archive leaves no installation
+    path = self.cache.get_path("A", "k")
+    with open(path, "r+b") as f:
+      f.truncate(os.path.getsize(path) // 2)
+    self.assertFalse(self.cache.restore("A", "k", install_dir))
+    self.assertFalse(os.path.exists(install_dir))
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+scheduling of the compile jobs of sat compile --jobs
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.salomeTools # install _ for the commands
+sys.path.insert(0, os.path.join(initializeTest.satdir, "commands"))
+import compile as COMP
+
+verbose = False # True
+
+class FakeJob(COMP.CompileJob):
+  """a job ending after a number of checks, without child process"""
+
+  def __init__(self, runner, p_name, depend, polls=1, res=0, exclusive=False):
+    COMP.CompileJob.__init__(self, p_name, None, depend, exclusive)
+    self.runner = runner
+    self.polls = polls
+    self.expected_res = res
+
+  def start(self, *args):
+    self.proc = True
+    self.runner.start(self)
+
+  def poll(self):
+    if self.res is None and self.proc is not None:
+      self.polls -= 1
+      if self.polls <= 0:
+        self.res = self.expected_res
+        self.runner.running.remove(self)
+    return self.res is not None
+
+  def stop(self):
+    if self.proc is None or self.res is not None:
+      return
+    self.res = -15
+    self.runner.running.remove(self)
+
+class FakeRunner(object):
+  """the traces of the jobs run by run_compile_jobs"""
+
+  def __init__(self):
+    self.running = []
+    self.started = []
+    self.ended = []
+    self.skipped = []
+    self.interrupted = []
+    self.max_running = 0
+
+  def start(self, job):
+    self.running.append(job)
+    self.started.append(job.p_name)
+    self.max_running = max(self.max_running, len(self.running))
+
+  def end_job(self, job, interrupted):
+    if interrupted:
+      self.interrupted.append(job.p_name)
+      return 0
+    self.ended.append((job.p_name, job.res))
+    return 1 if job.res != 0 else 0
+
+  def skip_job(self, job, failed):
+    self.skipped.append((job.p_name, failed))
+
+  def run(self, jobs, nb_jobs, stop_first_fail=False):
+    return COMP.run_compile_jobs(jobs, nb_jobs, stop_first_fail,
+                                 lambda job: job.start(),
+                                 self.end_job, self.skip_job,
+                                 poll_interval=0)
+
+def get_serial_result(jobs):
+  """the products compiled and the failures of compile_all_products:
+  in the topological order, without the products whose dependencies failed"""
+  compiled = []
+  failed = set()
+  for job in jobs:
+    if [d for d in job.depend if d.p_name in failed]:
+      failed.add(job.p_name)
+      continue
+    compiled.append(job.p_name)
+    if job.expected_res != 0:
+      failed.add(job.p_name)
+  return compiled, len([j for j in jobs if j.p_name in compiled and j.expected_res != 0])
+
+class TestCase(unittest.TestCase):
+  "Test the scheduling of the compile jobs"""
+
+  def get_diamond(self, runner, res_b=0):
+    # A <- B, A <- C, B and C <- D, E alone
+    a = FakeJob(runner, "A", [], polls=2)
+    b = FakeJob(runner, "B", [a], polls=3, res=res_b)
+    c = FakeJob(runner, "C", [a], polls=1)
+    d = FakeJob(runner, "D", [b, c], polls=1)
+    e = FakeJob(runner, "E", [], polls=4)
+    return [a, b, c, d, e]
+
+  def test_010(self):
+    # diamond: D starts after B and C, B and C at the same time after A
+    runner = FakeRunner()
+    jobs = self.get_diamond(runner)
+    self.assertEqual(runner.run(jobs, 3), 0)
+    self.assertEqual(runner.started, ["A", "E", "B", "C", "D"])
+    self.assertEqual(sorted(runner.ended), [(n, 0) for n in "ABCDE"])
+    ended = [n for n, _ in runner.ended]
+    self.assertLess(ended.index("B"), ended.index("D"))
+    self.assertLess(ended.index("C"), ended.index("D"))
+    self.assertEqual(runner.max_running, 3)
+    self.assertEqual(runner.skipped, [])
+
+  def test_020(self):
+    # B fails: D is not compiled, the other products are
+    runner = FakeRunner()
+    jobs = self.get_diamond(runner, res_b=2)
+    self.assertEqual(runner.run(jobs, 2), 1)
+    self.assertEqual(runner.skipped, [("D", ["B"])])
+    self.assertEqual(sorted(runner.ended), [("A", 0), ("B", 2), ("C", 0), ("E", 0)])
+    self.assertLessEqual(runner.max_running, 2)
+    self.assertEqual(runner.running, [])
+
+  def test_030(self):
+    # B fails with stop_first_fail: the running jobs are stopped,
+    # and the pending ones are not started
+    runner = FakeRunner()
+    jobs = self.get_diamond(runner, res_b=2)
+    jobs[4].polls = 10 # E is still running when B fails
+    self.assertEqual(runner.run(jobs, 3, stop_first_fail=True), 1)
+    self.assertEqual(runner.interrupted, ["E"])
+    self.assertNotIn("D", runner.started)
+    self.assertEqual(runner.running, [])
+
+  def test_040(self):
+    # with one job, the same products and failures as compile_all_products
+    for res_b in [0, 2]:
+      runner = FakeRunner()
+      jobs = self.get_diamond(runner, res_b=res_b)
+      compiled, nb_failed = get_serial_result(jobs)
+      self.assertEqual(runner.run(jobs, 1), nb_failed)
+      self.assertEqual(runner.started, compiled)
+      self.assertEqual([n for n, _ in runner.ended], compiled)
+      self.assertEqual(runner.max_running, 1)
+
+  def test_050(self):
+    # the products installed in a shared directory are compiled one at a time
+    runner = FakeRunner()
+    jobs = [FakeJob(runner, n, [], polls=2, exclusive=True) for n in "ABC"]
+    self.assertEqual(runner.run(jobs, 3), 0)
+    self.assertEqual(runner.max_running, 1)
+    self.assertEqual(runner.started, ["A", "B", "C"])
+
+  def test_060(self):
+    # the log directory of the child sat is not given by an overwrite,
+    # which would change the key of the config snapshot
+    class Options(object):
+      def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+    cfg = src.pyconf.Config()
+    cfg.VARS = src.pyconf.Mapping(cfg)
+    cfg.VARS.salometoolsway = initializeTest.satdir
+    cfg.VARS.application = "APP"
+    cfg.USER = src.pyconf.Mapping(cfg)
+    cfg.USER.output_verbose_level = 3
+    sat = Options(options=Options(debug_mode=False, overwrite=["USER.a=1"]))
+    options = Options(force=False, makeflags=None, check=False, clean_build_after=False)
+    cmd = COMP.get_compile_job_command(sat, cfg, options, "A")
+    self.assertEqual(cmd[cmd.index("-o") + 1], "USER.a=1")
+    self.assertEqual(cmd.count("-o"), 1)
+    self.assertEqual(cmd[-4:], ["compile", "APP", "--products", "A"])
+
+  def test_070(self):
+    # --update: a product whose fingerprint cannot be computed is not
+    # cleaned, the error is logged; the unexpected errors are raised
+    class Options(object):
+      def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+    class Fingerprints(object):
+      def __init__(self, exception):
+        self.exception = exception
+      def get(self, p_name):
+        raise self.exception
+    class Logger(object):
+      def __init__(self):
+        self.text = ""
+      def write(self, text, level=None):
+        self.text += text
+    tmpdir = tempfile.mkdtemp(prefix="sat_test_031_")
+    try:
+      cfg = src.pyconf.Config()
+      cfg.VARS = src.pyconf.Mapping(cfg)
+      cfg.VARS.application = "APP"
+      p_info = src.pyconf.Mapping(cfg)
+      p_info.name = "A"
+      p_info.get_source = "archive"
+      p_info.install_dir = tmpdir
+      cleaned = []
+      sat = Options(clean=lambda *args, **kwargs: cleaned.append(args))
+      options = Options(clean_all=False, clean_install=False, force=False,
+                        update=True, no_compile=False)
+      logger = Logger()
+      COMP.clean_products(sat, cfg, options, [("A", p_info)], None,
+                          Fingerprints(src.SatException("no sources")), logger)
+      self.assertEqual(cleaned, [])
+      self.assertIn("A", logger.text)
+      self.assertIn("no sources", logger.text)
+      self.assertRaises(ZeroDivisionError, COMP.clean_products,
+                        sat, cfg, options, [("A", p_info)], None,
+                        Fingerprints(ZeroDivisionError()), logger)
+    finally:
+      shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
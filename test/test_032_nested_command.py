@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+config of a command called by another one (sat make in sat compile, ...)
+"""
+
+import os
+import sys
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.salomeTools as SAT
+import src.loggingSimple as LOG
+sys.path.insert(0, os.path.join(initializeTest.satdir, "commands"))
+
+verbose = False # True
+
+class FakeLogger(object):
+  """the logger of the calling command, for the links to the called ones"""
+
+  def __init__(self):
+    self.links = []
+    self.l_logFiles = []
+
+  def add_link(self, log_file_name, command_name, command_res, full_launched_command):
+    self.links.append((command_name, command_res))
+
+class TestCase(unittest.TestCase):
+  "Test the config of the called commands"""
+
+  def setUp(self):
+    self.sat = SAT.Sat(LOG.getUnittestLogger())
+    self.sat.setInternals(opt=["-v", "0"])
+    cfgManager = SAT.CONFIG.ConfigManager()
+    self.sat.cfg = cfgManager.get_config(application="APPLI_TEST",
+                                         options=self.sat.options,
+                                         command="compile")
+    self.caller_cfg = self.sat.cfg
+    self.caller_vars = dict((v, self.caller_cfg.VARS[v])
+                            for v in SAT.CONFIG.ConfigManager.VOLATILE_VARS)
+    self.caller_verbose = self.caller_cfg.USER.output_verbose_level
+
+  def tearDown(self):
+    LOG.getUnittestLogger().getLogsAndClear()
+
+  def check_caller_config(self):
+    self.assertIs(self.sat.cfg, self.caller_cfg)
+    for v in SAT.CONFIG.ConfigManager.VOLATILE_VARS:
+      self.assertEqual(self.sat.cfg.VARS[v], self.caller_vars[v])
+    self.assertEqual(self.sat.cfg.USER.output_verbose_level, self.caller_verbose)
+
+  def test_010(self):
+    # the called command uses the config of the caller, set back at its end
+    parent = FakeLogger()
+    res = self.sat.config("APPLI_TEST -v VARS.command", verbose=1,
+                          logger_add_link=parent)
+    self.assertEqual(res, 0)
+    self.assertEqual(parent.links, [("config", 0)])
+    self.check_caller_config()
+
+  def test_020(self):
+    # also when the called command returns early for --help
+    self.sat.options.help = True
+    res = self.sat.config("APPLI_TEST", verbose=1, logger_add_link=FakeLogger())
+    self.assertEqual(res, 0)
+    self.check_caller_config()
+
+  def test_030(self):
+    # a called command with its own global options reads its own config,
+    # the caller keeps its config
+    options = SAT.parser.parse_args(["-v", "0", "-o", "USER.output_verbose_level=1"])[0]
+    res = self.sat.config("APPLI_TEST -v VARS.command", options=options,
+                          logger_add_link=FakeLogger())
+    self.assertEqual(res, 0)
+    self.check_caller_config()
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+configs of the products of the PRODUCTS section, read on their first access
+"""
+
+import os
+import sys
+import pickle
+import shutil
+import tempfile
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.debug as DBG
+import src.pyconf as PYF
+import src.product as PROD
+import src.salomeTools as SAT
+
+verbose = False # True
+
+class TestCase(unittest.TestCase):
+  "Test the DeferredProductConfig of product.py"""
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp(prefix="sat_test_033_")
+    self.dirs = [os.path.join(self.tmpdir, d) for d in ["products1", "products2"]]
+    for d in self.dirs:
+      os.mkdir(d)
+    self.stream_opener = PYF.streamOpener
+
+  def tearDown(self):
+    PYF.streamOpener = self.stream_opener
+    shutil.rmtree(self.tmpdir)
+
+  def write(self, directory, name, text):
+    with open(os.path.join(directory, name), "w") as f:
+      f.write(text)
+
+  def get_config(self, products=""):
+    cfg = PYF.Config(DBG.InStream("PRODUCTS : {%s}\n" % products))
+    cfg.PATHS = PYF.Mapping(cfg)
+    cfg.PATHS.PRODUCTPATH = PYF.Sequence(cfg.PATHS)
+    for d in self.dirs:
+      cfg.PATHS.PRODUCTPATH.append(d, None)
+    return cfg
+
+  def add_products(self, cfg, names):
+    inputs = []
+    PYF.streamOpener = SAT.CONFIG.ConfigOpener(self.dirs, inputs)
+    res = SAT.CONFIG.ConfigManager().add_products_configs(
+        cfg, names, PYF.ConfigMerger(), inputs)
+    return res, inputs
+
+  def test_010(self):
+    # the products are in PRODUCTS in the order of the application, after
+    # the ones already there; the file of the first directory is read
+    for name in ["A", "B", "C", "D"]:
+      self.write(self.dirs[1], name + ".pyconf", "name : '%s2'\n" % name)
+    self.write(self.dirs[0], "C.pyconf", "name : 'C1'\n")
+    cfg = self.get_config("B : { extra : 1 }")
+    res, inputs = self.add_products(cfg, ["D", "C", "B", "A", "E"])
+    self.assertTrue(res)
+    self.assertEqual(list(cfg.PRODUCTS.keys()), ["B", "D", "C", "A"])
+    # the merged product is read, the other ones on their first access
+    data = object.__getattribute__(cfg.PRODUCTS, "data")
+    self.assertNotIsInstance(data["B"], PROD.DeferredProductConfig)
+    self.assertEqual((cfg.PRODUCTS.B.name, cfg.PRODUCTS.B.extra), ("B2", 1))
+    self.assertIsInstance(data["C"], PROD.DeferredProductConfig)
+    self.assertEqual(cfg.PRODUCTS.C.name, "C1")
+    self.assertEqual(list(cfg.PRODUCTS.keys()), ["B", "D", "C", "A"])
+    self.assertIn(os.path.join(self.dirs[0], "C.pyconf"), inputs)
+    self.assertNotIn(os.path.join(self.dirs[1], "C.pyconf"), inputs)
+
+  def test_020(self):
+    # the files included by a product file are found with the stream opener
+    # of its config, even if another one is set when it is read
+    self.write(self.dirs[1], "common.pyconf", "option : 'x'\n")
+    self.write(self.dirs[0], "A.pyconf", "name : 'A'\ncommon : @'common.pyconf'\n")
+    self.write(self.dirs[0], "B.pyconf", "name : 'B'\ncommon : @'common.pyconf'\n")
+    cfg = self.get_config()
+    self.add_products(cfg, ["A", "B"])
+    other = SAT.CONFIG.ConfigOpener([self.tmpdir])
+    PYF.streamOpener = other
+    self.assertEqual(cfg.PRODUCTS.A.common.option, "x")
+    self.assertIs(PYF.streamOpener, other)
+    # and after the restore of a snapshot, with the one set again
+    restored = pickle.loads(pickle.dumps(cfg, pickle.HIGHEST_PROTOCOL))
+    data = object.__getattribute__(restored.PRODUCTS, "data")
+    self.assertIsNone(data["B"].stream_opener)
+    PROD.set_deferred_stream_opener(restored, SAT.CONFIG.ConfigOpener(self.dirs))
+    self.assertEqual(restored.PRODUCTS.B.common.option, "x")
+    self.assertIs(PYF.streamOpener, other)
+
+  def test_030(self):
+    # a product file with an error is not in PRODUCTS
+    self.write(self.dirs[0], "A.pyconf", "name : 'A'\n")
+    self.write(self.dirs[0], "B.pyconf", "name : \n")
+    cfg = self.get_config("B : { extra : 1 }")
+    res, inputs = self.add_products(cfg, ["A", "B"])
+    self.assertFalse(res)
+    cfg = self.get_config()
+    res, inputs = self.add_products(cfg, ["A", "B"])
+    self.assertTrue(res)
+    self.assertFalse("B" in cfg.PRODUCTS)
+    self.assertEqual(list(cfg.PRODUCTS.keys()), ["A"])
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
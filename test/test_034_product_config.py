@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+
+"""\
+configs of the products kept between the calls of get_product_config,
+by the called commands, and while the environments of the products are set
+"""
+
+import os
+import sys
+
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.debug as DBG
+import src.pyconf as PYF
+import src.product as PROD
+import src.environment as ENV
+import src.salomeTools as SAT
+import src.loggingSimple as LOG
+sys.path.insert(0, os.path.join(initializeTest.satdir, "commands"))
+
+verbose = False # True
+
+class FakeLogger(object):
+  """the logger of the calling command, for the links to the called ones"""
+
+  def __init__(self):
+    self.l_logFiles = []
+
+  def add_link(self, log_file_name, command_name, command_res, full_launched_command):
+    pass
+
+class TestCase(unittest.TestCase):
+  "Test the get_product_config and invalidate_product_config of product.py"""
+
+  def setUp(self):
+    self.sat = SAT.Sat(LOG.getUnittestLogger())
+    self.sat.setInternals(opt=["-v", "0"])
+    cfgManager = SAT.CONFIG.ConfigManager()
+    self.cfg = cfgManager.get_config(application="APPLI_TEST",
+                                     options=self.sat.options,
+                                     command="compile")
+    # two native products, A depending on B
+    self.names = ["A", "B"]
+    products = PYF.Mapping(self.cfg.APPLICATION)
+    for name, depend in [("A", "'B'"), ("B", "")]:
+      products[name] = "native"
+      self.cfg.PRODUCTS[name] = PYF.Config(DBG.InStream("""\
+name : '%s'
+from_file : '%s.pyconf'
+default : { name : '%s' get_source : 'native' depend : [%s] }
+""" % (name, name, name, depend)))
+    self.cfg.APPLICATION.products = products
+
+  def tearDown(self):
+    PROD.invalidate_product_config(self.cfg)
+    LOG.getUnittestLogger().getLogsAndClear()
+
+  def get(self, product_name):
+    stats = dict(PROD.product_config_stats)
+    prod_info = PROD.get_product_config(self.cfg, product_name)
+    return prod_info, dict((k, PROD.product_config_stats[k] - stats[k]) for k in stats)
+
+  def test_010(self):
+    # the config of a product is computed once, until it is invalidated
+    a, b = self.names
+    info_a, stats = self.get(a)
+    self.assertEqual(stats, {'hits': 0, 'misses': 1})
+    self.assertEqual(info_a.name, a)
+    self.get(b)
+    self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+    # invalidated for one product, the other one is kept
+    PROD.invalidate_product_config(self.cfg, a)
+    new_a, stats = self.get(a)
+    self.assertEqual(stats, {'hits': 0, 'misses': 1})
+    self.assertEqual(new_a.install_dir, info_a.install_dir)
+    self.assertEqual(self.get(b)[1], {'hits': 1, 'misses': 0})
+    # invalidated for all the products
+    PROD.invalidate_product_config(self.cfg)
+    for name in self.names:
+      self.assertEqual(self.get(name)[1], {'hits': 0, 'misses': 1})
+    # nothing to invalidate for another config
+    PROD.invalidate_product_config(PYF.Config(), a)
+    self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+
+  def test_020(self):
+    # a change of the sections of the products forgets their configs,
+    # not the change of another section
+    a, b = self.names
+    self.get(a)
+    self.get(b)
+    self.cfg.USER.test_034 = "yes"
+    self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+    self.cfg.APPLICATION.products[b] = initializeTest.satdir
+    self.assertEqual(self.get(a)[1], {'hits': 0, 'misses': 1})
+    prod_info, stats = self.get(b)
+    self.assertEqual(stats, {'hits': 0, 'misses': 1})
+    self.assertEqual(prod_info.get_source, "fixed")
+    # the computations do not change the configuration
+    self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+
+  def test_030(self):
+    # each caller gets a copy, which can be changed
+    a = self.names[0]
+    info_a = self.get(a)[0]
+    install_dir = info_a.install_dir
+    info_a.install_dir = "/other"
+    info_a.git_tag_description = "v1.0"
+    other, stats = self.get(a)
+    self.assertEqual(stats, {'hits': 1, 'misses': 0})
+    self.assertIsNot(other, info_a)
+    self.assertEqual(other.install_dir, install_dir)
+    self.assertNotIn("git_tag_description", other)
+    self.assertNotIn("git_tag_description", self.cfg.PRODUCTS[a].default)
+    # the config without install directory is not the one with it
+    stats = dict(PROD.product_config_stats)
+    info = PROD.get_product_config(self.cfg, a, with_install_dir=False)
+    info.install_dir = "/other"
+    info = PROD.get_product_config(self.cfg, a, with_install_dir=False)
+    self.assertEqual(PROD.product_config_stats["misses"] - stats["misses"], 1)
+    self.assertEqual(PROD.product_config_stats["hits"] - stats["hits"], 1)
+    self.assertNotEqual(info.install_dir, "/other")
+    self.assertEqual(self.get(a)[0].install_dir, install_dir)
+
+  def test_040(self):
+    # the configs are kept by the commands called by another one, which
+    # set the VARS of the command, and set them back
+    a = self.names[0]
+    self.get(a)
+    cfgManager = SAT.CONFIG.ConfigManager()
+    saved = cfgManager.set_volatile_vars(self.cfg, cfgManager.get_volatile_vars("make"))
+    self.assertEqual(self.cfg.VARS.command, "make")
+    self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+    cfgManager.set_volatile_vars(self.cfg, saved)
+    self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+    # with a called command
+    self.sat.cfg = self.cfg
+    res = self.sat.config("APPLI_TEST -v VARS.command", verbose=0,
+                          logger_add_link=FakeLogger())
+    self.assertEqual(res, 0)
+    self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+
+  def test_050(self):
+    # PRODUCT_ROOT_DIR is set to the workdir only if it is another value:
+    # the configs of the products are kept by the following environments
+    a = self.names[0]
+    logger = LOG.getUnittestLogger()
+    environ = self.cfg.APPLICATION.environ
+    environ.PRODUCT_ROOT_DIR = "/other"
+    env = ENV.SalomeEnviron(self.cfg, ENV.Environ({}), forBuild=True)
+    env.set_application_env(logger)
+    self.assertEqual(environ.PRODUCT_ROOT_DIR, self.cfg.APPLICATION.workdir)
+    self.assertEqual(env.get("PRODUCT_ROOT_DIR"), self.cfg.APPLICATION.workdir)
+    self.get(a)
+    for i in range(2):
+      env = ENV.SalomeEnviron(self.cfg, ENV.Environ({}), forBuild=True)
+      env.set_application_env(logger)
+      self.assertEqual(env.get("PRODUCT_ROOT_DIR"), self.cfg.APPLICATION.workdir)
+      self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+    # nor by the environment of a package
+    env = ENV.SalomeEnviron(self.cfg, ENV.Environ({}), for_package="package")
+    env.set_application_env(logger)
+    self.assertEqual(self.get(a)[1], {'hits': 1, 'misses': 0})
+
+if __name__ == '__main__':
+  unittest.main(exit=False)
+  pass
@@ -19,12 +19,16 @@
 
 import os
 import sys
+import time
+import shutil
+import tempfile
 import unittest
 
 import initializeTest # set PATH etc for test
 
 import src.debug as DBG # Easy print stderr (for DEBUG only)
 import src.pyconf as PYF # 0.3.7
+import benchmark_pyconf as BPYF # the historical reader
 
 _EXAMPLES = {
 1 : """\
@@ -252,6 +256,429 @@ Bienvenue, Yves
     res = cfg.cc
     DBG.write("test_120 cfg.cc debug", res)
     
+  def test_130(self):
+    # buffered reader gives the same tokens and locations as historical reader
+    txt = """\
+aa : 1 # comment
+bb : 'one\\'s' ccc : [1, 2.5, True] # other
+dd : '''multi
+line''' ee : "" ff : $aa + 'x'
+gg : { hh : ii[0] }"""
+    def tokens(readerClass):
+      reader = readerClass(PYF.Config())
+      reader.setStream(DBG.InStream(txt))
+      res = []
+      while True:
+        tt, tv = reader.getToken()
+        res.append((tt, tv, reader.comment, reader.location()))
+        if tt == PYF.EOF:
+          return res
+    self.assertEqual(tokens(PYF.ConfigReader), tokens(BPYF.StreamConfigReader))
+
+  def test_140(self):
+    # parse cache
+    tmpdir = tempfile.mkdtemp()
+    try:
+      fileName = os.path.join(tmpdir, "cached.pyconf")
+      with open(fileName, "w") as f:
+        f.write("aa : 'a'\n# comment\nbb : [$aa + 'b', { cc : $bb[0] }]\n")
+      PYF.parseCache = PYF.ParseCache(os.path.join(tmpdir, "cache"))
+
+      cfg1 = PYF.Config(open(fileName))
+      cfg2 = PYF.Config(open(fileName))
+      self.assertEqual(PYF.parseCache.misses, 1)
+      self.assertEqual(PYF.parseCache.hits, 1)
+      for cfg in [cfg1, cfg2]:
+        self.assertEqual(cfg.bb[1].cc, "ab")
+      outStream1 = DBG.OutStream()
+      cfg1.__save__(outStream1)
+      outStream2 = DBG.OutStream()
+      cfg2.__save__(outStream2)
+      self.assertEqual(outStream1.value, outStream2.value)
+
+      with open(fileName, "w") as f:
+        f.write("aa : 'z'\n")
+      cfg3 = PYF.Config(open(fileName))
+      self.assertEqual(PYF.parseCache.misses, 2)
+      self.assertEqual(cfg3.aa, "z")
+      self.assertNotIn("bb", cfg3)
+    finally:
+      PYF.parseCache = None
+      shutil.rmtree(tmpdir)
+
+  def test_150(self):
+    # cache of resolved references and expressions
+    inStream = DBG.InStream(_EXAMPLES[5])
+    cfg = PYF.Config(inStream)
+    self.assertEqual(cfg.dd.d4, "Herve bye")
+    hits = PYF.resolutionStats["hits"]
+    self.assertEqual(cfg.dd.d4, "Herve bye")
+    self.assertEqual(PYF.resolutionStats["hits"], hits + 1)
+
+    cfg.bb = "Yves" # invalidates the cache
+    self.assertEqual(cfg.dd.d4, "Yves bye")
+    self.assertEqual(cfg.cc[3], "Yves hello")
+
+    merger = PYF.ConfigMerger(PYF.overwriteMergeResolve)
+    merger.merge(cfg, PYF.Config(DBG.InStream("bb : 'Anna'")))
+    self.assertEqual(cfg.dd.d4, "Anna bye")
+    del cfg["bb"]
+    self.assertRaises(PYF.ConfigResolutionError, lambda: cfg.dd.d4)
+
+  def test_160(self):
+    # compact nodes: ordered keys, sparse comments, no instance dict
+    inStream = DBG.InStream("zz : 1\n# comment of yy\nyy : [ 1\n# comment of 2\n2 ]\nxx : 3\n")
+    cfg = PYF.Config(inStream)
+    self.assertEqual(cfg.keys(), ["zz", "yy", "xx"])
+    self.assertEqual(object.__getattribute__(cfg, "comments"), {"yy": " comment of yy\n"})
+    self.assertEqual(object.__getattribute__(cfg.yy, "comments"), {1: " comment of 2\n"})
+    for value in [cfg, cfg.yy]:
+      self.assertFalse(hasattr(value, "__dict__"))
+
+    outStream = DBG.OutStream()
+    cfg.__save__(outStream)
+    res = outStream.value
+    self.assertIn("# comment of yy", res)
+    self.assertIn("# comment of 2", res)
+
+    del cfg["yy"]
+    cfg.ww = 4
+    self.assertEqual(cfg.keys(), ["zz", "xx", "ww"])
+    self.assertEqual(object.__getattribute__(cfg, "comments"), {})
+
+  def test_170(self):
+    # merge shares the new subtrees and appends the sequences
+    cfg1 = PYF.Config(DBG.InStream("aa : [ 1\n# one\n 2 ]\nbb : { cc : 1 }\n"))
+    cfg2 = PYF.Config(DBG.InStream("aa : [ 3\n# three\n 4 ]\ndd : { ee : $bb.cc }\n"))
+    dd = cfg2.dd
+    PYF.ConfigMerger().merge(cfg1, cfg2)
+    self.assertIs(cfg1.dd, dd)
+    self.assertIs(object.__getattribute__(dd, "parent"), cfg1)
+    self.assertEqual(cfg1.dd.ee, 1)
+    self.assertEqual(cfg1.aa[:], [1, 2, 3, 4])
+    self.assertEqual(object.__getattribute__(cfg1.aa, "comments"),
+                     {1: " one\n", 3: " three\n"})
+
+  def test_180(self):
+    # compiled __overwrite__ instructions and command line rules
+    cfg = PYF.Config(DBG.InStream("""\
+VARS : { dist : 'CO7' }
+APPLICATION : { products : { KERNEL : '9.0', 'GUI-X' : '9.0' } }
+"""))
+    overwrite = PYF.Config(DBG.InStream("""\
+__overwrite__ :
+[
+  {
+    __condition__ : "VARS.dist in ['CO7']"
+    'APPLICATION.products.KERNEL' : '9.1'
+    "APPLICATION.products['GUI-X']" : '9.2'
+  }
+  {
+    __condition__ : "VARS.dist in ['FD30']"
+    'APPLICATION.products.KERNEL' : '10.0'
+  }
+]
+"""))
+    PYF.ConfigMerger().merge(cfg, overwrite)
+    self.assertEqual(cfg.APPLICATION.products.KERNEL, '9.1')
+    self.assertEqual(cfg.APPLICATION.products['GUI-X'], '9.2')
+
+    self.assertEqual(PYF.compilePath("a['b'][0].c"),
+                     [(False, 'a'), (True, 'b'), (True, 0), (False, 'c')])
+    self.assertIsNone(PYF.compilePath("a + b"))
+    PYF.applyOverwriteRule(cfg, "APPLICATION.products.KERNEL='9.3'")
+    PYF.applyOverwriteRule(cfg, "VARS.dist = cfg.VARS.dist + '.9'")
+    self.assertEqual(cfg.APPLICATION.products.KERNEL, '9.3')
+    self.assertEqual(cfg.VARS.dist, 'CO7.9')
+
+  def test_190(self):
+    # path index of getByPath
+    cfg = PYF.Config(DBG.InStream(_EXAMPLES[5]))
+    self.assertEqual(cfg.getByPath("dd.d4"), "Herve bye")
+    self.assertEqual(cfg.getByPath("cc[3]"), "Herve hello")
+    self.assertIs(cfg.getByPath("dd"), cfg.dd)
+    self.assertEqual(cfg.getByPath("cc[1:3]"), ["cc2", "cc3"]) # not indexed
+    cfg.dd.d4 = "changed"
+    self.assertEqual(cfg.getByPath("dd.d4"), "changed")
+    self.assertRaises(PYF.ConfigError, cfg.getByPath, "dd.d5")
+    self.assertRaises(PYF.ConfigError, cfg.getByPath, "cc[9]")
+
+  def test_200(self):
+    # buffered writer, one write for the whole config
+    cfg = PYF.Config(DBG.InStream("""\
+# comment a
+a : 'x'
+'b-c' : 1
+m : { }
+s : [ ]
+n :
+{
+  # comment r
+  r : $a
+  e : $a + 'y'
+  l : [ 'u', { k : 2.5 }, [ ] ]
+}
+"""))
+    expected = """\
+# comment a
+a : 'x'
+'b-c' : 1
+m : { }
+s : [ ]
+n :
+{
+  # comment r
+  r : $a
+  e : $a + 'y'
+  l :
+  [
+    'u'
+    {
+      k : 2.5
+    }
+ [ ]
+  ]
+}
+"""
+    writes = []
+    class Stream(DBG.OutStream):
+      def write(self, text):
+        writes.append(text)
+        return DBG.OutStream.write(self, text)
+    outStream = Stream()
+    cfg.__save__(outStream)
+    self.assertEqual(outStream.value, expected)
+    self.assertEqual(len(writes), 1)
+    outStream = DBG.OutStream()
+    cfg.__save__(outStream, evaluated=True)
+    self.assertEqual(outStream.value,
+                     expected.replace("$a + 'y'", "'xy'").replace("$a", "'x'"))
+    self.assertEqual(PYF.ConfigWriter().dumps(cfg.n.l, 1),
+                     "  'u'\n  {\n    k : 2.5\n  }\n [ ]\n")
+
+  def test_210(self):
+    # snapshots of merged configurations
+    tmpdir = tempfile.mkdtemp()
+    try:
+      fileName = os.path.join(tmpdir, "input.pyconf")
+      with open(fileName, "w") as f:
+        f.write("aa : 'a'\nbb : $aa + 'b'\ncc : { dd : [$bb, 'x'] }\n")
+      cfg = PYF.Config(open(fileName))
+      PYF.ConfigMerger().merge(cfg, PYF.Config(DBG.InStream("ff : { gg : $aa }\n")))
+      os.mkdir(os.path.join(tmpdir, "cache")) # not to change tmpdir in store
+      cache = PYF.SnapshotCache(os.path.join(tmpdir, "cache"))
+      self.assertTrue(cache.store("key", [fileName, tmpdir], cfg, "extra"))
+
+      restored, extra = cache.restore("key")
+      self.assertEqual(extra, "extra")
+      self.assertEqual(restored.cc.dd[0], "ab")
+      self.assertEqual(restored.ff.gg, "a")
+      self.assertIs(restored.ff.parent, restored)
+      restored.aa = "z"
+      self.assertEqual(restored.cc.dd[0], "zb")
+      self.assertEqual(restored.ff.gg, "z")
+      self.assertEqual(cfg.cc.dd[0], "ab")
+      self.assertIsNone(cache.restore("other key"))
+
+      with open(fileName, "a") as f:
+        f.write("ee : 1\n")
+      self.assertIsNone(cache.restore("key"))
+      stats = cache.getStats()
+      self.assertEqual((stats["hits"], stats["misses"], stats["stores"]), (1, 2, 1))
+      self.assertEqual(stats["entries"], 1)
+
+      cfg.addNamespace(sys, "mysys")
+      self.assertFalse(cache.store("key", [], cfg))
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_220(self):
+    # deferred values are loaded on first access
+    class DeferredValue(PYF.Deferred):
+      __slots__ = ("text", "loads")
+      def __init__(self, text):
+        self.text = text
+        self.loads = 0
+      def load(self):
+        self.loads += 1
+        if self.text is None:
+          return None
+        return PYF.Config(DBG.InStream(self.text))
+      def __repr__(self):
+        return "@%r" % "file.pyconf"
+
+    cfg = PYF.Config(DBG.InStream("PRODUCTS : { }\nname : 'x'\n"))
+    good = DeferredValue("version : $name + '1'\n")
+    bad = DeferredValue(None)
+    cfg.PRODUCTS.addMapping("good", good, None)
+    cfg.PRODUCTS.addMapping("bad", bad, None)
+    self.assertEqual(list(cfg.PRODUCTS.keys()), ["good", "bad"])
+    self.assertIn("@'file.pyconf'", PYF.ConfigWriter(False).dumps(cfg.PRODUCTS))
+    self.assertEqual((good.loads, bad.loads), (0, 0))
+
+    self.assertTrue("good" in cfg.PRODUCTS)
+    self.assertEqual(good.loads, 1)
+    self.assertIs(cfg.PRODUCTS.good.parent, cfg.PRODUCTS)
+    self.assertEqual(cfg.PRODUCTS.good.version, "x1")
+    self.assertEqual(good.loads, 1)
+
+    self.assertFalse("bad" in cfg.PRODUCTS)
+    self.assertEqual(list(cfg.PRODUCTS.keys()), ["good"])
+
+  def test_230(self):
+    # deferred values prefetched by several threads, loaded in order
+    import threading
+    class DeferredValue(PYF.Deferred):
+      __slots__ = ("value", "thread", "prefetched")
+      def __init__(self, value):
+        self.value = value
+        self.thread = None
+        self.prefetched = False
+      def prefetch(self):
+        self.thread = threading.current_thread()
+        self.prefetched = True
+      def load(self):
+        return self.value
+
+    cfg = PYF.Config(DBG.InStream("PRODUCTS : { }\n"))
+    values = [DeferredValue(i) for i in range(10)]
+    values[3].value = None
+    for i, value in enumerate(values):
+      cfg.PRODUCTS.addMapping("p%d" % i, value, None)
+    loaded = cfg.PRODUCTS.loadDeferreds(["p9", "p3", "p1", "p0", "unknown"], workers=4)
+    self.assertEqual(loaded, ["p9", "p1", "p0"])
+    self.assertEqual(cfg.PRODUCTS.p9, 9)
+    self.assertNotIn("p3", cfg.PRODUCTS)
+    self.assertTrue(values[1].prefetched)
+    self.assertIsNot(values[1].thread, threading.current_thread())
+    self.assertFalse(values[2].prefetched)
+    self.assertEqual(list(cfg.PRODUCTS.keys())[:4], ["p0", "p1", "p2", "p4"])
+
+  def test_240(self):
+    # the least recently used snapshots are removed
+    tmpdir = tempfile.mkdtemp()
+    try:
+      cache = PYF.SnapshotCache(tmpdir, maxEntries=3, maxAge=1000)
+      cfg = PYF.Config(DBG.InStream("aa : 'a'\n"))
+      now = time.time()
+      for i in range(3):
+        self.assertTrue(cache.store("k%d" % i, [], cfg))
+        os.utime(cache.getEntryPath("k%d" % i), (now - 100 + i, now - 100 + i))
+      # the restore is a use: k0 is the most recently used
+      self.assertIsNotNone(cache.restore("k0"))
+      self.assertTrue(cache.store("k3", [], cfg))
+      self.assertIsNone(cache.restore("k1"))
+      for key in ["k0", "k2", "k3"]:
+        self.assertIsNotNone(cache.restore(key))
+      # and the ones not used for maxAge seconds
+      os.utime(cache.getEntryPath("k2"), (now - 2000, now - 2000))
+      with open(cache.getEntryPath("k4") + ".123", "w") as f:
+        f.write("interrupted store")
+      os.utime(cache.getEntryPath("k4") + ".123", (now - 2000, now - 2000))
+      self.assertEqual(cache.prune(), 1)
+      self.assertEqual(sorted(os.listdir(tmpdir)),
+                       sorted(os.path.basename(cache.getEntryPath(k)) for k in ["k0", "k3"]))
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_250(self):
+    # the snapshots of the config depend on the code of sat
+    import src.salomeTools as SAT
+    signature = SAT.CONFIG.get_code_signature()
+    self.assertEqual(len(signature), 40)
+    cfgManager = SAT.CONFIG.ConfigManager()
+    var = {"user": "u", "command": "config"}
+    key = cfgManager.get_snapshot_key(var, "APP", None)
+    try:
+      SAT.CONFIG._code_signature = "other code"
+      self.assertNotEqual(cfgManager.get_snapshot_key(var, "APP", None), key)
+    finally:
+      SAT.CONFIG._code_signature = signature
+    self.assertEqual(cfgManager.get_snapshot_key(var, "APP", None), key)
+
+  def test_260(self):
+    # the stamp of the last change of each subtree
+    cfg = PYF.Config(DBG.InStream("aa : { bb : { cc : 1 } dd : [1, 2] }\nee : { ff : 2 }\n"))
+    aa, ee = cfg.aa, cfg.ee
+    stamps = [PYF.getChangeStamp(c) for c in [cfg, aa, aa.bb, ee]]
+    cfg.aa.bb.cc = 3
+    self.assertNotEqual(PYF.getChangeStamp(aa.bb), stamps[2])
+    self.assertNotEqual(PYF.getChangeStamp(aa), stamps[1])
+    stamp = PYF.getChangeStamp(cfg)
+    self.assertNotEqual(stamp, stamps[0])
+    self.assertEqual(PYF.getChangeStamp(ee), stamps[3])
+    # the change after a read of the stamp changes it again
+    cfg.aa.dd.append(3, None)
+    self.assertNotEqual(PYF.getChangeStamp(cfg), stamp)
+    self.assertEqual(PYF.getChangeStamp(ee), stamps[3])
+    # a copy is resolved as the original, its changes are not changes
+    # of the original and of its parents
+    cfg.ee.gg = PYF.Reference(cfg, PYF.DOLLAR, "ff")
+    cfg.ee.hh = PYF.Reference(cfg, PYF.DOLLAR, "aa")
+    ee = PYF.copyContainer(cfg.ee)
+    stamp = PYF.getChangeStamp(cfg)
+    ee.ff = 4
+    ee.ii = PYF.Mapping(ee)
+    ee.ii.jj = 5
+    self.assertEqual((ee.gg, cfg.ee.gg), (4, 2))
+    self.assertEqual(ee.hh.bb.cc, 3)
+    self.assertEqual(cfg.ee.keys(), ["ff", "gg", "hh"])
+    aa = PYF.copyContainer(cfg.aa)
+    aa.dd.append(4, None)
+    self.assertEqual((len(aa.dd), len(cfg.aa.dd)), (4, 3))
+    self.assertEqual(PYF.getChangeStamp(cfg), stamp)
+    # a deferred value, changed after its load
+    class DeferredValue(PYF.Deferred):
+      __slots__ = ("value",)
+      def load(self):
+        return self.value
+    value = DeferredValue()
+    value.value = PYF.Config(DBG.InStream("kk : { ll : 1 }\n"))
+    value.value.kk.ll = 2
+    cfg.ee.addMapping("mm", value, None)
+    self.assertEqual(cfg.ee.mm.kk.ll, 2)
+    stamp = PYF.getChangeStamp(cfg)
+    cfg.ee.mm.kk.ll = 3
+    self.assertNotEqual(PYF.getChangeStamp(cfg), stamp)
+
+  def test_270(self):
+    # the cache files are replaced atomically: a reader of the previous
+    # file reads it entirely, the next readers read the new one
+    tmpdir = tempfile.mkdtemp()
+    try:
+      path = os.path.join(tmpdir, "entry.pickle")
+      def write(text):
+        with open(path + ".123", "w") as f:
+          f.write(text)
+        PYF.replaceFile(path + ".123", path)
+      write("previous")
+      reader = open(path)
+      write("new")
+      with reader:
+        self.assertEqual(reader.read(), "previous")
+      with open(path) as f:
+        self.assertEqual(f.read(), "new")
+      self.assertEqual(os.listdir(tmpdir), ["entry.pickle"])
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_280(self):
+    # the command line rules refer to cfg, compiled or executed
+    cfg = PYF.Config(DBG.InStream("""\
+VARS : { dist : 'CO7', suffix : '.9' }
+APPLICATION : { products : { KERNEL : '9.0' } }
+"""))
+    PYF.applyOverwriteRule(cfg, "VARS.dist += cfg.VARS.suffix")
+    self.assertEqual(cfg.VARS.dist, 'CO7.9')
+    PYF.applyOverwriteRule(cfg, "APPLICATION.products.KERNEL = cfg.VARS.dist")
+    self.assertEqual(cfg.APPLICATION.products.KERNEL, 'CO7.9')
+    # and to the global names given, as those of the caller
+    namespace = {'version' : '9.4'}
+    PYF.applyOverwriteRule(cfg, "APPLICATION.products.KERNEL = version", namespace)
+    self.assertEqual(cfg.APPLICATION.products.KERNEL, '9.4')
+    PYF.applyOverwriteRule(cfg, "APPLICATION.products.KERNEL += version", namespace)
+    self.assertEqual(cfg.APPLICATION.products.KERNEL, '9.49.4')
+
   def test_999(self):
     # one shot tearDown() for this TestCase
     # SAT.setLocale() # end test english